@@ -0,0 +1,79 @@
+"""벤치마크 공용 도구: 백분위 요약, 기준치 저장/비교, 커밋 식별."""
+import json
+import math
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+BASELINE_DIR = ROOT_DIR / "benchmarks" / "baselines"
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """선형 보간 백분위 (q: 0~100). 값이 없으면 0."""
+    data = sorted(values)
+    if not data:
+        return 0.0
+    pos = (len(data) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return data[lo] + (data[hi] - data[lo]) * (pos - lo)
+
+
+def summarize_ms(seconds: Iterable[float]) -> Dict[str, float]:
+    """초 단위 측정값 → ms 단위 n/mean/p50/p95/max."""
+    data = [s * 1000 for s in seconds]
+    if not data:
+        return {"n": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "n": len(data),
+        "mean": round(statistics.fmean(data), 2),
+        "p50": round(percentile(data, 50), 2),
+        "p95": round(percentile(data, 95), 2),
+        "max": round(max(data), 2),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(path: Path, baseline: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    slack: float = 0.0,
+    unit: str = "ms",
+) -> List[str]:
+    """{group: {metric: 값}} 결과가 기준치 * (1 + tolerance) + slack보다 크면 회귀 목록에 추가.
+
+    slack은 기준치가 수 ms 수준일 때 비율만으로는 잡음에 흔들리는 것을 막는다 (값과 같은 단위).
+    """
+    regressions = []
+    for group, metrics in results.items():
+        for metric, limit in baseline.get(group, {}).items():
+            value = metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(limit, (int, float)):
+                continue
+            if value > limit * (1 + tolerance) + slack:
+                regressions.append(
+                    f"{group}.{metric}: {value:.1f}{unit} > 기준 {limit:.1f}{unit} (+{tolerance:.0%})"
+                )
+    return regressions
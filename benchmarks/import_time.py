@@ -0,0 +1,191 @@
+"""
+서버 기동 시간 벤치마크.
+
+1) `python -X importtime -c "import chatbot.main"` 으로 import 시간과 패키지별 비중을 잰다.
+2) uvicorn으로 서버를 띄워 /api/health가 처음 응답하기까지(health)와
+   status가 "starting"에서 벗어나기까지(ready)의 시간을 잰다.
+
+    python -m benchmarks.import_time                  # lazy 모드 측정 + 기준치 비교
+    python -m benchmarks.import_time --mode eager lazy
+    python -m benchmarks.import_time --record         # 현재 값을 기준치로 저장
+
+기준치(benchmarks/baselines/startup.json)보다 --tolerance 이상 느리면 종료 코드 1.
+기준치는 머신마다 다르므로 CI 러너에서 --record로 다시 만든다.
+기동 중에는 외부 API를 부르지 않으므로 OPENAI_API_KEY가 없으면 더미 값을 넣는다.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import statistics
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import BASELINE_DIR, ROOT_DIR, compare, load_baseline, save_baseline
+
+BASELINE_PATH = BASELINE_DIR / "startup.json"
+MODULE = "chatbot.main"
+
+
+def _env(mode: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["STARTUP_MODE"] = mode
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark-placeholder")
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """-X importtime 출력 → [{"module", "self_us", "cumulative_us", "depth"}]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = head.split(":", 1)[1]
+        stripped = name.lstrip()
+        rows.append(
+            {
+                "module": stripped.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(name) - len(stripped) - 1) // 2,
+            }
+        )
+    return rows
+
+
+def measure_imports(mode: str, cwd: str) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        cwd=cwd,
+        env=_env(mode),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {MODULE} 실패:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    total = next((r["cumulative_us"] for r in rows if r["module"] == MODULE), 0)
+    by_package: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        by_package[row["module"].split(".")[0]] += row["self_us"]
+    top = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    return {"import_ms": total / 1000, "packages_ms": {name: us / 1000 for name, us in top}}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_ready(mode: str, cwd: str, timeout: float = 120.0) -> Dict[str, Any]:
+    """프로세스 시작 → /api/health 첫 응답(health_ms) → status != starting(ready_ms)."""
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{MODULE}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+        env=_env(mode),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    health_ms: Optional[float] = None
+    body: Dict[str, Any] = {}
+    try:
+        with httpx.Client(timeout=2.0) as client:
+            while time.perf_counter() - started < timeout:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"서버가 종료됨:\n{proc.stderr.read()[-2000:]}")
+                try:
+                    res = client.get(f"http://127.0.0.1:{port}/api/health")
+                except httpx.TransportError:
+                    time.sleep(0.01)
+                    continue
+                body = res.json()
+                if health_ms is None:
+                    health_ms = (time.perf_counter() - started) * 1000
+                if body.get("status") != "starting":
+                    break
+                time.sleep(0.01)
+            else:
+                raise RuntimeError(f"{timeout:.0f}초 안에 준비되지 않음")
+        ready_ms = (time.perf_counter() - started) * 1000
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {"health_ms": health_ms, "ready_ms": ready_ms, "phases": body.get("startup", {}).get("phases", {})}
+
+
+def run(mode: str, runs: int) -> Dict[str, Any]:
+    imports, health, ready = [], [], []
+    last: Dict[str, Any] = {}
+    # 세션/작업 DB가 리포지토리에 생기지 않도록 임시 디렉터리에서 실행
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as cwd:
+        for _ in range(runs):
+            result = measure_imports(mode, cwd)
+            imports.append(result["import_ms"])
+            served = measure_ready(mode, cwd)
+            health.append(served["health_ms"])
+            ready.append(served["ready_ms"])
+            last = {"packages_ms": result["packages_ms"], "phases": served["phases"]}
+    return {
+        "import_ms": round(statistics.median(imports), 1),
+        "health_ms": round(statistics.median(health), 1),
+        "ready_ms": round(statistics.median(ready), 1),
+        **last,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="서버 import/기동 시간 벤치마크")
+    parser.add_argument("--mode", nargs="+", choices=("lazy", "eager"), default=["lazy"])
+    parser.add_argument("--runs", type=int, default=3, help="모드별 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="기준치 대비 허용 비율")
+    parser.add_argument("--record", action="store_true", help="측정값을 기준치로 저장")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    results = {mode: run(mode, args.runs) for mode in args.mode}
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for mode, r in results.items():
+            print(f"[{mode}] import {r['import_ms']:.0f}ms  health {r['health_ms']:.0f}ms  ready {r['ready_ms']:.0f}ms")
+            print("  import 비중: " + ", ".join(f"{k} {v:.0f}ms" for k, v in r["packages_ms"].items()))
+            print("  기동 단계: " + ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in r["phases"].items()))
+
+    baseline = load_baseline(args.baseline)
+    if args.record:
+        for mode, r in results.items():
+            baseline[mode] = {k: r[k] for k in ("import_ms", "health_ms", "ready_ms")}
+        save_baseline(args.baseline, baseline)
+        print(f"기준치 저장: {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"기준치 없음 ({args.baseline}) - --record로 생성하세요")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"  ! {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
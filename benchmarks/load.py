@@ -0,0 +1,363 @@
+"""
+동시 다중 사용자 부하 생성기.
+
+스탠드인 LLM/로컬 벡터 백엔드로 서버(uvicorn, 단일 프로세스)를 자식 프로세스로 띄운 뒤
+1) 합성 사용자 N명을 /api/auth/register로 가입시키고
+2) 체크리스트 CSV 선택지로 만든 프로필을 /api/profile로 저장하고
+3) 목표 도착률(초당 요청 수, 포아송 도착)로 /api/chat(chat/info)과 /api/history를 섞어 보낸다.
+엔드포인트별 지연 백분위, 상태 코드, 오류율, 처리량을 보고한다. 외부 API 지연이 고정된
+스탠드인이라 파일 I/O, 이벤트 루프 블로킹, 락 경합 같은 우리 코드의 병목이 드러난다.
+
+    python -m benchmarks.load --users 50 --rate 20 --duration 30
+    python -m benchmarks.load --mix chat=0.5,info=0.2,history=0.3 --latency first_token=1.0
+    python -m benchmarks.load --url http://127.0.0.1:8000 --users 5 --rate 1   # 이미 떠 있는 서버 (실제 LLM)
+
+도착은 응답을 기다리지 않는 개방형(open loop)이라 서버가 느려져도 부하가 줄지 않는다.
+/api/health를 주기적으로 찔러 본 지연(loop_probe)은 이벤트 루프가 막힌 정도를 보여 준다.
+429(입장 제어 거절)는 오류와 따로 센다.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import socket
+import asyncio
+import tempfile
+import subprocess
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import ROOT_DIR, git_revision, summarize_ms
+from benchmarks.scenarios import all_turns
+
+CHECKLIST_PATH = ROOT_DIR / "data" / "user_profile_checklist.csv"
+DEFAULT_MIX = "chat=0.4,info=0.3,history=0.3"
+
+
+def serve(args) -> int:
+    """자식 프로세스: 스탠드인을 설치하고 chatbot.main.app을 띄운다."""
+    from benchmarks.standins import LatencyModel, build_fixture_indexes, install, prepare_environment
+
+    prepare_environment(args.workdir)
+    install(LatencyModel.parse(args.latency), args.vector_latency)
+    build_fixture_indexes()
+
+    import uvicorn
+    from chatbot.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+    return 0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args) -> subprocess.Popen:
+    port = _free_port()
+    args.url = f"http://127.0.0.1:{port}"
+    cmd = [
+        sys.executable,
+        "-m",
+        "benchmarks.load",
+        "--serve",
+        "--port",
+        str(port),
+        "--workdir",
+        tempfile.mkdtemp(prefix="load-bench-"),
+        "--latency",
+        args.latency,
+        "--vector-latency",
+        str(args.vector_latency),
+    ]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("STARTUP_MODE", "eager")  # 첫 요청이 엔진 초기화를 떠안지 않게
+    proc = subprocess.Popen(cmd, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + 120
+    with httpx.Client(timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"서버가 종료됨:\n{proc.stderr.read()[-2000:]}")
+            try:
+                if client.get(f"{args.url}/api/health").json().get("status") != "starting":
+                    return proc
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("서버가 120초 안에 준비되지 않음")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, raw = part.partition("=")
+        if key not in ("chat", "info", "history"):
+            raise ValueError(f"알 수 없는 요청 종류: {key}")
+        mix[key] = float(raw)
+    if sum(mix.values()) <= 0:
+        raise ValueError("요청 비율 합이 0입니다")
+    return mix
+
+
+def synthetic_profiles(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """체크리스트 CSV의 선택지를 무작위로 골라 프로필을 만든다 (텍스트 문항은 짧은 더미 값)."""
+    with open(CHECKLIST_PATH, "r", encoding="utf-8") as f:
+        questions = [row for row in csv.DictReader(f) if row.get("question_id")]
+    profiles = []
+    for i in range(count):
+        profile = {}
+        for q in questions:
+            options = [o for o in (q.get("options_kr") or "").split(";") if o]
+            if options:
+                profile[q["question_id"]] = rng.choice(options)
+            else:
+                profile[q["question_id"]] = f"사용자{i}" if q["question_id"] == "A1" else "특별히 없어요"
+        profiles.append(profile)
+    return profiles
+
+
+class Recorder:
+    """엔드포인트별 지연/상태 코드 기록."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, endpoint: str, seconds: float, status: str) -> None:
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    async def call(self, endpoint: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            res = await request
+        except httpx.TimeoutException:
+            self.add(endpoint, time.perf_counter() - started, "timeout")
+            return None
+        except httpx.TransportError as exc:
+            self.add(endpoint, time.perf_counter() - started, type(exc).__name__)
+            return None
+        self.add(endpoint, time.perf_counter() - started, str(res.status_code))
+        return res
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        out = {}
+        for endpoint, latencies in self.latencies.items():
+            statuses = self.statuses[endpoint]
+            total = sum(statuses.values())
+            ok = sum(n for code, n in statuses.items() if code.startswith("2"))
+            rejected = statuses.get("429", 0)
+            out[endpoint] = {
+                "requests": total,
+                "ok": ok,
+                "error_rate": round((total - ok - rejected) / total, 4) if total else 0.0,
+                "rejected_rate": round(rejected / total, 4) if total else 0.0,
+                "throughput_rps": round(ok / duration, 2) if duration else 0.0,
+                "latency_ms": summarize_ms(latencies),
+                "statuses": dict(statuses),
+            }
+        return out
+
+
+async def setup_users(client: httpx.AsyncClient, rec: Recorder, args, rng: random.Random) -> Dict[str, str]:
+    """가입 + 프로필 저장. {user_id: token}."""
+    prefix = f"load-{int(time.time())}-{rng.randrange(1 << 16):04x}"
+    profiles = synthetic_profiles(args.users, rng)
+    gate = asyncio.Semaphore(args.setup_concurrency)
+    tokens: Dict[str, str] = {}
+
+    async def one(i: int) -> None:
+        user_id = f"{prefix}-{i}"
+        async with gate:
+            res = await rec.call(
+                "register",
+                client.post("/api/auth/register", json={"user_id": user_id, "password": "load-test", "name": f"부하{i}"}),
+            )
+            if res is None or res.status_code != 200:
+                return
+            token = res.json()["token"]
+            await rec.call(
+                "profile",
+                client.post(
+                    "/api/profile", json={"profile": profiles[i]}, headers={"Authorization": f"Bearer {token}"}
+                ),
+            )
+            tokens[user_id] = token
+
+    await asyncio.gather(*(one(i) for i in range(args.users)))
+    return tokens
+
+
+async def drive(client: httpx.AsyncClient, rec: Recorder, tokens: Dict[str, str], args, rng: random.Random) -> float:
+    """목표 도착률로 요청을 보내고 실제 부하 구간 길이(초)를 돌려준다."""
+    mix = parse_mix(args.mix)
+    kinds, weights = list(mix), list(mix.values())
+    questions = defaultdict(list)
+    for turn in all_turns():
+        questions[turn["mode"]].append(turn["question"])
+    users = list(tokens)
+    in_flight: set = set()
+    dropped = 0
+
+    async def fire(kind: str, user_id: str) -> None:
+        headers = {"Authorization": f"Bearer {tokens[user_id]}"}
+        if kind == "history":
+            await rec.call("history", client.get("/api/history", headers=headers))
+        else:
+            body = {"message": rng.choice(questions[kind]), "mode": kind}
+            await rec.call(f"chat:{kind}", client.post("/api/chat", json=body, headers=headers))
+
+    async def probe(stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            await rec.call("loop_probe", client.get("/api/health"))
+            await asyncio.sleep(args.probe_interval)
+
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(stop))
+    started = time.perf_counter()
+    next_at = started
+    while True:
+        next_at += rng.expovariate(args.rate)
+        if next_at - started >= args.duration:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if len(in_flight) >= args.max_in_flight:
+            dropped += 1  # 클라이언트 쪽 상한 초과: 보내지 않고 센다
+            continue
+        task = asyncio.create_task(fire(rng.choices(kinds, weights)[0], rng.choice(users)))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    load_seconds = time.perf_counter() - started
+    if in_flight:
+        await asyncio.wait(in_flight)
+    stop.set()
+    await prober
+    rec.statuses["client"]["dropped"] += dropped
+    return load_seconds
+
+
+async def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.max_in_flight + 8, max_keepalive_connections=args.max_in_flight + 8)
+    async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+        setup = Recorder()
+        setup_started = time.perf_counter()
+        tokens = await setup_users(client, setup, args, rng)
+        setup_seconds = time.perf_counter() - setup_started
+        if not tokens:
+            raise RuntimeError("가입에 성공한 사용자가 없습니다")
+
+        rec = Recorder()
+        load_seconds = await drive(client, rec, tokens, args, rng)
+        client_stats = dict(rec.statuses.pop("client", {}))
+        server = (await client.get("/api/health")).json()
+
+    return {
+        "revision": git_revision(),
+        "config": {
+            "url": args.url,
+            "users": args.users,
+            "rate": args.rate,
+            "duration": args.duration,
+            "mix": parse_mix(args.mix),
+            "latency": args.latency,
+            "vector_latency": args.vector_latency,
+            "max_in_flight": args.max_in_flight,
+            "seed": args.seed,
+        },
+        "setup": {"seconds": round(setup_seconds, 2), "endpoints": setup.report(setup_seconds)},
+        "load": {"seconds": round(load_seconds, 2), "endpoints": rec.report(load_seconds)},
+        "client": client_stats,
+        "server_admission": server.get("admission"),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    cfg = report["config"]
+    print(
+        f"revision {report['revision']}  users {cfg['users']}  rate {cfg['rate']}/s  "
+        f"duration {cfg['duration']}s  mix {cfg['mix']}"
+    )
+    for phase in ("setup", "load"):
+        print(f"[{phase}] {report[phase]['seconds']:.1f}s")
+        print(f"  {'endpoint':<12}{'req':>6}{'ok/s':>8}{'err%':>7}{'429%':>7}{'p50':>9}{'p95':>9}{'max':>9}")
+        for endpoint, e in sorted(report[phase]["endpoints"].items()):
+            lat = e["latency_ms"]
+            print(
+                f"  {endpoint:<12}{e['requests']:>6}{e['throughput_rps']:>8.1f}{e['error_rate'] * 100:>6.1f}%"
+                f"{e['rejected_rate'] * 100:>6.1f}%{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['max']:>9.1f}"
+            )
+            other = {k: v for k, v in e["statuses"].items() if k != "200"}
+            if other:
+                print(f"  {'':<12}상태: {other}")
+    if report["client"].get("dropped"):
+        print(f"  클라이언트 상한(--max-in-flight) 때문에 보내지 못한 요청: {report['client']['dropped']}")
+    admission = report.get("server_admission") or {}
+    if admission:
+        rejected = {k[len("rejected_") :]: v for k, v in admission.items() if k.startswith("rejected_")}
+        print(
+            f"  서버 입장 제어: 입장 {admission.get('admitted', 0)}, 평균 대기 {admission.get('avg_wait_seconds', 0):.2f}s, "
+            f"최대 대기 {admission.get('wait_seconds_max', 0):.2f}s, 거절 {rejected}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="동시 다중 사용자 부하 생성기")
+    parser.add_argument("--url", help="이미 떠 있는 서버 주소 (없으면 스탠드인 서버를 띄움)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=10.0, help="초당 도착 요청 수 (포아송)")
+    parser.add_argument("--duration", type=float, default=20.0, help="부하 구간 길이(초)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"요청 비율 (기본 {DEFAULT_MIX})")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="클라이언트 동시 요청 상한")
+    parser.add_argument("--setup-concurrency", type=int, default=16)
+    parser.add_argument("--probe-interval", type=float, default=0.2, help="/api/health 지연 측정 간격(초)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--latency", default="", help="스탠드인 LLM 지연 모델 (benchmarks.replay와 같은 형식)")
+    parser.add_argument("--vector-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    # 내부용: 자식 서버 프로세스
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return serve(args)
+
+    parse_mix(args.mix)
+    proc = None if args.url else start_server(args)
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,265 @@
+"""
+순수 파이썬 핫패스 마이크로 벤치마크.
+
+대상: 지역 매칭(find_matching_regions), 공감 질문 검색의 키워드 추출, 장례시설 검색 결과 중복 제거,
+SessionManager.load_session/add_message (대화 기록 10~10,000건), _normalize_profile,
+/api/checklist CSV 파싱. 외부 API는 부르지 않는다.
+
+    python -m benchmarks.micro                      # 전체 실행 + 기준치 비교 (회귀 시 종료 코드 1)
+    python -m benchmarks.micro --filter session     # 이름에 session이 들어간 것만
+    python -m benchmarks.micro --tolerance 0.5
+    python -m benchmarks.micro --record             # 기준치(benchmarks/baselines/micro.json) 저장
+
+timeit과 같은 방식으로 한 번 반복이 --min-time 이상 되도록 호출 횟수를 정하고 --repeat번 반복해
+호출 1회당 중앙값/최솟값(µs)을 낸다. 기준치 비교는 중앙값으로 한다.
+"""
+import sys
+import json
+import timeit
+import tempfile
+import statistics
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from benchmarks.common import BASELINE_DIR, ROOT_DIR, compare, git_revision, load_baseline, save_baseline
+
+BASELINE_PATH = BASELINE_DIR / "micro.json"
+HISTORY_SIZES = (10, 100, 1000, 10000)
+
+
+class Case(NamedTuple):
+    fn: Callable[[], Any]
+    reset: Optional[Callable[[], None]] = None  # 반복마다 상태를 되돌린다 (add_message처럼 상태가 쌓이는 경우)
+    number: Optional[int] = None  # 고정 호출 횟수 (None이면 자동)
+
+
+# 이름 → Case를 만드는 준비 함수. 준비 시간은 측정하지 않는다.
+BENCHMARKS: Dict[str, Callable[[], Case]] = {}
+
+
+def bench(name: str):
+    def register(setup: Callable[[], Case]):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _facility_regions() -> List[str]:
+    from chatbot.chatbot_modules import search_info
+
+    search_info.load_region_data()
+    regions = set()
+    for r_list in search_info.facilities_region_list_json.values():
+        regions.update(r_list)
+    return sorted(regions)
+
+
+@bench("find_matching_regions/substring")
+def _regions_substring() -> Case:
+    from chatbot.chatbot_modules.search_info import find_matching_regions
+
+    regions = _facility_regions()
+    queries = ["서울특별시 종로구", "대구광역시", "수원시", "경상북도 경주시"]
+    return Case(lambda: [find_matching_regions(q, regions, n=100) for q in queries])
+
+
+@bench("find_matching_regions/fuzzy")
+def _regions_fuzzy() -> Case:
+    """부분 문자열로 안 잡혀 get_close_matches까지 가는 경우."""
+    from chatbot.chatbot_modules.search_info import find_matching_regions
+
+    regions = _facility_regions()
+    queries = ["서울 종로", "경기 수원", "강원 고성"]
+    return Case(lambda: [find_matching_regions(q, regions, n=100) for q in queries])
+
+
+@bench("find_matching_regions/ordinance")
+def _regions_ordinance() -> Case:
+    from chatbot.chatbot_modules import search_info
+
+    search_info.load_region_data()
+    regions = search_info.region_list_json["public_funeral_ordinance"]
+    return Case(lambda: search_info.find_matching_regions("서울특별시 마포구", regions, n=3))
+
+
+def _recent_messages(count: int = 20) -> List[str]:
+    from benchmarks.scenarios import all_turns
+
+    turns = all_turns()
+    return [turns[i % len(turns)]["question"] for i in range(count)]
+
+
+@bench("keywords/extract_recent")
+def _keywords_extract() -> Case:
+    """세션 키워드 통계가 없을 때 최근 대화 20개에서 추출."""
+    from chatbot.chatbot_modules.recommend_ba import extract_keywords
+
+    messages = _recent_messages()
+    return Case(lambda: extract_keywords(messages))
+
+
+@bench("keywords/update_and_top")
+def _keywords_incremental() -> Case:
+    """세션에 누적된 통계를 한 발화만큼 갱신하고 상위 키워드를 뽑는 경로."""
+    from chatbot.chatbot_modules.keywords import top_keywords, update_stats
+
+    messages = _recent_messages()
+    stats: Dict[str, Any] = {}
+    for text in messages:
+        stats = update_stats(stats, text)
+    text = messages[0]
+
+    def run():
+        top_keywords(update_stats(dict(stats), text), text=text)
+
+    return Case(run)
+
+
+@bench("facilities/dedup")
+def _facilities_dedup() -> Case:
+    """지역 3곳 × 10건, 절반이 겹치는 검색 결과 병합."""
+    from langchain_core.documents import Document
+    from chatbot.chatbot_modules.search_info import dedup_documents
+
+    docs = [
+        Document(page_content=f"시설 {i % 15} / 주소: 서울특별시 종로구 {i % 15}길 / 전화: 02-000-{i % 15:04d}")
+        for i in range(30)
+    ]
+    return Case(lambda: dedup_documents(docs))
+
+
+def _history(size: int) -> List[Dict[str, str]]:
+    return [
+        {
+            "timestamp": "2024-01-01T00:00:00",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"대화 {i}번째 메시지입니다. 요즘 날씨가 좋아서 산책을 자주 나가요.",
+        }
+        for i in range(size)
+    ]
+
+
+def _session_case(size: int, kind: str) -> Callable[[], Case]:
+    def setup() -> Case:
+        from chatbot.chatbot_modules import session_manager as sm
+
+        manager = sm.SessionManager(tempfile.mkdtemp(prefix="micro-sessions-"))
+        user_id = f"bench-{size}"
+        base = manager.load_session(user_id)
+        base["conversation_history"] = _history(size)
+        manager.save_session(user_id, base)
+
+        if kind == "load_cached":
+            return Case(lambda: manager.load_session(user_id))
+        if kind == "load_cold":
+
+            def cold():
+                sm._session_cache.clear()
+                manager.load_session(user_id)
+
+            return Case(cold)
+        # add_message는 호출마다 기록이 늘어나므로 반복마다 원래 크기로 되돌리고 호출 횟수를 고정한다
+        return Case(
+            lambda: manager.add_message(user_id, "user", "오늘은 공원에 다녀왔어요."),
+            reset=lambda: manager.save_session(user_id, base),
+            number=5,
+        )
+
+    return setup
+
+
+for _size in HISTORY_SIZES:
+    for _kind in ("load_cached", "load_cold", "add_message"):
+        bench(f"session/{_kind}/{_size}")(_session_case(_size, _kind))
+
+
+@bench("profile/normalize")
+def _normalize_profile() -> Case:
+    from chatbot.chatbot_modules.session_manager import SessionManager
+
+    manager = SessionManager(tempfile.mkdtemp(prefix="micro-sessions-"))
+    profile = {"A1": "김철수", "A2": "천천히라면 걷기는 가능하다", "B1": "무기력하다", "C1": "산책", "D1": "가족"}
+    current = {"name": "", "mobility": "", "emotion": ""}
+    return Case(lambda: manager._normalize_profile(profile, current))
+
+
+@bench("checklist/parse_csv")
+def _checklist() -> Case:
+    from chatbot import main
+
+    path = str(ROOT_DIR / "data" / "user_profile_checklist.csv")
+    return Case(lambda: main.load_checklist(path))
+
+
+def measure(case: Case, repeat: int, min_time: float) -> Dict[str, float]:
+    """호출 1회당 µs (median/min)와 반복당 호출 수."""
+    timer = timeit.Timer(case.fn)
+    if case.number:
+        number = case.number
+    else:
+        number, elapsed = timer.autorange()
+        if elapsed < min_time:
+            number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        if case.reset:
+            case.reset()
+        samples.append(timer.timeit(number) / number * 1e6)
+    return {
+        "median_us": round(statistics.median(samples), 2),
+        "min_us": round(min(samples), 2),
+        "number": number,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="핫패스 마이크로 벤치마크")
+    parser.add_argument("--filter", default="", help="이름에 이 문자열이 들어간 벤치마크만")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="반복 1회의 최소 시간(초)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="기준치 대비 허용 비율 (초과 시 종료 코드 1)")
+    parser.add_argument("--record", action="store_true", help="중앙값을 기준치로 저장")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    parser.add_argument("--list", action="store_true", help="벤치마크 이름만 출력")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    from benchmarks.standins import prepare_environment
+
+    # 세션/사용자 파일이 리포지토리에 생기지 않도록 임시 디렉터리에서 실행
+    prepare_environment(tempfile.mkdtemp(prefix="micro-bench-"))
+    import logging
+
+    logging.disable(logging.INFO)
+
+    results = {}
+    for name in names:
+        results[name] = measure(BENCHMARKS[name](), args.repeat, args.min_time)
+        if not args.json:
+            r = results[name]
+            print(f"{name:<36}{r['median_us']:>12.2f}µs  (min {r['min_us']:.2f}µs, ×{r['number']})")
+    if args.json:
+        print(json.dumps({"revision": git_revision(), "results": results}, ensure_ascii=False, indent=2))
+
+    baseline = load_baseline(args.baseline)
+    if args.record:
+        baseline.update({name: {"median_us": r["median_us"]} for name, r in results.items()})
+        save_baseline(args.baseline, baseline)
+        print(f"기준치 저장: {args.baseline}", file=sys.stderr)
+        return 0
+    regressions = compare(results, baseline, args.tolerance, unit="µs")
+    for line in regressions:
+        print(f"  ! {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+"""
+README 테스트 질문 세트를 ConversationEngine.process_user_message로 재생하는 오프라인 지연 벤치마크.
+
+LLM은 스크립트 모델(standins.ScriptedChatModel, 지연 모델 설정 가능), 벡터 검색은 해시 임베딩
+로컬 인덱스로 대신한다. 네트워크 없이 엔진 쪽 오버헤드(세션 I/O, 그래프, 툴, 기록)를 커밋 간에 비교한다.
+
+    python -m benchmarks.replay                        # 5회 재생, 기준치와 비교
+    python -m benchmarks.replay --latency off          # LLM 지연 없이 엔진 오버헤드만
+    python -m benchmarks.replay --latency first_token=0.5,jitter=0.1 --vector-latency 0.05
+    python -m benchmarks.replay --output replay.json --compare previous.json
+    python -m benchmarks.replay --record               # 기준치 저장
+
+overhead = 턴 전체 시간 - 스크립트 LLM이 잠든 시간 (헤지 비활성화 상태라 LLM 호출은 턴 안에서 순차).
+기준치 비교는 overhead p50/p95로 한다.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import contextlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import BASELINE_DIR, compare, git_revision, load_baseline, save_baseline, summarize_ms
+from benchmarks.scenarios import SECTIONS
+from benchmarks.standins import LatencyModel, ScriptedChatModel, build_fixture_indexes, install, prepare_environment
+
+BASELINE_PATH = BASELINE_DIR / "replay.json"
+
+
+def _histogram_totals():
+    from chatbot.chatbot_modules import metrics
+
+    return {
+        "stage": metrics.STAGE_SECONDS.totals(),
+        "tool": metrics.TOOL_SECONDS.totals(),
+        "dependency": metrics.DEPENDENCY_SECONDS.totals(),
+    }
+
+
+def _delta(before, after) -> Dict[str, Dict[str, List[float]]]:
+    """히스토그램 합계/개수 차이 → {"stage": {name: [초, 횟수]}, ...} (모드 라벨은 합친다)."""
+    result: Dict[str, Dict[str, List[float]]] = {}
+    for kind, series in after.items():
+        out: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        for key, (total, count) in series.items():
+            prev_total, prev_count = before[kind].get(key, (0.0, 0))
+            if count > prev_count:
+                out[key[0]][0] += total - prev_total
+                out[key[0]][1] += count - prev_count
+        result[kind] = dict(out)
+    return result
+
+
+def _prepare_user(engine, user_id: str, section: Dict[str, Any]) -> None:
+    from chatbot.chatbot_modules.user_memory import user_memory
+
+    if section.get("profile"):
+        session = engine.session_manager.load_session(user_id)
+        session["user_profile"] = dict(section["profile"])
+        engine.session_manager.save_session(user_id, session)
+    if section.get("memory"):
+        user_memory.update(user_id, section["memory"])
+
+
+def replay(engine, runs: int, warmup: int, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """섹션마다 새 사용자로 질문 1 → 2를 재생. warmup 회차는 기록하지 않는다."""
+    turns = []
+    for run in range(warmup + runs):
+        for section in sections:
+            user_id = f"bench-{section['section']}-{run}"
+            _prepare_user(engine, user_id, section)
+            for index, turn in enumerate(section["turns"], start=1):
+                hist_before, llm_before = _histogram_totals(), ScriptedChatModel.snapshot()
+                started = time.perf_counter()
+                response = engine.process_user_message(user_id, turn["question"], mode=section["mode"])
+                wall = time.perf_counter() - started
+                hist, llm_after = _delta(hist_before, _histogram_totals()), ScriptedChatModel.snapshot()
+                if run < warmup:
+                    continue
+                llm_sleep = llm_after["sleep_seconds"] - llm_before["sleep_seconds"]
+                turns.append(
+                    {
+                        "scenario": f"{section['section']}#{index}",
+                        "mode": section["mode"],
+                        "wall": wall,
+                        "overhead": max(0.0, wall - llm_sleep),
+                        "llm_calls": llm_after["calls"] - llm_before["calls"],
+                        "tool_calls": sum(count for _, count in hist["tool"].values()),
+                        "stages": {name: seconds for name, (seconds, _) in hist["stage"].items()},
+                        "dependencies": {name: seconds for name, (seconds, _) in hist["dependency"].items()},
+                        "readme_seconds": turn.get("readme_seconds"),
+                        "answered": bool(response),
+                    }
+                )
+    return turns
+
+
+def build_report(turns: List[Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, Any]:
+    by_scenario: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    by_mode: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for t in turns:
+        by_scenario[t["scenario"]].append(t)
+        by_mode[t["mode"]].append(t)
+
+    def stage_means(items: List[Dict[str, Any]], field: str) -> Dict[str, float]:
+        totals: Dict[str, float] = defaultdict(float)
+        for t in items:
+            for name, seconds in t[field].items():
+                totals[name] += seconds
+        return {name: round(total * 1000 / len(items), 2) for name, total in sorted(totals.items())}
+
+    scenarios = {}
+    for name, items in by_scenario.items():
+        scenarios[name] = {
+            "mode": items[0]["mode"],
+            "wall_ms": summarize_ms(t["wall"] for t in items),
+            "overhead_ms": summarize_ms(t["overhead"] for t in items),
+            "llm_calls": round(sum(t["llm_calls"] for t in items) / len(items), 2),
+            "tool_calls": round(sum(t["tool_calls"] for t in items) / len(items), 2),
+            "readme_seconds": items[0]["readme_seconds"],
+            "answered": all(t["answered"] for t in items),
+        }
+    modes = {}
+    for mode, items in by_mode.items():
+        wall, overhead = summarize_ms(t["wall"] for t in items), summarize_ms(t["overhead"] for t in items)
+        modes[mode] = {
+            "turns": len(items),
+            "wall_p50": wall["p50"],
+            "wall_p95": wall["p95"],
+            "overhead_p50": overhead["p50"],
+            "overhead_p95": overhead["p95"],
+            "stages_ms_per_turn": stage_means(items, "stages"),
+            "dependencies_ms_per_turn": stage_means(items, "dependencies"),
+        }
+    return {"revision": git_revision(), "config": config, "modes": modes, "scenarios": scenarios}
+
+
+def print_report(report: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> None:
+    cfg = report["config"]
+    print(f"revision {report['revision']}  runs {cfg['runs']} (+{cfg['warmup']} warmup)  latency {cfg['latency']}")
+    print(f"{'scenario':<22}{'mode':<6}{'wall p50':>10}{'p95':>9}{'ovh p50':>9}{'p95':>8}{'llm':>5}{'tools':>6}{'README':>8}")
+    for name, s in report["scenarios"].items():
+        print(
+            f"{name:<22}{s['mode']:<6}{s['wall_ms']['p50']:>10.1f}{s['wall_ms']['p95']:>9.1f}"
+            f"{s['overhead_ms']['p50']:>9.1f}{s['overhead_ms']['p95']:>8.1f}{s['llm_calls']:>5.1f}"
+            f"{s['tool_calls']:>6.1f}{s['readme_seconds']:>7}s"
+        )
+    for mode, m in report["modes"].items():
+        line = (
+            f"[{mode}] wall p50 {m['wall_p50']:.1f}ms p95 {m['wall_p95']:.1f}ms / "
+            f"overhead p50 {m['overhead_p50']:.1f}ms p95 {m['overhead_p95']:.1f}ms"
+        )
+        prev = (previous or {}).get("modes", {}).get(mode)
+        if prev:
+            line += (
+                f"  (이전 {previous.get('revision')}: overhead p50 {prev['overhead_p50']:.1f}ms "
+                f"p95 {prev['overhead_p95']:.1f}ms)"
+            )
+        print(line)
+        print("  단계(ms/턴): " + ", ".join(f"{k} {v:.1f}" for k, v in m["stages_ms_per_turn"].items()))
+        print("  의존성(ms/턴): " + ", ".join(f"{k} {v:.1f}" for k, v in m["dependencies_ms_per_turn"].items()))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="README 질문 세트 오프라인 재생 벤치마크")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1, help="기록하지 않는 첫 회차 수 (지연 초기화 제외)")
+    parser.add_argument("--mode", choices=("chat", "info", "all"), default="all")
+    parser.add_argument(
+        "--latency", default="", help='LLM 지연 모델 "first_token=0.3,per_1k_prompt_chars=0.02,...,jitter=0,seed=0" 또는 off'
+    )
+    parser.add_argument("--vector-latency", type=float, default=0.0, help="로컬 벡터 조회마다 더할 지연(초)")
+    parser.add_argument("--hedge", action="store_true", help="보조 모델 헤지 켜기 (기본은 결정적 비교를 위해 끔)")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", type=Path, help="이전 결과 JSON과 나란히 출력")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="기준치 대비 허용 비율")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="기준치에 더하는 절대 여유 (ms 단위 잡음 흡수)")
+    parser.add_argument("--record", action="store_true", help="overhead p50/p95를 기준치로 저장")
+    args = parser.parse_args(argv)
+
+    latency = LatencyModel.parse(args.latency)
+    workdir = tempfile.mkdtemp(prefix="replay-bench-")
+    prepare_environment(workdir, hedge=args.hedge)
+    install(latency, args.vector_latency)
+    build_fixture_indexes()
+
+    import logging
+
+    logging.disable(logging.INFO)  # 턴마다 찍히는 INFO 로그가 측정에 섞이지 않게
+    from chatbot.conversation_engine import ConversationEngine
+
+    engine = ConversationEngine()
+    sections = [s for s in SECTIONS if args.mode in ("all", s["mode"])]
+    # 툴 함수들이 찍는 print 출력은 보고서와 섞이지 않게 버린다
+    with open(os.devnull, "w", encoding="utf-8") as sink, contextlib.redirect_stdout(sink):
+        turns = replay(engine, args.runs, args.warmup, sections)
+    config = {
+        "runs": args.runs,
+        "warmup": args.warmup,
+        "latency": args.latency or "default",
+        "latency_model": latency.as_dict(),
+        "vector_latency": args.vector_latency,
+        "hedge": args.hedge,
+        "python": sys.version.split()[0],
+    }
+    report = build_report(turns, config)
+    previous = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print_report(report, previous)
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    gated = {mode: {k: m[k] for k in ("overhead_p50", "overhead_p95")} for mode, m in report["modes"].items()}
+    baseline = load_baseline(args.baseline)
+    if args.record:
+        baseline.update(gated)
+        save_baseline(args.baseline, baseline)
+        print(f"기준치 저장: {args.baseline}")
+        return 0
+    regressions = compare(gated, baseline, args.tolerance, args.slack_ms)
+    for line in regressions:
+        print(f"  ! {line}")
+    if not all(s["answered"] for s in report["scenarios"].values()):
+        print("  ! 빈 응답이 있는 시나리오가 있습니다")
+        return 1
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,234 @@
+"""
+정보 탭 검색 툴의 정확도/지연 벤치마크.
+
+benchmarks/retrieval_queries.json의 정답 라벨 질의를 실제 툴(search_info.TOOLS_INFO)로 실행해
+설정별로 recall@1/@3, MRR, 유사도, 지연(p50/p95)을 함께 보고한다. 설정은 search_info의 튜닝 값
+(k, 시설 검색 지역별 k, 지역 매칭 수, difflib cutoff)을 바꾼 조합이다.
+
+    python -m benchmarks.retrieval                                  # 로컬 픽스처 인덱스 (해시 임베딩)
+    python -m benchmarks.retrieval --snapshot data/vectors --embedder openai   # 인제스트로 만든 로컬 스냅샷
+    python -m benchmarks.retrieval --backend pinecone --check       # 실제 인덱스, FR-02 미달 시 종료 코드 1
+    python -m benchmarks.retrieval --config default --config ordinance_k=1,document_k=3
+
+FR-02: 정답 문서가 top-3 안에 유사도 0.5 이상으로 들어오는 비율(fr02)이 툴마다 80% 이상.
+해시 임베딩 픽스처는 유사도 값이 실제 임베딩과 다르므로 fr02는 참고용이다.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import ROOT_DIR, git_revision, summarize_ms
+
+QUERIES_PATH = ROOT_DIR / "benchmarks" / "retrieval_queries.json"
+
+# 설정 이름 → search_info 모듈 변수
+TUNABLES = {
+    "ordinance_k": "ORDINANCE_SEARCH_K",
+    "document_k": "DOCUMENT_SEARCH_K",
+    "facility_total_k": "FACILITY_SEARCH_TOTAL_K",
+    "facility_min_k": "FACILITY_SEARCH_MIN_K",
+    "region_matches": "FACILITY_REGION_MATCHES",
+    "cutoff": "REGION_MATCH_CUTOFF",
+}
+DEFAULT_CONFIGS = [
+    "default",
+    "ordinance_k=1",
+    "document_k=3",
+    "facility_total_k=15",
+    "region_matches=10",
+    "cutoff=0.8",
+]
+FR02_RECALL = 0.8
+FR02_SCORE = 0.5
+
+
+def parse_config(spec: str) -> Dict[str, float]:
+    if spec == "default":
+        return {}
+    overrides = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, raw = part.partition("=")
+        if key not in TUNABLES:
+            raise ValueError(f"알 수 없는 설정: {key} (가능: {', '.join(TUNABLES)})")
+        overrides[key] = float(raw) if key == "cutoff" else int(raw)
+    return overrides
+
+
+def load_queries(path: Path) -> List[Dict[str, Any]]:
+    return json.loads(path.read_text(encoding="utf-8"))["queries"]
+
+
+def _first_relevant(docs: list, relevant: List[str]) -> Optional[int]:
+    for rank, doc in enumerate(docs):
+        if any(needle in doc.page_content for needle in relevant):
+            return rank
+    return None
+
+
+def run_query(search_info, query: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    tool = getattr(search_info, query["tool"])
+    latencies = []
+    docs: Any = None
+    scored: list = []
+    for i in range(repeat):
+        with search_info.collect_scores() as collected:
+            started = time.perf_counter()
+            result = tool.invoke(dict(query["args"]))
+            latencies.append(time.perf_counter() - started)
+        if i == 0:
+            docs, scored = result, list(collected)
+    if not isinstance(docs, list):
+        # "DB 연결 오류" 같은 문자열 응답
+        return {"id": query["id"], "tool": query["tool"], "error": str(docs), "latencies": latencies}
+    rank = _first_relevant(docs, query["relevant"])
+    score = None
+    if rank is not None:
+        content = docs[rank].page_content
+        score = max((s for d, s in scored if d.page_content == content), default=None)
+    return {
+        "id": query["id"],
+        "tool": query["tool"],
+        "rank": rank,
+        "score": score,
+        "returned": len(docs),
+        "latencies": latencies,
+    }
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in results if "error" not in r]
+    n = len(results)
+
+    def rate(pred) -> float:
+        return round(sum(1 for r in ok if pred(r)) / n, 3) if n else 0.0
+
+    return {
+        "queries": n,
+        "errors": n - len(ok),
+        "recall@1": rate(lambda r: r["rank"] is not None and r["rank"] < 1),
+        "recall@3": rate(lambda r: r["rank"] is not None and r["rank"] < 3),
+        "recall@returned": rate(lambda r: r["rank"] is not None),
+        "mrr": round(sum(1 / (r["rank"] + 1) for r in ok if r["rank"] is not None) / n, 3) if n else 0.0,
+        "fr02": rate(lambda r: r["rank"] is not None and r["rank"] < 3 and (r["score"] or 0) >= FR02_SCORE),
+        "mean_score": round(
+            sum(r["score"] for r in ok if r.get("score") is not None)
+            / max(1, sum(1 for r in ok if r.get("score") is not None)),
+            3,
+        ),
+        "mean_returned": round(sum(r["returned"] for r in ok) / max(1, len(ok)), 1),
+        "latency_ms": summarize_ms(t for r in results for t in r["latencies"]),
+    }
+
+
+def evaluate(search_info, queries: List[Dict[str, Any]], overrides: Dict[str, float], repeat: int) -> Dict[str, Any]:
+    """설정을 모듈 변수에 적용해 전체 질의를 돌리고 툴별/전체 요약을 낸다 (끝나면 원래 값으로)."""
+    originals = {TUNABLES[k]: getattr(search_info, TUNABLES[k]) for k in TUNABLES}
+    try:
+        for key, value in overrides.items():
+            setattr(search_info, TUNABLES[key], value)
+        results = [run_query(search_info, q, repeat) for q in queries]
+    finally:
+        for name, value in originals.items():
+            setattr(search_info, name, value)
+    by_tool: Dict[str, List[Dict[str, Any]]] = {}
+    for r in results:
+        by_tool.setdefault(r["tool"], []).append(r)
+    return {
+        "overrides": overrides,
+        "tools": {tool: summarize(items) for tool, items in by_tool.items()},
+        "overall": summarize(results),
+        "misses": [r["id"] for r in results if r.get("rank") is None],
+    }
+
+
+def prepare_backend(args) -> str:
+    """chatbot 모듈 import 전에 백엔드 환경 변수를 맞춘다. 설명 문자열을 돌려준다."""
+    from benchmarks.standins import build_fixture_indexes, prepare_environment
+
+    snapshot = args.snapshot.resolve() if args.snapshot else None
+    prepare_environment(tempfile.mkdtemp(prefix="retrieval-bench-"))
+    if args.backend == "pinecone":
+        os.environ["VECTOR_BACKEND"] = "pinecone"
+        os.environ["EMBEDDING_BACKEND"] = "openai"
+        return "pinecone"
+    if snapshot:
+        os.environ["LOCAL_VECTOR_DIR"] = str(snapshot)
+        os.environ["EMBEDDING_BACKEND"] = args.embedder
+        return f"local snapshot {snapshot} ({args.embedder})"
+    build_fixture_indexes()
+    return "local fixture (hash)"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"revision {report['revision']}  backend {report['backend']}  queries {report['queries']}")
+    header = f"  {'tool':<36}{'R@1':>6}{'R@3':>6}{'MRR':>7}{'FR02':>6}{'score':>7}{'ret':>6}{'p50':>8}{'p95':>8}"
+    for name, config in report["configs"].items():
+        print(f"[{name}]")
+        print(header)
+        rows = list(config["tools"].items()) + [("(전체)", config["overall"])]
+        for tool, m in rows:
+            print(
+                f"  {tool:<36}{m['recall@1']:>6.2f}{m['recall@3']:>6.2f}{m['mrr']:>7.3f}{m['fr02']:>6.2f}"
+                f"{m['mean_score']:>7.3f}{m['mean_returned']:>6.1f}{m['latency_ms']['p50']:>8.1f}"
+                f"{m['latency_ms']['p95']:>8.1f}"
+            )
+        if config["misses"]:
+            print(f"  놓친 질의: {', '.join(config['misses'])}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="정보 탭 검색 정확도/지연 벤치마크")
+    parser.add_argument("--backend", choices=("local", "pinecone"), default="local")
+    parser.add_argument("--snapshot", type=Path, help="인제스트 CLI가 만든 로컬 인덱스 디렉터리 (없으면 픽스처)")
+    parser.add_argument("--embedder", choices=("openai", "hash"), default="openai", help="--snapshot 질의 임베딩")
+    parser.add_argument("--queries", type=Path, default=QUERIES_PATH)
+    parser.add_argument("--tool", action="append", help="이 툴의 질의만 (여러 번 지정 가능)")
+    parser.add_argument(
+        "--config", action="append", help=f"설정 조합 (기본: {' | '.join(DEFAULT_CONFIGS)}). 키: {', '.join(TUNABLES)}"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="질의별 반복 횟수 (지연 측정용)")
+    parser.add_argument("--check", action="store_true", help="default 설정이 FR-02에 못 미치면 종료 코드 1")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    configs = {spec: parse_config(spec) for spec in (args.config or DEFAULT_CONFIGS)}
+    queries = [q for q in load_queries(args.queries) if not args.tool or q["tool"] in args.tool]
+    backend = prepare_backend(args)
+
+    import logging
+    import contextlib
+
+    logging.disable(logging.INFO)
+    from chatbot.chatbot_modules import search_info
+
+    # 툴이 찍는 print 출력은 보고서와 섞이지 않게 버린다. 첫 질의의 클라이언트 초기화도 여기서 끝낸다.
+    with open(os.devnull, "w", encoding="utf-8") as sink, contextlib.redirect_stdout(sink):
+        search_info._init_clients()
+        configs_out = {name: evaluate(search_info, queries, overrides, args.repeat) for name, overrides in configs.items()}
+    report = {"revision": git_revision(), "backend": backend, "queries": len(queries), "configs": configs_out}
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if args.check:
+        default = configs_out.get("default") or next(iter(configs_out.values()))
+        failing = [tool for tool, m in default["tools"].items() if m["fr02"] < FR02_RECALL]
+        for tool in failing:
+            print(f"  ! FR-02 미달: {tool} {default['tools'][tool]['fr02']:.0%} < {FR02_RECALL:.0%}", file=sys.stderr)
+        return 1 if failing else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
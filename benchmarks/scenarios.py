@@ -0,0 +1,190 @@
+"""
+README "테스트 계획 및 결과 보고서"의 질문 세트.
+
+섹션마다 한 사용자가 질문 1 → 질문 2 순서로 대화한다. tool_rounds는 스탠드인 LLM이
+순서대로 낼 툴 호출(라운드마다 여러 개 가능), answer는 마지막 응답, readme_seconds는
+README에 손으로 잰 "답변 소요 시간". 인자 값의 "{user_id}"는 실행 시 현재 사용자로 바뀐다.
+"""
+from typing import Any, Dict, List
+
+SECTIONS: List[Dict[str, Any]] = [
+    {
+        "section": "digital_legacy",
+        "mode": "info",
+        "turns": [
+            {
+                "question": "사망 전 카카오톡 계정 처리 방법에는 어떤 게 있고, 어떤 기능을 제공하나요?",
+                "tool_rounds": [[("search_digital_legacy", {"query": "카카오톡 사망 전 계정 처리 추모 프로필"})]],
+                "answer": "카카오톡에서는 생전에 추모 프로필 설정을 통해 사망 후 계정 처리를 미리 지정할 수 있습니다. "
+                "설정 위치는 카카오톡 > 설정 > 개인/보안 > 추모 프로필입니다.",
+                "readme_seconds": 9,
+            },
+            {
+                "question": "사망 전 구글 계정을 삭제하지 않으면 사후 어떻게 처리되나요?",
+                "tool_rounds": [[("search_digital_legacy", {"query": "구글 계정 사후 처리 휴면 계정"})]],
+                "answer": "Google 계정은 2년 동안 활동이 없으면 휴면 상태가 되고 이후 데이터가 삭제될 수 있습니다.",
+                "readme_seconds": 8,
+            },
+        ],
+    },
+    {
+        "section": "funeral_facilities",
+        "mode": "info",
+        # 질문 2는 사용자의 위치(대구)를 기억한다는 전제
+        "memory": ["저는 대구에 살아요"],
+        "turns": [
+            {
+                "question": "서울 종로구에 있는 장례식장 좀 알려줘.",
+                "tool_rounds": [
+                    [("search_funeral_facilities", {"query": "서울 종로구 장례식장", "region": "서울특별시 종로구"})]
+                ],
+                "answer": "서울 종로구 인근 장례식장은 서울적십자병원장례식장(02-2002-8444)과 "
+                "서울대학교병원장례식장(02-2072-2020)입니다.",
+                "readme_seconds": 5,
+            },
+            {
+                "question": "근처에 화장터가 어디 있어?",
+                "tool_rounds": [[("search_funeral_facilities", {"query": "화장시설"})]],
+                "answer": "대구광역시 인근 화장시설은 대구명복공원(수성구 달구벌대로541길 47, 053-743-3880)입니다.",
+                "readme_seconds": 6,
+            },
+        ],
+    },
+    {
+        "section": "ordinance",
+        "mode": "info",
+        "memory": ["서울 마포구에 혼자 살고 있어요"],
+        "turns": [
+            {
+                "question": "나는 아는 사람이 없는데 내가 죽으면 내 장례는 어떻게 치뤄줄까?",
+                "tool_rounds": [[("search_public_funeral_ordinance", {"query": "무연고 사망자 장례 지원"})]],
+                "answer": "연고자가 없으면 주민등록지 지자체가 공영장례로 운구, 간소 장례, 화장을 진행하고 "
+                "비용은 조례 기준으로 대부분 공공이 부담합니다.",
+                "readme_seconds": 11,
+            },
+            {
+                "question": "공영장례 그게 뭐야? 내가 그걸 받을 수 있어?",
+                "tool_rounds": [
+                    [
+                        ("search_public_funeral_ordinance", {"query": "공영장례 지원 대상"}),
+                        ("search_cremation_subsidy_ordinance", {"query": "화장 장려금 지원 대상"}),
+                    ]
+                ],
+                "answer": "공영장례는 연고자가 없을 때 지자체가 비용을 부담해 장례, 화장, 안치를 진행하는 제도입니다. "
+                "무연고 사망자, 장제급여 수급자 중 연고자가 장례 능력이 없는 경우 등이 대상입니다.",
+                "readme_seconds": 14,
+            },
+        ],
+    },
+    {
+        "section": "inheritance",
+        "mode": "info",
+        "turns": [
+            {
+                "question": "유산 상속에도 우선순위가 있어?",
+                "tool_rounds": [[("search_legacy", {"query": "상속 순위 직계비속 직계존속 배우자"})]],
+                "answer": "1순위 직계비속, 2순위 직계존속, 3순위 형제자매, 4순위 4촌 이내 방계혈족이며 "
+                "배우자는 1·2순위와 공동상속인이 됩니다.",
+                "readme_seconds": 10,
+            },
+            {
+                "question": "유산상속 절차를 요약해줘.",
+                "tool_rounds": [[("search_legacy", {"query": "상속 절차 승인 포기 분할"})]],
+                "answer": "사망으로 상속이 개시되고, 3개월 안에 승인(단순/한정)이나 포기를 신고한 뒤 "
+                "유언이나 협의에 따라 재산을 분할합니다.",
+                "readme_seconds": 8,
+            },
+        ],
+    },
+    {
+        "section": "empathy",
+        "mode": "chat",
+        "profile": {"emotion": "무기력", "mobility": "실내 활동"},
+        "turns": [
+            {
+                "question": "사실 요즘 몸이 너무 무겁고, 뭘 해보고 싶다는 생각도 잘 안 들어요…",
+                "tool_rounds": [
+                    [
+                        (
+                            "search_empathy_questions_tool",
+                            {"context": "몸이 무겁고 의욕이 없음", "depth": 1, "user_id": "{user_id}"},
+                        )
+                    ]
+                ],
+                "answer": "많이 지치신 것 같아요. 혹시 누워 계시면서도 편안함을 느꼈던 순간이 있으셨나요?",
+                "readme_seconds": 1,
+            },
+            {
+                "question": "주말에 할 수 있는 일을 하나 추천해주세요.",
+                "tool_rounds": [
+                    [
+                        (
+                            "recommend_activities_tool",
+                            {"user_emotion": "무기력", "mobility_status": "실내 활동", "user_id": "{user_id}"},
+                        )
+                    ]
+                ],
+                "answer": "혹시 괜찮으시다면, 주말에는 편안한 자세로 잡지를 읽어보시는 건 어떠세요?",
+                "readme_seconds": 4,
+            },
+        ],
+    },
+]
+
+# funeral-services 로컬 인덱스에 넣을 문서 (README 예상 답변 기반 요약)
+FIXTURE_DOCUMENTS: Dict[str, List[Dict[str, Any]]] = {
+    "digital_legacy": [
+        {"text": "카카오톡 추모 프로필: 설정 > 개인/보안 > 추모 프로필에서 사망 후 계정 처리를 미리 지정한다."},
+        {"text": "카카오톡 탈퇴 시 프로필, 친구 목록, 대화 내용, 구입한 아이템이 삭제되며 복구할 수 없다."},
+        {"text": "Google 계정은 2년 동안 로그인이나 활동이 없으면 휴면 계정이 되어 데이터가 삭제될 수 있다."},
+        {"text": "Google 휴면 계정 관리자를 설정하면 장기간 미사용 시 지정한 사람에게 데이터를 공유할 수 있다."},
+    ],
+    "funeral_facilities": [
+        {
+            "text": "서울적십자병원장례식장 / 주소: 서울특별시 종로구 새문안로 9 / 전화: 02-2002-8444 (공설 시설)",
+            "metadata": {"region": "서울특별시 종로구", "category": "장례식장"},
+        },
+        {
+            "text": "서울대학교병원장례식장 / 주소: 서울특별시 종로구 대학로 101 / 전화: 02-2072-2020 (공설 시설)",
+            "metadata": {"region": "서울특별시 종로구", "category": "장례식장"},
+        },
+        {
+            "text": "대구명복공원 / 주소: 대구광역시 수성구 달구벌대로541길 47 / 전화: 053-743-3880 / 화장시설",
+            "metadata": {"region": "대구광역시 수성구", "category": "화장시설"},
+        },
+        {
+            "text": "대구광역시 달서구 장례식장 / 주소: 대구광역시 달서구 / 장례식장 (사설 시설)",
+            "metadata": {"region": "대구광역시 달서구", "category": "장례식장"},
+        },
+    ],
+    "ordinance": [
+        {
+            "text": "서울특별시 공영장례 조례 제3조(지원대상) 무연고 사망자, 연고자가 시신 인수를 거부·기피한 사망자, "
+            "장제급여 수급자로서 연고자가 장례처리 능력이 없는 경우",
+            "metadata": {"type": "Public_Funeral_Ordinance", "region": "서울특별시"},
+        },
+        {
+            "text": "서울특별시 마포구 공영장례 지원 조례 제4조(지원내용) 수의, 관, 장의차량, 화장시설 사용료, 추모의식 경비",
+            "metadata": {"type": "Public_Funeral_Ordinance", "region": "서울특별시 마포구"},
+        },
+        {
+            "text": "화장 장려금 지원 조례: 관내 주민이 화장하는 경우 장려금을 지급한다. 다른 법령에 따라 지원금을 받은 경우 제외.",
+            "metadata": {"type": "Cremation_Subsidy_Ordinance", "region": "경주시"},
+        },
+    ],
+    "legacy": [
+        {"text": "민법 제1000조 상속의 순위: 1. 직계비속 2. 직계존속 3. 형제자매 4. 4촌 이내의 방계혈족"},
+        {"text": "민법 제1003조 배우자는 직계비속이나 직계존속과 공동상속인이 되고 그 상속인이 없으면 단독상속인이 된다."},
+        {"text": "민법 제1019조 상속인은 상속개시 있음을 안 날로부터 3월 내에 단순승인이나 한정승인 또는 포기를 할 수 있다."},
+        {"text": "상속재산 분할은 유언이 있으면 유언에 따르고, 없으면 공동상속인의 협의로 한다."},
+    ],
+}
+
+
+def all_turns() -> List[Dict[str, Any]]:
+    """섹션 정보를 붙인 턴 목록 (부하 생성기 등에서 질문 풀로 사용)."""
+    return [
+        {**turn, "section": section["section"], "mode": section["mode"]}
+        for section in SECTIONS
+        for turn in section["turns"]
+    ]
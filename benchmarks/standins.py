@@ -0,0 +1,231 @@
+"""
+네트워크 없이 엔진을 돌리기 위한 결정적 스탠드인.
+
+- ScriptedChatModel: ChatOpenAI 대신 쓰는 스크립트 모델. 질문별로 정해 둔 툴 호출과 답변을
+  돌려주고, LatencyModel에 따라 응답 시간을 흉내 낸다 (지터는 시드 고정).
+- build_fixture_indexes: 활동/질문 카탈로그와 scenarios.FIXTURE_DOCUMENTS를 해시 임베딩으로
+  로컬 벡터 인덱스(vector_backend.LocalVectorIndex)에 적재.
+
+prepare_environment()는 chatbot 모듈을 import하기 전에 불러야 한다 (설정을 import 시점에 읽는다).
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import threading
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import ROOT_DIR
+from benchmarks.scenarios import FIXTURE_DOCUMENTS, all_turns
+
+DEFAULT_ANSWER = "말씀 잘 들었어요. 조금 더 이야기해 주시겠어요?"
+
+
+def prepare_environment(workdir: str, hedge: bool = False) -> None:
+    """작업 디렉터리(sessions/, logs/, 로컬 인덱스)를 workdir로 옮기고 로컬 백엔드를 켠다."""
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    os.environ.update(
+        {
+            "VECTOR_BACKEND": "local",
+            "EMBEDDING_BACKEND": "hash",
+            "LOCAL_VECTOR_DIR": os.path.join(workdir, "vectors"),
+        }
+    )
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-placeholder")
+    if not hedge:
+        # 헤지 요청은 타이밍에 따라 호출 수가 달라지므로 기본은 끈다.
+        os.environ["FALLBACK_MODEL"] = ""
+    if str(ROOT_DIR) not in sys.path:
+        sys.path.insert(0, str(ROOT_DIR))
+
+
+@dataclass
+class LatencyModel:
+    """LLM 응답 시간 모델 (초). delay = first_token + 프롬프트 길이 비례 + 출력 길이 비례 (+툴 호출)."""
+
+    first_token: float = 0.3
+    per_1k_prompt_chars: float = 0.02
+    per_output_char: float = 0.002
+    tool_call: float = 0.15
+    jitter: float = 0.0  # ± 비율 (0.1 = ±10%)
+    seed: int = 0
+
+    def delay(self, key: str, prompt_chars: int, output_chars: int, tool_calls: int) -> float:
+        base = (
+            self.first_token
+            + self.per_1k_prompt_chars * prompt_chars / 1000
+            + self.per_output_char * output_chars
+            + self.tool_call * tool_calls
+        )
+        if self.jitter:
+            rng = random.Random(zlib.crc32(f"{self.seed}:{key}".encode("utf-8")))
+            base *= 1 + rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, base)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """"first_token=0.2,jitter=0.1" 형태. "off"면 지연 없음."""
+        if spec.strip() == "off":
+            return cls(first_token=0, per_1k_prompt_chars=0, per_output_char=0, tool_call=0)
+        names = {f.name: f.type for f in fields(cls)}
+        values: Dict[str, Any] = {}
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            key, _, raw = part.partition("=")
+            if key not in names:
+                raise ValueError(f"알 수 없는 지연 항목: {key}")
+            values[key] = int(raw) if key == "seed" else float(raw)
+        return cls(**values)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_SCRIPTS: Dict[str, Dict[str, Any]] = {turn["question"]: turn for turn in all_turns()}
+
+
+def register_script(question: str, tool_rounds: List[list], answer: str) -> None:
+    _SCRIPTS[question] = {"question": question, "tool_rounds": tool_rounds, "answer": answer}
+
+
+class ScriptedChatModel:
+    """ChatOpenAI의 bind_tools/invoke/stream만 흉내 내는 스크립트 모델."""
+
+    latency = LatencyModel()
+    _stats_lock = threading.Lock()
+    stats = {"calls": 0, "tool_call_replies": 0, "sleep_seconds": 0.0}
+
+    def __init__(self, *args, model: str = "scripted", **kwargs):
+        self.model_name = model
+        self._tools_bound = False
+        self._tool_choice = None
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        bound = ScriptedChatModel(model=self.model_name)
+        bound._tools_bound = bool(tools)
+        bound._tool_choice = tool_choice
+        return bound
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        with cls._stats_lock:
+            return dict(cls.stats)
+
+    def _reply(self, messages: list):
+        from langchain_core.messages import AIMessage, HumanMessage
+        from chatbot.chatbot_modules.request_context import current_user_id
+
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        question = messages[last_human].content if last_human >= 0 else ""
+        rounds_done = sum(
+            1 for m in messages[last_human + 1 :] if isinstance(m, AIMessage) and getattr(m, "tool_calls", None)
+        )
+        script = _SCRIPTS.get(question, {})
+        rounds = script.get("tool_rounds", [])
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        key = f"{question}:{rounds_done}"
+
+        if self._tools_bound and self._tool_choice != "none" and rounds_done < len(rounds):
+            user_id = current_user_id.get() or ""
+            calls = []
+            for i, (name, args) in enumerate(rounds[rounds_done]):
+                args = {k: (v.replace("{user_id}", user_id) if isinstance(v, str) else v) for k, v in args.items()}
+                calls.append({"name": name, "args": args, "id": f"call_{zlib.crc32(key.encode()):x}_{i}"})
+            message = AIMessage(content="", tool_calls=calls)
+            delay = self.latency.delay(key, prompt_chars, 0, len(calls))
+        else:
+            answer = script.get("answer", DEFAULT_ANSWER)
+            message = AIMessage(content=answer)
+            delay = self.latency.delay(key, prompt_chars, len(answer), 0)
+        input_tokens, output_tokens = prompt_chars // 2, len(str(message.content)) // 2 + 20 * len(message.tool_calls)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        with self._stats_lock:
+            self.stats["calls"] += 1
+            self.stats["tool_call_replies"] += bool(message.tool_calls)
+            self.stats["sleep_seconds"] += delay
+        return message, delay
+
+    def invoke(self, messages, *args, **kwargs):
+        message, delay = self._reply(messages)
+        time.sleep(delay)
+        return message
+
+    def stream(self, messages, *args, **kwargs):
+        import json
+        from langchain_core.messages import AIMessageChunk
+
+        message, delay = self._reply(messages)
+        time.sleep(delay)
+        if message.tool_calls:
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"], ensure_ascii=False), "id": c["id"], "index": i}
+                    for i, c in enumerate(message.tool_calls)
+                ],
+            )
+        else:
+            for i in range(0, len(message.content), 8):
+                yield AIMessageChunk(content=message.content[i : i + 8])
+        yield AIMessageChunk(content="", usage_metadata=message.usage_metadata)
+
+
+def install(latency: Optional[LatencyModel] = None, vector_latency: float = 0.0) -> None:
+    """ChatOpenAI를 스크립트 모델로 바꾸고, 로컬 인덱스 조회에 고정 지연을 더한다."""
+    import langchain_openai
+    from chatbot.chatbot_modules import vector_backend
+
+    if latency is not None:
+        ScriptedChatModel.latency = latency
+    langchain_openai.ChatOpenAI = ScriptedChatModel
+
+    if vector_latency > 0 and not getattr(vector_backend.LocalVectorIndex.query, "_bench_latency", False):
+        original = vector_backend.LocalVectorIndex.query
+
+        def query(self, *args, **kwargs):
+            time.sleep(vector_latency)
+            return original(self, *args, **kwargs)
+
+        query._bench_latency = True
+        vector_backend.LocalVectorIndex.query = query
+
+
+def build_fixture_indexes() -> Dict[str, int]:
+    """talk-assets(활동/질문)과 funeral-services(README 문서)를 로컬 인덱스에 적재."""
+    from chatbot.chatbot_modules import ingest
+    from chatbot.chatbot_modules.vector_backend import HashEmbeddings, local_index
+
+    embeddings = HashEmbeddings()
+    counts = {}
+    talk = local_index(ingest.TALK_INDEX_NAME)
+    records = ingest.activity_records() + ingest.question_records()
+    talk.upsert(
+        vectors=[
+            {"id": r.id, "values": embeddings.embed_query(r.text), "metadata": ingest._clean_metadata(r.metadata)}
+            for r in records
+        ],
+        namespace="",
+    )
+    counts[ingest.TALK_INDEX_NAME] = len(records)
+
+    funeral = local_index(ingest.FUNERAL_INDEX_NAME)
+    for namespace, docs in FIXTURE_DOCUMENTS.items():
+        funeral.upsert(
+            vectors=[
+                {
+                    "id": f"{namespace}-{i}",
+                    "values": embeddings.embed_query(doc["text"]),
+                    "metadata": {**doc.get("metadata", {}), "text": doc["text"]},
+                }
+                for i, doc in enumerate(docs)
+            ],
+            namespace=namespace,
+        )
+        counts[f"{ingest.FUNERAL_INDEX_NAME}/{namespace}"] = len(docs)
+    return counts
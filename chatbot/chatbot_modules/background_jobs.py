@@ -0,0 +1,118 @@
+import os
+import logging
+from datetime import date
+from typing import Any, Dict, List
+
+from .job_queue import job_queue
+from .llm_client import get_llm_client
+from .session_analytics import ANALYTICS_TIMEOUT_SECONDS, analyze_in_subprocess
+from .session_manager import SessionManager
+from .user_memory import user_memory
+
+logger = logging.getLogger(__name__)
+
+DIARY_DIR = os.getenv("DIARY_DIR", os.path.join("sessions", "diaries"))
+HISTORY_SUMMARY_EVERY = int(os.getenv("HISTORY_SUMMARY_EVERY", "20"))  # 요약되지 않은 메시지가 이만큼 쌓이면 요약
+HISTORY_SUMMARY_KEEP = int(os.getenv("HISTORY_SUMMARY_KEEP", "8"))  # 최근 메시지는 원문으로 넘기므로 요약에서 제외
+MAX_PROMPT_CHARS = 6000
+
+DIARY_SYSTEM_PROMPT = """
+당신은 어르신의 하루를 대신 정리해 드리는 다정한 기록자입니다.
+아래는 사용자와 동반자가 오늘 나눈 대화입니다. 사용자의 시점('나')으로 짧은 일기를 써주세요.
+- 5~8문장, 따뜻하고 담백한 문체
+- 대화에 없는 사실은 지어내지 마세요.
+- 오늘 느낀 감정과 기억하고 싶은 순간을 중심으로 정리하세요.
+"""
+
+SUMMARY_SYSTEM_PROMPT = """
+당신은 상담 기록을 정리하는 조력자입니다.
+[이전 요약]과 [새 대화]를 합쳐, 다음 대화에서 참고할 수 있도록 3~5문장으로 요약하세요.
+사용자가 털어놓은 사건, 감정, 사람, 앞으로의 바람 위주로 쓰고 인사말이나 일반적인 위로는 빼세요.
+"""
+
+_sessions = SessionManager()
+
+
+def _format_lines(messages: List[Dict[str, Any]]) -> str:
+    lines = [
+        f"{'사용자' if m.get('role') == 'user' else '동반자'}: {m.get('content', '')}"
+        for m in messages
+        if isinstance(m, dict) and m.get("content")
+    ]
+    # 너무 길면 최근 대화 위주로 자른다.
+    return "\n".join(lines)[-MAX_PROMPT_CHARS:]
+
+
+def diary_path(user_id: str, day: str) -> str:
+    return os.path.join(DIARY_DIR, user_id, f"{day}.md")
+
+
+@job_queue.register("diary")
+def generate_diary(user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """그날 대화로 다이어리 생성 후 sessions/diaries/<user_id>/<date>.md 에 저장."""
+    day = payload.get("date") or date.today().isoformat()
+    history = _sessions.load_session(user_id).get("conversation_history", [])
+    todays = [m for m in history if isinstance(m, dict) and str(m.get("timestamp", "")).startswith(day)]
+    if not todays:
+        return {"date": day, "diary": None, "reason": "no_conversation"}
+
+    diary = get_llm_client().generate_text(DIARY_SYSTEM_PROMPT, _format_lines(todays))
+    path = diary_path(user_id, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(diary)
+    return {"date": day, "diary": diary}
+
+
+@job_queue.register("summarize_history")
+def summarize_history(user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """프롬프트에 원문으로 들어가지 않는 오래된 대화를 누적 요약해 사용자 기억에 저장."""
+    history = _sessions.load_session(user_id).get("conversation_history", [])
+    memory = user_memory.get(user_id)
+    start = memory.get("history_summary_until", 0)
+    until = len(history) - HISTORY_SUMMARY_KEEP
+    if until <= start:
+        return {"skipped": True, "until": start}
+
+    previous = memory.get("history_summary") or "(없음)"
+    prompt = f"[이전 요약]\n{previous}\n\n[새 대화]\n{_format_lines(history[start:until])}"
+    summary = get_llm_client().generate_text(SUMMARY_SYSTEM_PROMPT, prompt).strip()
+    user_memory.set_summary(user_id, summary, until)
+    return {"summary": summary, "until": until}
+
+
+@job_queue.register("extract_facts")
+def extract_facts(user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    memory = user_memory.update(user_id, [payload.get("text", "")])
+    return {"turns": memory.get("turns", 0), "region": memory.get("region")}
+
+
+def schedule_after_turn(user_id: str, user_text: str, history_length: int) -> None:
+    """턴 저장 후 부가 작업 등록 (응답 지연에 포함되지 않음)."""
+    try:
+        job_queue.enqueue("extract_facts", user_id, {"text": user_text})
+        summarized = user_memory.get(user_id).get("history_summary_until", 0)
+        if history_length - HISTORY_SUMMARY_KEEP - summarized >= HISTORY_SUMMARY_EVERY:
+            # 같은 구간에 대해 턴마다 중복 등록되지 않도록 요약 시작 위치를 멱등 키로
+            job_queue.enqueue(
+                "summarize_history", user_id, idempotency_key=f"summarize_history:{user_id}:{summarized}"
+            )
+    except Exception as e:
+        logger.warning(f"[Jobs] 부가 작업 등록 실패 (user={user_id}): {e}")
+
+
+# 하위 프로세스가 최대 ANALYTICS_TIMEOUT_SECONDS까지 돌므로 임대를 그보다 길게 잡는다
+# (하트비트가 밀려도 다른 워커가 같은 스캔을 다시 시작하지 않도록).
+@job_queue.register("session_analytics", lease_seconds=ANALYTICS_TIMEOUT_SECONDS + 60)
+def session_analytics(user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """관리자가 요청한 세션 저장소 통계 (/api/admin/analytics). 별도 프로세스의 풀로 전체 세션을 훑는다."""
+    return analyze_in_subprocess(
+        _sessions.storage_path,
+        include_archived=payload.get("include_archived", True),
+        export=payload.get("export"),
+    )
+
+
+def request_diary(user_id: str, day: str, history_length: int) -> str:
+    """다이어리 작업 등록. 같은 날 같은 대화 길이면 기존 작업을 돌려준다."""
+    return job_queue.enqueue("diary", user_id, {"date": day}, idempotency_key=f"diary:{user_id}:{day}:{history_length}")
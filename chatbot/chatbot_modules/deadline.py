@@ -0,0 +1,46 @@
+import os
+import time
+from typing import Optional
+
+# 턴 단위 지연 예산 설정
+TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", "20"))
+# empathy_agent <-> tools 루프 최대 반복 횟수
+MAX_TOOL_ITERATIONS = int(os.getenv("MAX_TOOL_ITERATIONS", "2"))
+# 주 모델 응답이 이 시간보다 늦으면 보조 모델로 헤지 요청
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "6"))
+# 남은 시간이 이보다 적으면 툴 호출 없이 바로 답변을 마무리
+MIN_TOOL_BUDGET_SECONDS = float(os.getenv("MIN_TOOL_BUDGET_SECONDS", "4"))
+
+DEADLINE_FALLBACK_TEXT = (
+    "답변을 준비하는 데 시간이 오래 걸리고 있어요. "
+    "잠시 후 다시 말씀해 주시면 이어서 이야기 나눌게요."
+)
+
+
+class DeadlineExceeded(Exception):
+    """턴 예산을 모두 소진했을 때 발생."""
+
+
+class TurnDeadline:
+    """한 턴(사용자 메시지 1건)의 지연 예산. LangGraph state로 전파된다."""
+
+    def __init__(self, budget_seconds: Optional[float] = None):
+        self.budget_seconds = TURN_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows_tools(self) -> bool:
+        """툴 왕복(검색 + 재호출)을 한 번 더 감당할 시간이 남았는지."""
+        return self.remaining() > MIN_TOOL_BUDGET_SECONDS
+
+    def __repr__(self) -> str:
+        return f"TurnDeadline(budget={self.budget_seconds}s, remaining={self.remaining():.2f}s)"
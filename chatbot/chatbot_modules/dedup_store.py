@@ -0,0 +1,260 @@
+import os
+import csv
+import json
+import zlib
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_ROOT_DIR = Path(__file__).resolve().parents[2]
+DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH", os.path.join("sessions", "dedup.sqlite3"))
+DEDUP_TTL_DAYS = float(os.getenv("DEDUP_TTL_DAYS", "30"))  # 이 기간이 지나면 같은 항목을 다시 추천/질문 (0이면 만료 없음)
+DEDUP_RESET_WHEN_EXHAUSTED = os.getenv("DEDUP_RESET_WHEN_EXHAUSTED", "1").lower() not in ("0", "false", "no")
+# 카탈로그에 없는 항목(벡터 DB에만 있는 문구 등)은 텍스트 해시로 이 범위의 id를 준다.
+DEDUP_HASH_BASE = int(os.getenv("DEDUP_HASH_BASE", "1024"))
+DEDUP_HASH_BUCKETS = int(os.getenv("DEDUP_HASH_BUCKETS", "1024"))
+SQLITE_TIMEOUT_SECONDS = 5.0
+
+
+class Catalog:
+    """CSV 카탈로그의 텍스트 → 안정적인 id 매핑 (벡터 검색 결과를 id로 바꾸는 데 사용)."""
+
+    def __init__(self, kind: str, path: Path, id_column: str, text_column: str):
+        self.kind = kind
+        self.id_column = id_column
+        self.text_column = text_column
+        self._ids: Dict[str, int] = {}
+        try:
+            with open(path, "r", encoding="utf-8-sig") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        self._ids[(row.get(text_column) or "").strip()] = int(row[id_column])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+        except OSError as e:
+            logger.warning(f"[Dedup] 카탈로그 로드 실패 {path}: {e}")
+        self.count = len(set(self._ids.values()))
+
+    def id_for(self, metadata: Dict[str, Any], text: str) -> Optional[int]:
+        """메타데이터에 id가 있으면 그것을, 없으면 텍스트로 찾는다. 카탈로그에 없으면 텍스트 해시 id, 텍스트도 없으면 None."""
+        raw = metadata.get(self.id_column)
+        if raw is not None:
+            try:
+                return int(float(raw))
+            except (TypeError, ValueError):
+                pass
+        key = (text or "").strip()
+        if not key:
+            return None
+        found = self._ids.get(key)
+        return found if found is not None else hashed_id(key)
+
+
+def hashed_id(text: str) -> int:
+    """카탈로그 밖 텍스트의 안정적인 id (프로세스·재시작과 무관한 crc32, 충돌 시 이미 본 것으로 취급)."""
+    return DEDUP_HASH_BASE + zlib.crc32(text.encode("utf-8")) % DEDUP_HASH_BUCKETS
+
+
+ACTIVITY_CATALOG = Catalog("activity", _ROOT_DIR / "data" / "meaningful_activities.csv", "activity_id", "activity_kr")
+QUESTION_CATALOG = Catalog("question", _ROOT_DIR / "data" / "empathy_questions.csv", "question_id", "question_text")
+CATALOGS = {c.kind: c for c in (ACTIVITY_CATALOG, QUESTION_CATALOG)}
+
+
+def _to_bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def _from_bytes(blob: Optional[bytes]) -> int:
+    return int.from_bytes(blob, "little") if blob else 0
+
+
+class SeenSet:
+    """한 사용자/종류의 이미 보낸 id 비트셋 (읽기 전용 스냅샷)."""
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    def __contains__(self, item_id: Optional[int]) -> bool:
+        return item_id is not None and bool(self.bits >> item_id & 1)
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def catalog_count(self) -> int:
+        """해시 id를 뺀 카탈로그 항목 수 (한 바퀴 다 돌았는지 판단용)."""
+        return bin(self.bits & ((1 << DEDUP_HASH_BASE) - 1)).count("1")
+
+
+class DedupStore:
+    """
+    사용자별 추천 활동/질문 중복 방지 저장소 (SQLite, 사용자·종류마다 비트셋 한 행).
+
+    카탈로그가 100개 안팎이라 사용자당 수십 바이트면 충분하다 (해시 id까지 써도
+    DEDUP_HASH_BASE + DEDUP_HASH_BUCKETS 비트가 상한). 파일 하나를
+    여러 uvicorn 워커가 같이 쓰고, 재시작 후에도 유지된다. 세트가 만들어진 지
+    DEDUP_TTL_DAYS가 지나면 비워서 다시 추천할 수 있게 한다.
+    """
+
+    def __init__(self, path: str = DEDUP_DB_PATH):
+        # 임포트만으로 파일이 생기지 않도록 실제 연결은 open()/첫 사용 때 한다.
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def open(self) -> None:
+        """디렉터리와 테이블을 만든다 (startup 단계에서 호출, 여러 번 불러도 됨)."""
+        with self._lock:
+            if self._ready:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = self._raw_connect()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS seen_items (
+                    user_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    bits BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, kind)
+                )
+                """
+            )
+            conn.commit()
+            self._ready = True
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.open()
+        return self._raw_connect()
+
+    def _raw_connect(self) -> sqlite3.Connection:
+        # 스레드마다 연결 하나 (sqlite3 연결은 스레드 간 공유 불가)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT_SECONDS)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expired(created_at: float) -> bool:
+        return DEDUP_TTL_DAYS > 0 and time.time() - created_at > DEDUP_TTL_DAYS * 86400
+
+    def seen(self, user_id: str, kind: str) -> SeenSet:
+        row = self._connect().execute(
+            "SELECT bits, created_at FROM seen_items WHERE user_id = ? AND kind = ?", (user_id, kind)
+        ).fetchone()
+        if row is None or self._expired(row[1]):
+            return SeenSet()
+        return SeenSet(_from_bytes(row[0]))
+
+    def add(self, user_id: str, kind: str, item_ids: Iterable[Optional[int]]) -> None:
+        """id를 세트에 추가 (워커 간 경합이 없도록 한 트랜잭션에서 읽고 쓴다)."""
+        new_bits = 0
+        for item_id in item_ids:
+            if item_id is not None:
+                new_bits |= 1 << item_id
+        if not new_bits:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT bits, created_at FROM seen_items WHERE user_id = ? AND kind = ?", (user_id, kind)
+            ).fetchone()
+            bits, created_at = (0, now) if row is None or self._expired(row[1]) else (_from_bytes(row[0]), row[1])
+            bits |= new_bits
+            catalog = CATALOGS.get(kind)
+            if DEDUP_RESET_WHEN_EXHAUSTED and catalog and catalog.count and SeenSet(bits).catalog_count() >= catalog.count:
+                # 카탈로그를 한 바퀴 다 돌았으면 이번에 보낸 것만 남기고 처음부터
+                bits, created_at = new_bits, now
+            conn.execute(
+                "INSERT OR REPLACE INTO seen_items (user_id, kind, bits, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, kind, _to_bytes(bits), created_at, now),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.warning(f"[Dedup] 저장 실패 user={user_id} kind={kind}: {e}")
+
+    def reset(self, user_id: str, kind: Optional[str] = None) -> int:
+        """사용자의 세트를 비운다 (kind가 없으면 전부). 지운 행 수 반환."""
+        conn = self._connect()
+        if kind:
+            cur = conn.execute("DELETE FROM seen_items WHERE user_id = ? AND kind = ?", (user_id, kind))
+        else:
+            cur = conn.execute("DELETE FROM seen_items WHERE user_id = ?", (user_id,))
+        conn.commit()
+        return cur.rowcount
+
+    def purge_expired(self) -> int:
+        if DEDUP_TTL_DAYS <= 0:
+            return 0
+        conn = self._connect()
+        cur = conn.execute("DELETE FROM seen_items WHERE created_at < ?", (time.time() - DEDUP_TTL_DAYS * 86400,))
+        conn.commit()
+        return cur.rowcount
+
+    def memory_report(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """사용자별 저장 바이트/항목 수."""
+        query = "SELECT user_id, kind, bits, created_at, updated_at FROM seen_items"
+        params: tuple = ()
+        if user_id:
+            query += " WHERE user_id = ?"
+            params = (user_id,)
+        users: Dict[str, Dict[str, Any]] = {}
+        for uid, kind, blob, created_at, updated_at in self._connect().execute(query, params):
+            entry = users.setdefault(uid, {"bytes": 0, "items": {}})
+            entry["bytes"] += len(blob)
+            entry["items"][kind] = 0 if self._expired(created_at) else len(SeenSet(_from_bytes(blob)))
+            entry["updated_at"] = max(entry.get("updated_at", 0), updated_at)
+        return {
+            "users": len(users),
+            "bytes_total": sum(u["bytes"] for u in users.values()),
+            "per_user": users,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        rows, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(bits)), 0) FROM seen_items"
+        ).fetchone()
+        return {"rows": rows, "bytes": total}
+
+
+dedup_store = DedupStore()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="추천/질문 중복 방지 저장소 관리")
+    parser.add_argument("--user", help="특정 사용자만")
+    parser.add_argument("--reset", action="store_true", help="--user의 세트를 비움")
+    parser.add_argument("--kind", choices=sorted(CATALOGS), help="--reset 대상 종류 (없으면 전부)")
+    parser.add_argument("--purge-expired", action="store_true", help="TTL이 지난 행 삭제")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        if not args.user:
+            parser.error("--reset에는 --user가 필요합니다")
+        print(f"{dedup_store.reset(args.user, args.kind)}개 행 삭제")
+        return 0
+    if args.purge_expired:
+        print(f"{dedup_store.purge_expired()}개 행 삭제")
+        return 0
+    print(json.dumps(dedup_store.memory_report(args.user), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,210 @@
+import os
+import csv
+import logging
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .recommend_ba import activity_prefetch_key
+from .resilience import is_open
+from .session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+_ROOT_DIR = Path(__file__).resolve().parents[2]
+QUESTIONS_CSV = _ROOT_DIR / "data" / "empathy_questions.csv"
+ACTIVITIES_CSV = _ROOT_DIR / "data" / "meaningful_activities.csv"
+
+# ---------------------------------------------------------------------------
+# Triggers
+# ---------------------------------------------------------------------------
+DEGRADE_LATENCY_SECONDS = float(os.getenv("DEGRADE_LATENCY_SECONDS", "15"))  # 최근 턴 지연 EWMA 상한
+DEGRADE_MAX_INFLIGHT = int(os.getenv("DEGRADE_MAX_INFLIGHT", "16"))  # 동시 진행 중인 LLM 턴 상한
+DEGRADE_COOLDOWN_SECONDS = float(os.getenv("DEGRADE_COOLDOWN_SECONDS", "20"))
+# 쿨다운 뒤 LLM으로 보낸 확인 턴이 이보다 오래 끝나지 않으면 아직 느린 것으로 보고 쿨다운을 다시 건다
+DEGRADE_PROBE_TIMEOUT_SECONDS = float(os.getenv("DEGRADE_PROBE_TIMEOUT_SECONDS", str(DEGRADE_LATENCY_SECONDS * 2)))
+LATENCY_EWMA_ALPHA = 0.3
+
+# 마음 상태(B1)별 첫 문장
+EMOTION_OPENERS = {
+    "불안하다": "마음이 많이 불안하셨겠어요. 천천히 숨 한번 고르셔도 괜찮아요.",
+    "무기력하다": "몸도 마음도 무거우신 날이 이어지고 있군요.",
+    "외롭다": "혼자 계신 시간이 길게 느껴지셨겠어요. 제가 곁에서 들을게요.",
+    "혼란스럽다": "여러 생각이 한꺼번에 밀려와 마음이 복잡하셨겠어요.",
+    "슬프다": "많이 슬프셨겠어요. 그 마음을 억지로 누르지 않으셔도 괜찮아요.",
+    "그래도 꽤 평온하다": "평온한 마음을 지키고 계셔서 저도 반가워요.",
+    "말로 표현하기 어렵다": "말로 다 표현하기 어려운 마음이 있으시죠. 천천히 이야기해 주셔도 돼요.",
+}
+DEFAULT_OPENER = "이야기 들려주셔서 고마워요."
+ACTIVITY_HINTS = ("심심", "지루", "무기력", "할 게 없", "할게 없", "뭐 하지", "뭐하지", "재미")
+
+
+class DegradationMonitor:
+    """LLM 지연/부하/차단기 상태를 보고 로컬 응답 모드 전환 여부를 판단."""
+
+    def __init__(self, llm_dependencies: List[str]):
+        self.llm_dependencies = llm_dependencies
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency_ewma = 0.0
+        self._degraded_until = 0.0
+        self._probe_started = 0.0  # 확인 턴이 진행 중이면 시작 시각
+        self._local = threading.local()  # 이 스레드의 다음 턴이 확인 턴인지 (should_degrade → track_turn)
+
+    @contextmanager
+    def track_turn(self):
+        """LLM을 타는 턴의 동시 실행 수와 지연을 기록."""
+        started = time.monotonic()
+        probe = getattr(self._local, "probe", False)
+        self._local.probe = False
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._in_flight -= 1
+                if probe:
+                    self._probe_started = 0.0
+                if self._latency_ewma == 0.0:
+                    self._latency_ewma = elapsed
+                else:
+                    self._latency_ewma = LATENCY_EWMA_ALPHA * elapsed + (1 - LATENCY_EWMA_ALPHA) * self._latency_ewma
+                if self._latency_ewma > DEGRADE_LATENCY_SECONDS:
+                    self._degraded_until = time.monotonic() + DEGRADE_COOLDOWN_SECONDS
+                    logger.warning(
+                        f"[Degrade] 평균 지연 {self._latency_ewma:.1f}s → {DEGRADE_COOLDOWN_SECONDS:.0f}s 동안 로컬 응답"
+                    )
+
+    def should_degrade(self) -> Optional[str]:
+        """로컬 응답으로 전환해야 하면 사유를, 아니면 None."""
+        self._local.probe = False
+        if self.llm_dependencies and all(is_open(name) for name in self.llm_dependencies):
+            return "llm_breaker_open"
+        with self._lock:
+            if self._in_flight >= DEGRADE_MAX_INFLIGHT:
+                return "overload"
+            now = time.monotonic()
+            if now < self._degraded_until:
+                return "latency"
+            if self._probe_started:
+                # 확인 턴이 끝날 때까지 다른 턴은 계속 로컬 응답 (느린 의존성에 몰리지 않도록)
+                if now - self._probe_started > DEGRADE_PROBE_TIMEOUT_SECONDS:
+                    self._probe_started = 0.0
+                    self._degraded_until = now + DEGRADE_COOLDOWN_SECONDS
+                return "latency"
+            if self._degraded_until and self._latency_ewma > DEGRADE_LATENCY_SECONDS:
+                # 쿨다운이 끝나면 이 턴 하나만 LLM으로 보내 지연을 다시 측정한다.
+                self._latency_ewma = DEGRADE_LATENCY_SECONDS
+                self._degraded_until = 0.0
+                self._probe_started = now
+                self._local.probe = True
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "latency_ewma": round(self._latency_ewma, 3),
+                "degraded_for": round(max(0.0, self._degraded_until - time.monotonic()), 1),
+                "probing": bool(self._probe_started),
+            }
+
+
+def _load_csv(path: Path) -> List[Dict[str, str]]:
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return [row for row in csv.DictReader(f)]
+    except Exception as e:
+        logger.warning(f"CSV 로드 실패 {path}: {e}")
+        return []
+
+
+class DegradedResponder:
+    """LLM 없이 프로필/대화 단계에 맞춘 짧은 공감 응답을 로컬에서 생성."""
+
+    STAGE_BY_TURNS = ((3, "Stage1"), (8, "Stage2"))  # 사용자 발화 수 기준 단계
+    DEEPEST_STAGE = "Stage3"
+    RECENT_REPLY_WINDOW = 20
+
+    def __init__(self):
+        self._questions_by_stage: Dict[str, List[Dict[str, str]]] = {}
+        for row in _load_csv(QUESTIONS_CSV):
+            self._questions_by_stage.setdefault(row.get("stage", ""), []).append(row)
+        self._activities = _load_csv(ACTIVITIES_CSV)
+
+    def _stage_for(self, history: List[Dict[str, Any]]) -> str:
+        user_turns = sum(1 for m in history if isinstance(m, dict) and m.get("role") == "user")
+        for limit, stage in self.STAGE_BY_TURNS:
+            if user_turns < limit:
+                return stage
+        return self.DEEPEST_STAGE
+
+    @staticmethod
+    def _pick(candidates: List[Dict[str, str]], seed: str) -> Optional[Dict[str, str]]:
+        # 같은 턴에는 같은 결과가 나오도록 결정적으로 고른다.
+        if not candidates:
+            return None
+        return candidates[zlib.crc32(seed.encode("utf-8")) % len(candidates)]
+
+    def _question(self, stage: str, recent_replies: List[str], seed: str) -> Optional[str]:
+        # 최근 답변에 이미 들어간 질문은 건너뛴다.
+        rows = [
+            r
+            for r in self._questions_by_stage.get(stage, [])
+            if r.get("question_text") and not any(r["question_text"] in reply for reply in recent_replies)
+        ]
+        row = self._pick(rows, seed)
+        return row.get("question_text") if row else None
+
+    def _activity(self, profile: Dict[str, Any], seed: str) -> Optional[str]:
+        emotion = profile.get("emotion") or ""
+        mobility = profile.get("mobility") or profile.get("activity_range") or ""
+        _, target_tags, energy_limit = activity_prefetch_key(emotion, mobility)
+        rows = []
+        for row in self._activities:
+            try:
+                energy = int(row.get("ENERGY_REQUIRED") or 0)
+            except ValueError:
+                continue
+            if energy > energy_limit:
+                continue
+            if any(tag in (row.get("FEELING_TAGS") or "") for tag in target_tags):
+                rows.append(row)
+        row = self._pick(rows, seed)
+        return row.get("activity_kr") if row else None
+
+    def respond(self, session: Dict[str, Any], text: str) -> str:
+        """세션(프로필/기록)과 현재 발화로 2~3문장 응답 생성."""
+        profile = session.get("user_profile", {}) or {}
+        history = session.get("conversation_history", []) or []
+        seed = f"{session.get('user_id', '')}:{len(history)}:{text}"
+
+        sentences = []
+        if not history:
+            sentences.append(SessionManager.build_welcome_message(session))
+        sentences.append(EMOTION_OPENERS.get(profile.get("emotion") or "", DEFAULT_OPENER))
+
+        activity = None
+        if any(hint in text for hint in ACTIVITY_HINTS):
+            activity = self._activity(profile, seed)
+        if activity:
+            sentences.append(
+                f"혹시 괜찮으시다면 '{activity}'처럼 가벼운 것부터 해보셔도 좋을 것 같아요. "
+                "물론 지금처럼 이야기만 이어가셔도 괜찮아요."
+            )
+        else:
+            recent_replies = [
+                m.get("content", "")
+                for m in history[-self.RECENT_REPLY_WINDOW:]
+                if isinstance(m, dict) and m.get("role") == "assistant"
+            ]
+            question = self._question(self._stage_for(history), recent_replies, seed)
+            if question:
+                sentences.append(question)
+
+        return " ".join(sentences)
@@ -0,0 +1,347 @@
+import os
+import gc
+import time
+import logging
+import threading
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "0").lower() in ("1", "true", "yes")
+MEMORY_TRACEMALLOC_FRAMES = int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "10"))
+MEMORY_MAX_SNAPSHOTS = int(os.getenv("MEMORY_MAX_SNAPSHOTS", "5"))  # 스냅샷 하나가 수십 MB일 수 있다
+MEMORY_RSS_WATERMARK_MB = float(os.getenv("MEMORY_RSS_WATERMARK_MB", "0"))  # 0이면 감시하지 않음
+MEMORY_CHECK_SECONDS = float(os.getenv("MEMORY_CHECK_SECONDS", "30"))
+MEMORY_SHRINK_COOLDOWN_SECONDS = float(os.getenv("MEMORY_SHRINK_COOLDOWN_SECONDS", "300"))
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+
+# ---------------------------------------------------------------------------
+# 캐시 등록
+# ---------------------------------------------------------------------------
+class CacheEntry(NamedTuple):
+    size: Callable[[], int]
+    shrink: Optional[Callable[[], Any]]
+
+
+_caches: Dict[str, CacheEntry] = {}
+
+
+def register_cache(name: str, size: Callable[[], int], shrink: Optional[Callable[[], Any]] = None) -> None:
+    """프로세스 안에 상태를 쌓는 캐시 등록. size는 항목 수, shrink는 메모리 경보 때 비우는 함수."""
+    _caches[name] = CacheEntry(size, shrink)
+
+
+def cache_sizes() -> Dict[str, Optional[int]]:
+    sizes = {}
+    for name, entry in _caches.items():
+        try:
+            sizes[name] = int(entry.size())
+        except Exception as e:
+            logger.warning(f"[Memory] 캐시 크기 조회 실패 {name}: {e}")
+            sizes[name] = None
+    return sizes
+
+
+def shrink_caches() -> Dict[str, Dict[str, Optional[int]]]:
+    """shrink가 있는 캐시를 모두 비우고 {이름: {before, after}}."""
+    before = cache_sizes()
+    for name, entry in _caches.items():
+        if entry.shrink is None:
+            continue
+        try:
+            entry.shrink()
+        except Exception as e:
+            logger.warning(f"[Memory] 캐시 축소 실패 {name}: {e}")
+    after = cache_sizes()
+    return {name: {"before": before[name], "after": after[name]} for name in _caches}
+
+
+# ---------------------------------------------------------------------------
+# 프로세스 메모리
+# ---------------------------------------------------------------------------
+def rss_bytes() -> Optional[int]:
+    """현재 RSS. /proc이 없으면 최대 RSS(getrusage)로 대신한다."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def object_counts(limit: int = 15) -> Dict[str, Any]:
+    """LangChain 메시지/Document 인스턴스 수와 gc가 추적하는 객체 상위 타입 (힙 전체를 훑으므로 스레드풀에서)."""
+    try:
+        from langchain_core.documents import Document
+        from langchain_core.messages import BaseMessage
+
+        tracked = (BaseMessage, Document)
+    except ImportError:
+        tracked = ()
+    by_type: Counter = Counter()
+    langchain: Counter = Counter()
+    is_tracked: Dict[type, bool] = {}
+    objects = gc.get_objects()
+    for obj in objects:
+        # isinstance는 프록시 객체의 __getattr__을 건드릴 수 있어 type()의 MRO로만 판단한다
+        cls = type(obj)
+        by_type[cls.__qualname__] += 1
+        hit = is_tracked.get(cls)
+        if hit is None:
+            hit = is_tracked[cls] = any(base in tracked for base in cls.__mro__)
+        if hit:
+            langchain[cls.__name__] += 1
+    total = len(objects)
+    del objects
+    return {
+        "gc_objects": total,
+        "langchain": dict(langchain.most_common()),
+        "top_types": [{"type": name, "count": count} for name, count in by_type.most_common(limit)],
+    }
+
+
+# ---------------------------------------------------------------------------
+# tracemalloc 스냅샷
+# ---------------------------------------------------------------------------
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+_snapshots: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+_snapshot_lock = threading.Lock()
+_next_snapshot_id = 1
+
+
+def start_tracing(frames: int = MEMORY_TRACEMALLOC_FRAMES) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.info(f"[Memory] tracemalloc 시작 (frames={frames})")
+
+
+def stop_tracing() -> None:
+    """추적을 멈추고 보관한 스냅샷도 버린다 (스냅샷 비교는 같은 추적 구간 안에서만 의미가 있다)."""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("[Memory] tracemalloc 중지")
+    with _snapshot_lock:
+        _snapshots.clear()
+
+
+def tracing_status() -> Dict[str, Any]:
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": True,
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+    }
+
+
+def _meta(snapshot_id: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": snapshot_id, "label": entry["label"], "taken_at": entry["taken_at"], "traced_bytes": entry["traced_bytes"]}
+
+
+def take_snapshot(label: str = "") -> Dict[str, Any]:
+    """스냅샷을 찍어 보관 (MEMORY_MAX_SNAPSHOTS개 초과 시 오래된 것부터 버림). 추적 중이 아니면 RuntimeError."""
+    global _next_snapshot_id
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not tracing")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    entry = {
+        "label": label,
+        "taken_at": datetime.now().isoformat(timespec="seconds"),
+        "traced_bytes": tracemalloc.get_traced_memory()[0],
+        "snapshot": snapshot,
+    }
+    with _snapshot_lock:
+        snapshot_id = _next_snapshot_id
+        _next_snapshot_id += 1
+        _snapshots[snapshot_id] = entry
+        while len(_snapshots) > max(1, MEMORY_MAX_SNAPSHOTS):
+            _snapshots.popitem(last=False)
+    return _meta(snapshot_id, entry)
+
+
+def list_snapshots() -> List[Dict[str, Any]]:
+    with _snapshot_lock:
+        return [_meta(snapshot_id, entry) for snapshot_id, entry in _snapshots.items()]
+
+
+def _get_snapshot(snapshot_id: int) -> tracemalloc.Snapshot:
+    with _snapshot_lock:
+        entry = _snapshots.get(snapshot_id)
+    if entry is None:
+        raise KeyError(snapshot_id)
+    return entry["snapshot"]
+
+
+def _site(stat) -> Dict[str, Any]:
+    frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+    site = {"site": frames[0] if frames else "?"}
+    if len(frames) > 1:
+        site["traceback"] = frames
+    return site
+
+
+def _check_key_type(key_type: str) -> None:
+    if key_type not in KEY_TYPES:
+        raise ValueError(f"key_type must be one of {', '.join(KEY_TYPES)}")
+
+
+def top_allocations(snapshot_id: Optional[int] = None, limit: int = 20, key_type: str = "lineno") -> List[Dict[str, Any]]:
+    """할당 위치별 상위 크기. snapshot_id가 없으면 지금 찍은 스냅샷 (보관하지 않음)."""
+    _check_key_type(key_type)
+    if snapshot_id is None:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    else:
+        snapshot = _get_snapshot(snapshot_id)
+    return [
+        {**_site(stat), "size_bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics(key_type)[:limit]
+    ]
+
+
+def diff_snapshots(base_id: int, target_id: int, limit: int = 20, key_type: str = "lineno") -> List[Dict[str, Any]]:
+    """base → target 사이에 늘어난 할당 위치 (증가량 큰 순)."""
+    _check_key_type(key_type)
+    base, target = _get_snapshot(base_id), _get_snapshot(target_id)
+    return [
+        {
+            **_site(stat),
+            "size_diff_bytes": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size_bytes": stat.size,
+        }
+        for stat in target.compare_to(base, key_type)[:limit]
+    ]
+
+
+def report(top: int = 10, objects: bool = True) -> Dict[str, Any]:
+    """/api/admin/memory 응답: RSS, 등록된 캐시 크기, 객체 수, tracemalloc 상위 할당 위치."""
+    tracing = tracing_status()
+    result = {
+        "rss_bytes": rss_bytes(),
+        "watermark_bytes": memory_guard.watermark_bytes or None,
+        "caches": cache_sizes(),
+        "tracemalloc": tracing,
+        "snapshots": list_snapshots(),
+        "guard": memory_guard.snapshot(),
+    }
+    if tracing["tracing"] and top:
+        result["top_allocations"] = top_allocations(limit=top)
+    if objects:
+        result["objects"] = object_counts()
+    return result
+
+
+# ---------------------------------------------------------------------------
+# RSS 경보
+# ---------------------------------------------------------------------------
+class MemoryGuard:
+    """
+    RSS가 MEMORY_RSS_WATERMARK_MB를 넘으면 등록된 캐시를 비우고 gc를 돌린 뒤
+    전후 RSS/캐시 크기/상위 할당 위치를 경고 로그로 남긴다. 경보 사이에는 쿨다운을 둔다.
+    """
+
+    def __init__(
+        self,
+        watermark_mb: float = MEMORY_RSS_WATERMARK_MB,
+        interval: float = MEMORY_CHECK_SECONDS,
+        cooldown: float = MEMORY_SHRINK_COOLDOWN_SECONDS,
+    ):
+        self.watermark_bytes = int(watermark_mb * 1024 * 1024)
+        self.interval = interval
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_trigger = 0.0
+        self.triggers = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        """기동 단계에서 호출. 워터마크가 없으면 감시 스레드를 띄우지 않는다."""
+        if MEMORY_TRACEMALLOC:
+            start_tracing()
+        if self.watermark_bytes <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="memory-guard", daemon=True)
+        self._thread.start()
+        logger.info(f"[Memory] RSS 감시 시작 (watermark={self.watermark_bytes / 2**20:.0f}MB)")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"[Memory] RSS 점검 실패: {e}")
+
+    def check(self) -> Optional[Dict[str, Any]]:
+        """워터마크를 넘었고 쿨다운이 지났으면 shrink(). 실행했으면 보고서."""
+        rss = rss_bytes()
+        if rss is None or self.watermark_bytes <= 0 or rss <= self.watermark_bytes:
+            return None
+        if time.monotonic() - self._last_trigger < self.cooldown:
+            return None
+        return self.shrink(reason="watermark")
+
+    def shrink(self, reason: str = "manual") -> Dict[str, Any]:
+        with self._lock:
+            self._last_trigger = time.monotonic()
+            rss_before = rss_bytes()
+            caches = shrink_caches()
+            collected = gc.collect()
+            rss_after = rss_bytes()
+            result = {
+                "reason": reason,
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "rss_before_bytes": rss_before,
+                "rss_after_bytes": rss_after,
+                "gc_collected": collected,
+                "caches": caches,
+            }
+            if tracemalloc.is_tracing():
+                result["top_allocations"] = top_allocations(limit=10)
+            self.triggers += 1
+            self.last_report = result
+
+        mb = lambda b: f"{b / 2**20:.0f}MB" if b is not None else "?"
+        freed = ", ".join(f"{n} {c['before']}→{c['after']}" for n, c in caches.items() if c["before"] != c["after"])
+        logger.warning(
+            f"[Memory] 캐시 축소 ({reason}) RSS {mb(rss_before)} → {mb(rss_after)}, gc {collected}, {freed or '변화 없음'}"
+        )
+        for item in result.get("top_allocations", []):
+            logger.warning(f"[Memory]   {item['site']} {item['size_bytes'] / 1024:.0f}KB ({item['count']}개)")
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "watermark_bytes": self.watermark_bytes or None,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "triggers": self.triggers,
+            "last_report": self.last_report,
+        }
+
+
+memory_guard = MemoryGuard()
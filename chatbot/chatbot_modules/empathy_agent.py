@@ -1,9 +1,11 @@
 import logging
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
-from .llm_client import LLMClient
+from .deadline import DEADLINE_FALLBACK_TEXT, MAX_TOOL_ITERATIONS, DeadlineExceeded
+from .llm_client import get_llm_client
 from .recommend_ba import TOOLS
+from .user_memory import render_memory
 
 logger = logging.getLogger(__name__)
 
@@ -43,14 +45,12 @@ AI: "적적하신가 봐요. 그런 날에는 기분 전환이 필요하죠! (
 거동이 괜찮으시다면, 근처에서 가볍게 걸을 수 있는 산책 코스나 집에서 할 수 있는 소일거리를 잠깐 찾아봐 드릴까요? 필요 없으시면 편히 이야기만 이어가도 괜찮아요. (활동 제안)"
 """
 
-SYSTEM_PROMPT_TEMPLATE = f"""
+# 모든 사용자/스텝에서 바이트 단위로 동일한 정적 프롬프트 (LLM 측 prefix 캐시 대상).
+# 사용자별 정보는 USER_CONTEXT_TEMPLATE로 따로 만들어 정적 프롬프트 뒤에 붙인다.
+STATIC_SYSTEM_PROMPT = f"""
 당신은 사용자의 삶을 회고하고 남은 날들을 의미 있게 보내도록 돕는 '동반자'이자 '친구'이며,
 동시에 마음이 힘든 분, 노년층을 지원하는 '따뜻한 심리 상담사'입니다.
-
-사용자의 이름은 '{{user_name}}'이며, 나이는 {{user_age}}입니다.
-거동/활동 범위는 '{{user_mobility}}'입니다.
-마음 상태는 '{{user_emotion}}'입니다.
-사용자 ID는 {{user_id}}입니다. 툴 호출 시 user_id와 프로필 정보를 함께 넘겨 재추천을 방지하세요.
+사용자의 이름, 나이, 거동/활동 범위, 마음 상태, 사용자 ID는 이어지는 [사용자 정보]를 따르세요.
 
 [In-Context Learning 예시]
 아래 대화 패턴을 참고하여 답변하세요:
@@ -100,32 +100,118 @@ SYSTEM_PROMPT_TEMPLATE = f"""
 - "꼭 ~~해보세요." (X, 숙제/강요)
 """
 
+USER_CONTEXT_TEMPLATE = """[사용자 정보]
+사용자의 이름은 '{user_name}'이며, 나이는 {user_age}입니다.
+거동/활동 범위는 '{user_mobility}'입니다.
+마음 상태는 '{user_emotion}'입니다.
+사용자 ID는 {user_id}입니다. 툴 호출 시 user_id와 프로필 정보를 함께 넘겨 재추천을 방지하세요."""
 
-def empathy_node(state):
-    """감성 대화 모드 에이전트 노드."""
-    logger.info(">>> [Agent Active] Empathy Agent")
+# import 시 한 번만 만들어 매 호출에 같은 객체를 재사용한다.
+STATIC_SYSTEM_MESSAGE = SystemMessage(content=STATIC_SYSTEM_PROMPT)
 
-    profile = state.get("user_profile", {})
-    user_id = state.get("user_id", "")
 
-    display_name = profile.get("name") or "친구"
-    mobility = profile.get("mobility") or profile.get("activity_range") or "거동 정보 없음"
-    emotion = profile.get("emotion") or "기분 정보 없음"
-
-    system_msg = SYSTEM_PROMPT_TEMPLATE.format(
-        user_name=display_name,
+def build_user_context(profile: dict, user_id: str, memory: dict = None) -> str:
+    """사용자별 정보 블록 (정적 프롬프트 뒤에 별도 system 메시지로 붙음)."""
+    context = USER_CONTEXT_TEMPLATE.format(
+        user_name=profile.get("name") or "친구",
         user_age=profile.get("age", "미상"),
-        user_mobility=mobility,
-        user_emotion=emotion,
+        user_mobility=profile.get("mobility") or profile.get("activity_range") or "거동 정보 없음",
+        user_emotion=profile.get("emotion") or "기분 정보 없음",
         user_id=user_id,
     )
+    remembered = render_memory(memory)
+    if remembered:
+        context += f"\n이전 대화에서 알게 된 사실 (다시 묻지 말고 자연스럽게 활용하세요):\n{remembered}"
+    return context
+
+
+def build_messages(profile: dict, user_id: str, conversation: list, memory: dict = None) -> list:
+    """
+    [정적 프롬프트] + [사용자 정보] + 대화 순서로 구성.
+    정적 부분은 모든 사용자가 공유하는 캐시 prefix가 되고, 사용자 정보는 같은 사용자의
+    턴/툴 루프 사이에서 바뀌지 않으므로 그 뒤의 대화 기록까지 prefix로 재사용된다.
+    """
+    return [
+        STATIC_SYSTEM_MESSAGE,
+        SystemMessage(content=build_user_context(profile, user_id, memory)),
+    ] + list(conversation)
+
+
+def check_prefix_stability(profiles=None) -> dict:
+    """
+    서로 다른 사용자에 대해 첫 메시지(정적 prefix)가 바이트 단위로 같은지 확인.
+    python -m chatbot.chatbot_modules.empathy_agent 로 실행.
+    """
+    profiles = profiles or [
+        ("u1", {"name": "김영희", "age": "72", "mobility": "거동 가능", "emotion": "외롭다"}),
+        ("u2", {"name": "", "activity_range": "실내에서만 주로 움직인다", "emotion": "불안하다"}),
+        ("u3", {}),
+    ]
+    prefixes = set()
+    for user_id, profile in profiles:
+        messages = build_messages(profile, user_id, [HumanMessage(content="안녕하세요")])
+        assert messages[0] is STATIC_SYSTEM_MESSAGE
+        assert user_id in messages[1].content and user_id not in messages[0].content
+        prefixes.add(messages[0].content.encode("utf-8"))
+    assert len(prefixes) == 1, "정적 prefix가 사용자마다 다릅니다."
+    assert "{" not in STATIC_SYSTEM_PROMPT, "정적 prefix에 포맷 자리표시자가 남아 있습니다."
+    prefix = prefixes.pop()
+    return {"users": len(profiles), "prefix_bytes": len(prefix), "prefix_chars": len(STATIC_SYSTEM_PROMPT)}
+
+
+def count_tool_rounds(messages) -> int:
+    """마지막 사용자 발화 이후 모델이 툴을 요청한 횟수."""
+    rounds = 0
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            break
+        if isinstance(msg, AIMessage) and msg.tool_calls:
+            rounds += 1
+    return rounds
+
+
+def best_effort_answer(messages) -> str:
+    """데드라인 초과 시 이번 턴에서 확보한 가장 나은 답변."""
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            break
+        if isinstance(msg, AIMessage) and msg.content:
+            return msg.content
+    return DEADLINE_FALLBACK_TEXT
+
+
+def empathy_node(state):
+    """감성 대화 모드 에이전트 노드."""
+    logger.info(">>> [Agent Active] Empathy Agent")
 
-    llm_client = LLMClient()
-    model = llm_client.get_model_with_tools(TOOLS)
+    llm_client = get_llm_client()
+    deadline = state.get("deadline")
+    # 토큰 예산 초과 시 작은 모델/툴 없이 답한다.
+    budget = state.get("budget")
 
+    # 툴 루프 상한 또는 남은 예산 부족 시 툴 없이 답변을 마무리하게 한다.
+    allow_tool_calls = count_tool_rounds(state["messages"]) < MAX_TOOL_ITERATIONS and (
+        deadline is None or deadline.allows_tools()
+    )
 
-    messages = [SystemMessage(content=system_msg)] + state["messages"]
+    messages = build_messages(
+        state.get("user_profile", {}), state.get("user_id", ""), state["messages"], state.get("memory")
+    )
 
-    response = model.invoke(messages)
+    try:
+        response = llm_client.invoke(
+            messages,
+            tools=TOOLS if budget is None or budget.allow_tools else None,
+            deadline=deadline,
+            allow_tool_calls=allow_tool_calls,
+            small_model=bool(budget and budget.use_small_model),
+        )
+    except DeadlineExceeded as e:
+        logger.warning(f"[Empathy Agent] {e}")
+        response = AIMessage(content=best_effort_answer(state["messages"]))
 
     return {"messages": [response]}
+
+
+if __name__ == "__main__":
+    print(check_prefix_stability())
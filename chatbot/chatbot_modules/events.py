@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# 턴 진행 이벤트(토큰/툴 단계)를 받는 콜백. WebSocket 연결이 설정하고, HTTP 요청에서는 None.
+# 스레드풀/LangGraph 실행기가 contextvars를 복사하므로 하위 호출에서도 같은 sink를 본다.
+EventSink = Callable[[Dict[str, Any]], None]
+current_sink: ContextVar[Optional[EventSink]] = ContextVar("current_event_sink", default=None)
+
+
+@contextmanager
+def bind_sink(sink: Optional[EventSink]):
+    token = current_sink.set(sink)
+    try:
+        yield
+    finally:
+        current_sink.reset(token)
+
+
+def emit(event_type: str, **data):
+    """현재 sink가 있으면 이벤트 전달 (없으면 아무것도 하지 않음)."""
+    sink = current_sink.get()
+    if sink is not None:
+        sink({"type": event_type, **data})
+
+
+class ToolEventCallback(BaseCallbackHandler):
+    """툴 시작/종료를 tool_start/tool_end 이벤트로 내보낸다."""
+
+    def __init__(self):
+        self._names: Dict[UUID, str] = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._names[run_id] = name
+        emit("tool_start", tool=name)
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        emit("tool_end", tool=self._names.pop(run_id, "unknown"), ok=True)
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs):
+        emit("tool_end", tool=self._names.pop(run_id, "unknown"), ok=False)
+
+
+def callbacks() -> list:
+    """sink가 있는 턴에서만 툴 이벤트 콜백을 붙인다."""
+    return [ToolEventCallback()] if current_sink.get() is not None else []
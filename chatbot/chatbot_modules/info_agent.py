@@ -1,7 +1,10 @@
 import logging
 from langchain_core.messages import AIMessage, SystemMessage
-from chatbot.chatbot_modules.llm_client import LLMClient
+from chatbot.chatbot_modules.deadline import MAX_TOOL_ITERATIONS, DeadlineExceeded
+from chatbot.chatbot_modules.empathy_agent import best_effort_answer, count_tool_rounds
+from chatbot.chatbot_modules.llm_client import get_llm_client
 from chatbot.chatbot_modules.search_info import TOOLS_INFO
+from chatbot.chatbot_modules.user_memory import build_memory_context
 
 logger = logging.getLogger(__name__)
 
@@ -16,16 +19,17 @@ INFO_MODE_PROMPT = """
 
 1. **시설 검색 (`search_funeral_facilities`) 규칙:**
 - **목적:** 장례식장, 봉안당, 묘지, 화장장 등의 위치를 찾을 때 사용합니다.
-- **복수 지역 허용:** 사용자가 '수도권', '서울 근교', '서울과 수원 사이' 등 넓은 범위를 말하면, 관련된 시/군/구를 추론하여 `regions` 인자에 **리스트 형태**로 **최대3개** 입력하세요.
-    (예: `regions=["안양시", "의왕시", "군포시"]`)
+- **넓은 범위 표현:** 사용자가 '수도권', '서울 근교', '수원 근처', '서울과 수원 사이'처럼 말하면, 주변 시/군/구를 직접 추론하지 말고 그 표현을 **그대로** `region` 인자에 넣으세요. 도구가 인접 지역을 계산합니다.
+    (예: `region="서울과 수원 사이"`, `region="서울 근교"`)
+- **복수 지역:** 사용자가 서로 떨어진 지역 여러 곳을 직접 나열한 경우에만 `regions` 인자에 리스트로 넣으세요. (예: `regions=["경기도 수원시", "대구광역시 수성구"]`)
 - 한 지역 검색: 한 지역을 검색할 경우 region인자에 string타입으로 넣어줘서 지역을 찾습니다. (예: `region ="충남"`)
-- 사용자가 아예 지역을 입력하지 않으면 먼저 정중하게 지역을 확인하세요.
+- 사용자가 아예 지역을 입력하지 않으면 [사용자 정보]의 거주 지역을 사용하고, 그것도 없을 때만 먼저 정중하게 지역을 확인하세요.
 
 2. **조례/지원금 검색 (`search_public_funeral_ordinance`, `search_cremation_subsidy_ordinance`) 규칙:**
 - **목적:** 공영장례 지원이나 화장 장려금 등 지자체 행정 지원을 찾을 때 사용합니다.
 - **단일 지역 필수:** 지원금은 **'고인의 주민등록상 거주지'**가 기준이므로, 반드시 **하나의 명확한 지역명(문자열)**만 `region` 인자에 입력해야 합니다.
 - **모호한 경우:** 만약 사용자가 "수도권의 화장장려금 알려줘"라고 묻는다면, 리스트로 검색하지 말고 **"정확한 안내를 위해 거주하시는 시/군/구를 말씀해 주시겠어요?"**라고 되물어보세요.
-- 사용자가 구체적인 지역을 언급하지 않았다면, 먼저 정중하게 구체적인 지역을 확인하세요.
+- 사용자가 구체적인 지역을 언급하지 않았다면 [사용자 정보]의 거주 지역을 사용하고, 그것도 없을 때만 먼저 정중하게 구체적인 지역을 확인하세요.
                                 
 3.  **디지털 유산 검색 (`search_digital_legacy`) 규칙:**
 - **목적:** 디지털 유산을 찾을 때 사용합니다.
@@ -40,6 +44,8 @@ INFO_MODE_PROMPT = """
 - 검색 결과가 없을 경우, 솔직하게 해당 지역의 정보가 없음을 알리고 인근 지역이나 대안을 제시해 주세요.
 - 항상 따뜻한 위로와 공감의 말을 잊지 마세요.
 """
+# 사용자별 값이 없는 정적 프롬프트라 import 시 한 번만 만들어 재사용 (LLM 측 prefix 캐시 대상)
+INFO_SYSTEM_MESSAGE = SystemMessage(content=INFO_MODE_PROMPT)
 # ==============================================================================
 
 def info_node(state):
@@ -50,12 +56,32 @@ def info_node(state):
 
 
     # Tool 바인딩된 LLM 호출
-    llm_client = LLMClient()
-    model = llm_client.get_model_with_tools(TOOLS_INFO)
+    llm_client = get_llm_client()
+    deadline = state.get("deadline")
+    # 토큰 예산 초과 시 작은 모델/툴 없이 답한다.
+    budget = state.get("budget")
 
-    messages = [SystemMessage(content=INFO_MODE_PROMPT)] + state["messages"]
+    allow_tool_calls = count_tool_rounds(state["messages"]) < MAX_TOOL_ITERATIONS and (
+        deadline is None or deadline.allows_tools()
+    )
 
-    response = model.invoke(messages)
+    messages = [INFO_SYSTEM_MESSAGE]
+    memory_context = build_memory_context(state.get("memory"))
+    if memory_context:
+        messages.append(SystemMessage(content=memory_context))
+    messages += state["messages"]
+
+    try:
+        response = llm_client.invoke(
+            messages,
+            tools=TOOLS_INFO if budget is None or budget.allow_tools else None,
+            deadline=deadline,
+            allow_tool_calls=allow_tool_calls,
+            small_model=bool(budget and budget.use_small_model),
+        )
+    except DeadlineExceeded as e:
+        logger.warning(f"[Info Agent] {e}")
+        response = AIMessage(content=best_effort_answer(state["messages"]))
 
     return {
         "messages": [response]
@@ -0,0 +1,506 @@
+"""
+벡터 인덱스 적재 CLI.
+
+talk-assets(활동/질문 카탈로그)와 funeral-services 네임스페이스(ordinance, funeral_facilities,
+digital_legacy, legacy)를 청킹 → 병렬 임베딩 → 일괄 upsert 한다. 청크별 내용 해시를
+매니페스트에 남겨 바뀐 청크만 다시 임베딩하고, 사라진 청크는 삭제한다.
+
+    python -m chatbot.chatbot_modules.ingest --dry-run
+    python -m chatbot.chatbot_modules.ingest --only activities,questions
+    python -m chatbot.chatbot_modules.ingest --target local --embedder hash   # 테스트용 로컬 인덱스
+
+funeral-services 원문은 --source-dir(기본 data/sources) 아래 네임스페이스별 폴더에 둔다.
+- .txt/.md: 파일 전체를 청킹. ordinance는 ordinance/<type>/<region>.txt 경로에서
+  type(Public_Funeral_Ordinance, Cremation_Subsidy_Ordinance)과 region을 메타데이터로 붙인다.
+- .jsonl/.json: {"text": ..., "metadata": {...}} 레코드 (그 밖의 키도 메타데이터로)
+- .csv: 한 행이 한 레코드 (text 컬럼이 없으면 "컬럼: 값"으로 본문 구성)
+"""
+import os
+import re
+import csv
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .vector_backend import EMBEDDING_BACKEND, VECTOR_BACKEND, batched, make_embeddings, open_index
+
+logger = logging.getLogger(__name__)
+
+_ROOT_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = _ROOT_DIR / "data"
+SOURCE_DIR = Path(os.getenv("INGEST_SOURCE_DIR", str(DATA_DIR / "sources")))
+STATE_DIR = Path(os.getenv("INGEST_STATE_DIR", ".ingest"))
+# recommend_ba / search_info 와 같은 인덱스·모델
+TALK_INDEX_NAME = os.getenv("PINECONE_INDEX", "talk-assets")
+FUNERAL_INDEX_NAME = "funeral-services"
+EMBEDDING_MODEL = os.getenv("PINECONE_EMBED_MODEL", "text-embedding-3-small")
+
+CHUNK_MAX_CHARS = 500  # README 전처리 기준 (청크 최대 500자)
+CHUNK_OVERLAP_CHARS = 50
+EMBED_MAX_ATTEMPTS = 3
+DELETE_BATCH_SIZE = 1000
+TEXT_EXTENSIONS = {".txt", ".md"}
+RELIGION_KEYWORDS = ("천주교", "기독교", "불교", "원불교", "성당", "교회")
+PRIVATE_MARKERS = ("(재)", "재단법인", "(주)", "(사)", "주식회사")
+
+
+class Record(NamedTuple):
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+
+
+# ---------------------------------------------------------------------------
+# Text processing
+# ---------------------------------------------------------------------------
+def clean_text(text: str) -> str:
+    """제어 문자 제거, PDF 줄바꿈으로 끊긴 한글 단어 복원(상속\\n권 → 상속권), 공백 정리."""
+    text = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", text or "")
+    text = re.sub(r"(?<=[가-힣])\n(?=[가-힣])", "", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_MAX_CHARS, overlap: int = CHUNK_OVERLAP_CHARS) -> List[str]:
+    """문단 → 문장 단위로 max_chars 이하 청크를 만든다. 이어지는 청크는 앞 청크 끝 overlap자를 공유."""
+    sentences: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for sentence in re.split(r"(?<=[.!?。])\s+|(?<=다\.)\s*|\n", paragraph):
+            sentence = sentence.strip()
+            while len(sentence) > max_chars:
+                sentences.append(sentence[:max_chars])
+                sentence = sentence[max_chars - overlap :]
+            if sentence:
+                sentences.append(sentence)
+
+    chunks: List[str] = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            current = f"{tail} {sentence}".strip() if len(tail) + 1 + len(sentence) <= max_chars else sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Pinecone 메타데이터 제약(None 불가, 값은 문자열/숫자/불리언/문자열 목록)에 맞춘다."""
+    cleaned = {}
+    for key, value in metadata.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, (str, bool, int, float)):
+            cleaned[key] = value
+        elif isinstance(value, (list, tuple)):
+            cleaned[key] = [str(v) for v in value]
+        else:
+            cleaned[key] = json.dumps(value, ensure_ascii=False)
+    return cleaned
+
+
+def _short_hash(value: str, length: int = 12) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:length]
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+def _read_csv(path: Path) -> List[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _bool(value: Any) -> bool:
+    return str(value).strip().upper() in ("TRUE", "1", "Y", "YES")
+
+
+def activity_records(path: Path = DATA_DIR / "meaningful_activities.csv") -> List[Record]:
+    """recommend_ba.query_activities가 type/ENERGY_REQUIRED로 거르고 activity_kr/FEELING_TAGS를 읽는다."""
+    records = []
+    for row in _read_csv(path):
+        activity_id = _int(row.get("activity_id"), -1)
+        if activity_id < 0 or not row.get("activity_kr"):
+            continue
+        text = f"활동: {row['activity_kr']} / 효과: {row.get('FEELING_TAGS', '')} / 분류: {row.get('category', '')}"
+        metadata = {
+            "type": "activity",
+            "activity_id": activity_id,
+            "activity_kr": row["activity_kr"],
+            "category": row.get("category"),
+            "ENERGY_REQUIRED": _int(row.get("ENERGY_REQUIRED"), 5),
+            "meaning_level": _int(row.get("meaning_level")),
+            "dignity_preserving": _bool(row.get("dignity_preserving")),
+            "requires_help": _bool(row.get("requires_help")),
+            "location": row.get("location"),
+            "FEELING_TAGS": row.get("FEELING_TAGS"),
+        }
+        records.append(Record(f"activity-{activity_id}", text, metadata))
+    return records
+
+
+def question_records(path: Path = DATA_DIR / "empathy_questions.csv") -> List[Record]:
+    """recommend_ba.query_questions가 type으로 거르고 question_text/intent를 읽는다."""
+    records = []
+    for row in _read_csv(path):
+        question_id = _int(row.get("question_id"), -1)
+        if question_id < 0 or not row.get("question_text"):
+            continue
+        text = f"{row['question_text']} / 주제: {row.get('category', '')} / 의도: {row.get('intent', '')}"
+        metadata = {
+            "type": "question",
+            "question_id": question_id,
+            "question_text": row["question_text"],
+            "stage": row.get("stage"),
+            "category": row.get("category"),
+            "intent": row.get("intent"),
+        }
+        records.append(Record(f"question-{question_id}", text, metadata))
+    return records
+
+
+def facility_region(address: str) -> Optional[str]:
+    """주소 앞 두 단어로 지역 추출 ('경기도 성남시분당구 ...' → '경기도 성남시')."""
+    parts = (address or "").split()
+    if len(parts) < 2:
+        return None
+    match = re.match(r"^(.+?[시군])(.+[구])$", parts[1])
+    return f"{parts[0]} {match.group(1) if match else parts[1]}"
+
+
+def enrich_facility(metadata: Dict[str, Any], text: str) -> Tuple[Dict[str, Any], str]:
+    """지역이 없으면 주소에서 채우고, 종교/공·사설 구분을 본문에 덧붙여 유사도 검색에 걸리게 한다."""
+    metadata = dict(metadata)
+    if not metadata.get("region") and metadata.get("address"):
+        metadata["region"] = facility_region(metadata["address"])
+    name = str(metadata.get("name") or "")
+    notes = [f"{kw} 관련 시설" for kw in RELIGION_KEYWORDS if kw in name]
+    if "public" not in metadata:
+        metadata["public"] = not any(marker in name for marker in PRIVATE_MARKERS)
+    notes.append("공설 시설" if metadata["public"] else "사설 시설")
+    return metadata, f"{text} ({', '.join(notes)})"
+
+
+def _file_records(path: Path, rel: str) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    """파일 하나에서 (본문, 메타데이터) 목록."""
+    suffix = path.suffix.lower()
+    if suffix in TEXT_EXTENSIONS:
+        with open(path, "r", encoding="utf-8") as f:
+            yield f.read(), {}
+    elif suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield _split_record(json.loads(line))
+    elif suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data if isinstance(data, list) else [data]:
+            yield _split_record(item)
+    elif suffix == ".csv":
+        for row in _read_csv(path):
+            text = row.get("text") or " / ".join(f"{k}: {v}" for k, v in row.items() if v)
+            yield text, {k: v for k, v in row.items() if k != "text"}
+    else:
+        logger.info(f"[Ingest] 지원하지 않는 파일 건너뜀: {rel}")
+
+
+def _split_record(item: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    item = dict(item)
+    text = item.pop("text", None) or item.pop("page_content", None) or item.pop("content", "")
+    metadata = {**item.pop("metadata", {}), **item}
+    return text, metadata
+
+
+def document_records(namespace: str, source_dir: Path, path_metadata: Tuple[str, ...] = ()) -> List[Record]:
+    """네임스페이스 폴더의 원문을 청킹. path_metadata는 하위 폴더/파일명 순서로 붙일 메타데이터 키."""
+    root = source_dir / namespace
+    if not root.exists():
+        logger.warning(f"[Ingest] 원문 폴더 없음: {root}")
+        return []
+    records = []
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        rel = path.relative_to(root).as_posix()
+        parts = list(path.relative_to(root).parent.parts) + [path.stem]
+        base_meta = {key: value for key, value in zip(path_metadata, parts)}
+        for r_index, (text, metadata) in enumerate(_file_records(path, rel)):
+            metadata = {**base_meta, **metadata}
+            text = clean_text(text)
+            if namespace == "funeral_facilities":
+                metadata, text = enrich_facility(metadata, text)
+            for c_index, chunk in enumerate(chunk_text(text)):
+                chunk_id = f"{namespace}-{_short_hash(rel)}-{r_index}-{c_index}"
+                # PineconeVectorStore는 metadata["text"]를 page_content로 읽는다.
+                records.append(Record(chunk_id, chunk, {**metadata, "source": rel, "text": chunk}))
+    return records
+
+
+@dataclass
+class Spec:
+    """적재 단위: 한 인덱스/네임스페이스에 들어가는 한 종류의 소스."""
+
+    name: str
+    index_name: str
+    namespace: str
+    load: Callable[[Path], List[Record]]
+
+
+SPECS = [
+    Spec("activities", TALK_INDEX_NAME, "", lambda _: activity_records()),
+    Spec("questions", TALK_INDEX_NAME, "", lambda _: question_records()),
+    Spec("ordinance", FUNERAL_INDEX_NAME, "ordinance", lambda d: document_records("ordinance", d, ("type", "region"))),
+    Spec("funeral_facilities", FUNERAL_INDEX_NAME, "funeral_facilities", lambda d: document_records("funeral_facilities", d, ("category",))),
+    Spec("digital_legacy", FUNERAL_INDEX_NAME, "digital_legacy", lambda d: document_records("digital_legacy", d)),
+    Spec("legacy", FUNERAL_INDEX_NAME, "legacy", lambda d: document_records("legacy", d)),
+]
+
+
+# ---------------------------------------------------------------------------
+# Manifest / diff
+# ---------------------------------------------------------------------------
+def content_hash(record: Record, embedding_model: str) -> str:
+    payload = json.dumps(
+        {"text": record.text, "metadata": _clean_metadata(record.metadata), "model": embedding_model},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def manifest_path(target: str, spec: Spec) -> Path:
+    return STATE_DIR / target / f"{spec.index_name}__{spec.name}.json"
+
+
+def load_manifest(path: Path) -> Dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("items", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(path: Path, spec: Spec, items: Dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"index": spec.index_name, "namespace": spec.namespace, "updated_at": time.time(), "items": items},
+            f,
+            ensure_ascii=False,
+            indent=1,
+        )
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class Plan:
+    upsert: List[Tuple[Record, str]] = field(default_factory=list)  # (레코드, 해시)
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    delete: List[str] = field(default_factory=list)
+
+
+def diff(records: List[Record], manifest: Dict[str, str], embedding_model: str) -> Plan:
+    plan = Plan()
+    current_ids = set()
+    for record in records:
+        current_ids.add(record.id)
+        digest = content_hash(record, embedding_model)
+        previous = manifest.get(record.id)
+        if previous == digest:
+            plan.unchanged += 1
+            continue
+        plan.upsert.append((record, digest))
+        if previous is None:
+            plan.new += 1
+        else:
+            plan.changed += 1
+    plan.delete = sorted(set(manifest) - current_ids)
+    return plan
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+def _embed_with_retry(embeddings, texts: List[str]) -> List[List[float]]:
+    for attempt in range(1, EMBED_MAX_ATTEMPTS + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if attempt == EMBED_MAX_ATTEMPTS:
+                raise
+            logger.warning(f"[Ingest] 임베딩 재시도 {attempt}/{EMBED_MAX_ATTEMPTS}: {e}")
+            time.sleep(2 ** attempt)
+    return []
+
+
+def run_spec(
+    spec: Spec,
+    target: str,
+    source_dir: Path,
+    embeddings=None,
+    embedding_model: str = EMBEDDING_MODEL,
+    dry_run: bool = False,
+    force: bool = False,
+    workers: int = 4,
+    batch_size: int = 64,
+) -> Dict[str, Any]:
+    """한 소스를 적재하고 처리량 리포트를 반환."""
+    started = time.perf_counter()
+    records = spec.load(source_dir)
+    path = manifest_path(target, spec)
+    manifest = {} if force else load_manifest(path)
+    plan = diff(records, manifest, embedding_model)
+    report: Dict[str, Any] = {
+        "spec": spec.name,
+        "index": spec.index_name,
+        "namespace": spec.namespace or "(default)",
+        "records": len(records),
+        "new": plan.new,
+        "changed": plan.changed,
+        "unchanged": plan.unchanged,
+        "deleted": len(plan.delete),
+    }
+    if dry_run:
+        report["sample_upserts"] = [r.id for r, _ in plan.upsert[:5]]
+        report["sample_deletes"] = plan.delete[:5]
+        return report
+
+    index = open_index(spec.index_name, target)
+    # 삭제할 id는 index.delete가 성공한 배치만 뺀다 → 실패하면 다음 실행에서 다시 삭제 대상이 된다
+    items = dict(manifest)
+    lock = threading.Lock()
+    timings = {"embed": 0.0, "upsert": 0.0}
+
+    def process(batch: List[Tuple[Record, str]]) -> int:
+        t0 = time.perf_counter()
+        vectors = _embed_with_retry(embeddings, [r.text for r, _ in batch])
+        t1 = time.perf_counter()
+        index.upsert(
+            vectors=[
+                {"id": r.id, "values": v, "metadata": _clean_metadata(r.metadata)} for (r, _), v in zip(batch, vectors)
+            ],
+            namespace=spec.namespace,
+        )
+        t2 = time.perf_counter()
+        with lock:
+            timings["embed"] += t1 - t0
+            timings["upsert"] += t2 - t1
+            # 성공한 배치만 매니페스트에 반영 → 중간에 실패해도 다음 실행은 나머지만 처리
+            items.update({r.id: digest for r, digest in batch})
+        return len(batch)
+
+    embedded, errors = 0, 0
+    try:
+        if plan.upsert:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+                futures = [pool.submit(process, list(b)) for b in batched(plan.upsert, batch_size)]
+                for future in as_completed(futures):
+                    try:
+                        embedded += future.result()
+                    except Exception as e:
+                        errors += 1
+                        logger.error(f"[Ingest] {spec.name} 배치 실패: {e}")
+        for ids in batched(plan.delete, DELETE_BATCH_SIZE):
+            ids = list(ids)
+            try:
+                index.delete(ids=ids, namespace=spec.namespace)
+            except Exception as e:
+                errors += 1
+                logger.error(f"[Ingest] {spec.name} 삭제 배치 실패 ({len(ids)}개): {e}")
+                continue
+            for item_id in ids:
+                items.pop(item_id, None)
+    finally:
+        save_manifest(path, spec, items)
+
+    elapsed = time.perf_counter() - started
+    report.update(
+        {
+            "embedded": embedded,
+            "failed_batches": errors,
+            "chars": sum(len(r.text) for r, _ in plan.upsert),
+            "seconds": round(elapsed, 2),
+            "embed_seconds": round(timings["embed"], 2),
+            "upsert_seconds": round(timings["upsert"], 2),
+            "chunks_per_second": round(embedded / elapsed, 1) if elapsed else 0.0,
+        }
+    )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="벡터 인덱스 적재 (증분)")
+    parser.add_argument("--target", choices=("pinecone", "local"), default=VECTOR_BACKEND)
+    parser.add_argument("--only", help="쉼표로 구분한 소스 이름: " + ",".join(s.name for s in SPECS))
+    parser.add_argument("--source-dir", type=Path, default=SOURCE_DIR)
+    parser.add_argument("--embedder", choices=("openai", "hash"), default=EMBEDDING_BACKEND)
+    parser.add_argument("--dry-run", action="store_true", help="임베딩/업서트 없이 변경 사항만 출력")
+    parser.add_argument("--force", action="store_true", help="매니페스트를 무시하고 전부 다시 임베딩")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    wanted = {name.strip() for name in args.only.split(",")} if args.only else None
+    specs = [s for s in SPECS if wanted is None or s.name in wanted]
+    if wanted and len(specs) != len(wanted):
+        parser.error(f"알 수 없는 소스: {sorted(wanted - {s.name for s in specs})}")
+
+    embeddings = None if args.dry_run else make_embeddings(args.embedder, EMBEDDING_MODEL)
+    embedding_model = "hash" if args.embedder == "hash" else EMBEDDING_MODEL
+    reports = [
+        run_spec(
+            spec,
+            args.target,
+            args.source_dir,
+            embeddings=embeddings,
+            embedding_model=embedding_model,
+            dry_run=args.dry_run,
+            force=args.force,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        )
+        for spec in specs
+    ]
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"대상: {args.target}  임베딩: {embedding_model}{'  (dry-run)' if args.dry_run else ''}")
+    print(f"{'source':<20}{'records':>9}{'new':>6}{'changed':>9}{'same':>7}{'deleted':>9}{'chunks/s':>10}{'embed s':>9}{'upsert s':>10}")
+    for r in reports:
+        print(
+            f"{r['spec']:<20}{r['records']:>9}{r['new']:>6}{r['changed']:>9}{r['unchanged']:>7}{r['deleted']:>9}"
+            f"{r.get('chunks_per_second', '-'):>10}{r.get('embed_seconds', '-'):>9}{r.get('upsert_seconds', '-'):>10}"
+        )
+        if r.get("failed_batches"):
+            print(f"  ! {r['failed_batches']}개 배치 실패 - 다시 실행하면 실패한 청크만 처리합니다")
+    return 1 if any(r.get("failed_batches") for r in reports) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import observe_stage
+from .request_context import bind
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join("sessions", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))  # 하트비트가 이만큼 끊기면 죽은 워커로 보고 재시도
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))  # 끝난 작업 보관 기간
+SQLITE_TIMEOUT_SECONDS = 5.0
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+Handler = Callable[[str, Dict[str, Any]], Any]
+
+
+class JobQueue:
+    """
+    LLM 부가 작업(다이어리, 대화 요약, 사실 추출)용 로컬 영속 작업 큐.
+
+    SQLite 파일 하나에 작업을 저장하고 워커 스레드가 꺼내 실행한다.
+    - 멱등 키: 같은 키로 다시 넣으면 기존 작업 id를 돌려준다.
+    - 재시도: 실패 시 지수 백오프로 JOB_MAX_ATTEMPTS번까지.
+    - 재시작/다중 워커: 꺼내기는 BEGIN IMMEDIATE로 한 워커만 가져가고,
+      실행 중에는 하트비트로 임대(lease_until)를 연장하고, 프로세스가 죽어
+      임대가 끝난 작업은 다시 대기열로 돌린다 (시도 횟수를 다 썼으면 실패 처리).
+    - 완료 기록은 자기 임대(상태 running + 같은 시도 번호)일 때만 반영한다.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH, workers: int = JOB_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._handlers: Dict[str, Handler] = {}
+        self._leases: Dict[str, float] = {}
+        self._local = threading.local()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        # 임포트만으로 파일이 생기지 않도록 DB는 open()/첫 사용 때 만든다 (DedupStore와 같은 방식).
+        self._open_lock = threading.Lock()
+        self._ready = False
+
+    def open(self) -> None:
+        """디렉터리와 테이블을 만들고 이전 버전 DB를 옮긴다 (여러 번 불러도 됨)."""
+        with self._open_lock:
+            if self._ready:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._create_schema(self._raw_connect())
+            self._ready = True
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                idempotency_key TEXT UNIQUE,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                available_at REAL NOT NULL,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_until" not in columns:
+            # 이전 버전 DB (임대 만료를 updated_at으로만 판단하던 때)
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.open()
+        return self._raw_connect()
+
+    def _raw_connect(self) -> sqlite3.Connection:
+        # 스레드마다 연결 하나 (sqlite3 연결은 스레드 간 공유 불가)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT_SECONDS, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def register(self, kind: str, lease_seconds: Optional[float] = None):
+        """
+        @job_queue.register("diary") 형태로 작업 처리기 등록. 처리기는 (user_id, payload) -> 결과.
+        lease_seconds: 이 종류의 임대 시간 (기본 JOB_LEASE_SECONDS).
+        """
+
+        def decorator(fn: Handler) -> Handler:
+            self._handlers[kind] = fn
+            if lease_seconds is not None:
+                self._leases[kind] = lease_seconds
+            return fn
+
+        return decorator
+
+    def enqueue(
+        self,
+        kind: str,
+        user_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ) -> str:
+        """작업 등록 후 id 반환. 같은 멱등 키의 작업이 이미 있으면 그 id."""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO jobs
+                (id, kind, user_id, payload, idempotency_key, status, max_attempts, available_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (job_id, kind, user_id, json.dumps(payload or {}, ensure_ascii=False), idempotency_key,
+             QUEUED, max_attempts, now, now, now),
+        )
+        if cur.rowcount == 0:
+            row = conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            return row["id"]
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """종류/상태별 작업 수 (대기열 깊이 지표)."""
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in self._connect().execute("SELECT kind, status, COUNT(*) AS n FROM jobs GROUP BY kind, status"):
+            counts.setdefault(row["kind"], {})[row["status"]] = row["n"]
+        return counts
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """워커 스레드 시작 (여러 번 호출해도 한 번만)."""
+        with self._start_lock:
+            if self._threads:
+                return
+            self.open()
+            self._stop.clear()
+            self.purge_finished()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"[Jobs] 워커 {self.workers}개 시작 ({self.path})")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _lease_for(self, kind: str) -> float:
+        return self._leases.get(kind, JOB_LEASE_SECONDS)
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 임대가 끝난 실행 중 작업(죽은 워커): 시도가 남았으면 대기열로, 다 썼으면 실패.
+            # lease_until이 없는 행은 이전 버전이 남긴 것이라 updated_at 기준으로 본다.
+            expired = "status = ? AND COALESCE(lease_until, updated_at + ?) < ?"
+            conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated_at = ? "
+                f"WHERE {expired} AND attempts >= max_attempts",
+                (FAILED, "임대 만료 (워커 중단)", now, RUNNING, JOB_LEASE_SECONDS, now),
+            )
+            conn.execute(
+                f"UPDATE jobs SET status = ?, lease_until = NULL, updated_at = ? WHERE {expired}",
+                (QUEUED, now, RUNNING, JOB_LEASE_SECONDS, now),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND available_at <= ? ORDER BY available_at LIMIT 1",
+                (QUEUED, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, now + self._lease_for(row["kind"]), now, row["id"]),
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @contextmanager
+    def _heartbeat(self, row: sqlite3.Row):
+        """처리기가 도는 동안 임대의 1/3마다 lease_until을 연장한다."""
+        lease = self._lease_for(row["kind"])
+        attempts = row["attempts"] + 1
+        stop = threading.Event()
+
+        def beat() -> None:
+            while not stop.wait(lease / 3):
+                now = time.time()
+                try:
+                    self._connect().execute(
+                        "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                        (now + lease, now, row["id"], RUNNING, attempts),
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"[Jobs] 하트비트 실패 {row['id']}: {e}")
+
+        thread = threading.Thread(target=beat, name=f"job-heartbeat-{row['id'][:8]}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _finish(self, row: sqlite3.Row, result: Any = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        attempts = row["attempts"] + 1
+        # 임대를 잃은 뒤(다른 워커가 다시 가져감) 늦게 끝난 실행은 기록하지 않는다.
+        owned = "WHERE id = ? AND status = ? AND attempts = ?"
+        if error is None:
+            cur = self._connect().execute(
+                f"UPDATE jobs SET status = ?, result = ?, error = NULL, lease_until = NULL, updated_at = ? {owned}",
+                (DONE, json.dumps(result, ensure_ascii=False), now, row["id"], RUNNING, attempts),
+            )
+        elif attempts < row["max_attempts"]:
+            delay = JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            cur = self._connect().execute(
+                f"UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_until = NULL, updated_at = ? {owned}",
+                (QUEUED, error, now + delay, now, row["id"], RUNNING, attempts),
+            )
+        else:
+            cur = self._connect().execute(
+                f"UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated_at = ? {owned}",
+                (FAILED, error, now, row["id"], RUNNING, attempts),
+            )
+        if cur.rowcount == 0:
+            logger.warning(f"[Jobs] {row['kind']} {row['id']} 임대를 잃어 결과를 버림 (시도 {attempts})")
+
+    def run_once(self) -> bool:
+        """대기 중인 작업 하나를 실행. 실행할 작업이 없으면 False."""
+        row = self._claim()
+        if row is None:
+            return False
+        kind, user_id = row["kind"], row["user_id"]
+        handler = self._handlers.get(kind)
+        if handler is None:
+            self._finish(row, error=f"처리기 없음: {kind}")
+            return True
+        try:
+            with bind(user_id=user_id, mode="job", node=kind), observe_stage(f"job:{kind}"), tracing.trace(
+                f"job-{row['id'][:12]}", f"job:{kind}", user_id=user_id
+            ), self._heartbeat(row):
+                result = handler(user_id, json.loads(row["payload"]))
+        except Exception as e:
+            logger.warning(f"[Jobs] {kind} 실패 (user={user_id}, 시도 {row['attempts'] + 1}/{row['max_attempts']}): {e}")
+            self._finish(row, error=str(e))
+        else:
+            self._finish(row, result=result)
+        return True
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"[Jobs] 워커 오류: {e}")
+            self._wakeup.wait(JOB_POLL_SECONDS)
+            self._wakeup.clear()
+
+    def purge_finished(self, older_than_days: float = JOB_RETENTION_DAYS) -> int:
+        cutoff = time.time() - older_than_days * 86400
+        cur = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+        )
+        return cur.rowcount
+
+
+job_queue = JobQueue()
@@ -0,0 +1,118 @@
+import os
+import re
+import logging
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_ROOT_DIR = Path(__file__).resolve().parents[2]  # 리포지토리 루트
+STOPWORDS_PATH = os.getenv("KEYWORD_STOPWORDS_PATH", str(_ROOT_DIR / "data" / "keyword_stopwords.txt"))
+KEYWORD_DECAY = float(os.getenv("KEYWORD_DECAY", "0.8"))  # 사용자 발화 한 번마다 기존 점수에 곱하는 값
+MAX_TERMS = int(os.getenv("KEYWORD_MAX_TERMS", "40"))  # 세션에 보관하는 단어 수
+TOP_SIZE = 10  # 미리 정렬해 두는 상위 키워드 수
+
+# 긴 것부터 떼어낸다 (예: '에서는' 이 '는' 보다 먼저). 남는 어간이 2글자 이상일 때만 제거.
+JOSA_SUFFIXES = sorted(
+    [
+        "이었어요", "였어요", "이에요", "예요", "에서는", "에게서", "으로는", "이라고", "이랑은",
+        "했어요", "해서요", "했는데", "하고요", "이라서", "라서",
+        "에서", "에게", "한테", "께서", "으로", "이랑", "하고", "처럼", "보다", "까지", "부터",
+        "라고", "이나", "이며", "이고", "에는", "에도", "과는", "와는", "이요", "했어", "해요", "네요",
+        "은", "는", "이", "가", "을", "를", "에", "의", "도", "만", "와", "과", "로", "랑", "요",
+    ],
+    key=len,
+    reverse=True,
+)
+_TOKEN_RE = re.compile(r"[가-힣A-Za-z]+")
+
+_stopwords: Optional[FrozenSet[str]] = None
+
+
+def load_stopwords() -> FrozenSet[str]:
+    """불용어 파일을 한 번만 읽는다 (# 주석, 빈 줄 무시)."""
+    global _stopwords
+    if _stopwords is None:
+        try:
+            with open(STOPWORDS_PATH, "r", encoding="utf-8") as f:
+                _stopwords = frozenset(
+                    line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")
+                )
+        except OSError as e:
+            logger.warning(f"[Keywords] 불용어 파일을 읽지 못했습니다({STOPWORDS_PATH}): {e}")
+            _stopwords = frozenset()
+    return _stopwords
+
+
+def strip_josa(token: str) -> str:
+    """'가족이', '가족을' → '가족'."""
+    for suffix in JOSA_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """조사를 떼어낸 키워드 후보 목록 (2글자 미만, 불용어 제외)."""
+    stopwords = load_stopwords()
+    tokens = []
+    for raw in _TOKEN_RE.findall(text or ""):
+        if raw in stopwords:
+            continue
+        token = strip_josa(raw)
+        if len(token) < 2 or token in stopwords:
+            continue
+        tokens.append(token)
+    return tokens
+
+
+def _score(entry: List[float], turn: int) -> float:
+    """[점수, 마지막 갱신 턴] → 현재 턴 기준 감쇠 점수."""
+    return entry[0] * KEYWORD_DECAY ** (turn - entry[1])
+
+
+def update_stats(stats: Optional[Dict[str, Any]], text: str) -> Dict[str, Any]:
+    """
+    사용자 발화 하나를 반영한 새 키워드 통계를 반환 (입력은 바꾸지 않음).
+    형식: {"turn": n, "terms": {단어: [점수, 마지막 턴]}, "top": [상위 단어...]}
+    점수는 읽을 때 감쇠를 적용하므로 갱신은 이번 발화의 단어 수만큼만 일한다.
+    """
+    stats = stats or {}
+    turn = stats.get("turn", 0) + 1
+    terms = {word: list(entry) for word, entry in stats.get("terms", {}).items()}
+    for token in tokenize(text):
+        entry = terms.get(token)
+        score = _score(entry, turn) if entry else 0.0
+        terms[token] = [round(score + 1.0, 4), turn]
+
+    ranked = sorted(terms, key=lambda w: _score(terms[w], turn), reverse=True)
+    if len(ranked) > MAX_TERMS:
+        terms = {w: terms[w] for w in ranked[:MAX_TERMS]}
+    return {"turn": turn, "terms": terms, "top": ranked[:TOP_SIZE]}
+
+
+def top_keywords(stats: Optional[Dict[str, Any]], limit: int = 5, text: Optional[str] = None) -> List[str]:
+    """
+    미리 정렬된 상위 목록에서 limit개를 읽는다.
+    text(이번 발화)가 있으면 아직 반영 전인 그 단어들을 한 번 더 관측한 것으로 보고 합친다.
+    """
+    stats = stats or {}
+    top = stats.get("top", [])
+    if not text:
+        return top[:limit]
+    turn = stats.get("turn", 0)
+    terms = stats.get("terms", {})
+    scores = {word: _score(terms[word], turn) * KEYWORD_DECAY for word in top[: limit * 2] if word in terms}
+    for token in tokenize(text):
+        if token not in scores:
+            scores[token] = _score(terms[token], turn) * KEYWORD_DECAY if token in terms else 0.0
+        scores[token] += 1.0
+    return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+def keywords_from_messages(messages: Optional[List[str]], limit: int = 5) -> List[str]:
+    """세션 통계가 없을 때(첫 대화 등) 최근 발화로 바로 계산."""
+    stats = None
+    for message in (messages or [])[-5:]:
+        stats = update_stats(stats, message)
+    return top_keywords(stats, limit)
@@ -1,20 +1,92 @@
 import os
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
 from dotenv import load_dotenv
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, message_chunk_to_message
+
+from .deadline import HEDGE_DELAY_SECONDS, DeadlineExceeded, TurnDeadline
+from .resilience import guarded_call
+from . import events, tracing
+from .token_ledger import ledger
 
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 model_name = "gpt-4o"
+# 헤지 요청에 사용할 더 빠른 보조 모델 (빈 값이면 헤지 비활성화)
+fallback_model_name = os.getenv("FALLBACK_MODEL", "gpt-4o-mini")
+
+logger = logging.getLogger(__name__)
+
+# 헤지/데드라인 호출용 공용 스레드 풀
+_invoke_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm")
+
+
+class _StreamGate:
+    """헤지로 두 모델이 동시에 스트리밍할 때 먼저 토큰을 낸 쪽만 sink로 흘려보낸다."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.owner = None
+        self._lock = threading.Lock()
+
+    def emit(self, owner: str, text: str):
+        with self._lock:
+            if self.owner is None:
+                self.owner = owner
+            elif self.owner != owner:
+                return
+        self.sink({"type": "token", "text": text})
+
+
+def _stream_model(model, messages: list, owner: str, gate: _StreamGate):
+    full = None
+    for chunk in model.stream(messages):
+        full = chunk if full is None else full + chunk
+        if isinstance(chunk.content, str) and chunk.content:
+            gate.emit(owner, chunk.content)
+    return message_chunk_to_message(full)
+
+
+def _call_model(dependency_name: str, model, messages: list, gate: Optional[_StreamGate] = None):
+    """차단기/격벽을 거친 모델 호출 1회. 트레이스와 토큰 원장에 사용량을 남긴다."""
+    with tracing.span(dependency_name, messages=len(messages), streamed=gate is not None) as span:
+        started = time.perf_counter()
+        if gate is not None:
+            response = guarded_call(dependency_name, _stream_model, model, messages, dependency_name, gate)
+        else:
+            response = guarded_call(dependency_name, model.invoke, messages)
+        ledger.record(dependency_name.split(":", 1)[-1], messages, response, time.perf_counter() - started)
+        usage = getattr(response, "usage_metadata", None) or {}
+        span.set(
+            prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0),
+            tool_calls=[c.get("name") for c in getattr(response, "tool_calls", None) or []],
+        )
+        return response
 
 
 class LLMClient:
     """Wrapper around LangChain ChatOpenAI for tool and plain chat."""
 
-    def __init__(self, model_name: str = model_name):
+    def __init__(self, model_name: str = model_name, fallback_model_name: str = fallback_model_name):
+        from langchain_openai import ChatOpenAI  # 첫 클라이언트 생성 시 import (서버 기동 시간 단축)
+
         self.model_name = model_name
-        self.chat_model = ChatOpenAI(api_key=api_key, model=model_name, temperature=0.7)
+        # stream_usage: 스트리밍(WebSocket) 응답에서도 토큰 사용량을 받는다.
+        self.chat_model = ChatOpenAI(api_key=api_key, model=model_name, temperature=0.7, stream_usage=True)
+        self.fallback_model = None
+        self.fallback_model_name = None
+        if fallback_model_name and fallback_model_name != model_name:
+            self.fallback_model_name = fallback_model_name
+            self.fallback_model = ChatOpenAI(
+                api_key=api_key, model=fallback_model_name, temperature=0.7, stream_usage=True
+            )
 
     def get_model_with_tools(self, tools: list):
         """Model instance with tool bindings enabled."""
@@ -24,11 +96,94 @@ class LLMClient:
         """Base chat model without tool bindings."""
         return self.chat_model
 
+    def invoke(
+        self,
+        messages: list,
+        tools: Optional[list] = None,
+        deadline: Optional[TurnDeadline] = None,
+        hedge_delay: float = HEDGE_DELAY_SECONDS,
+        allow_tool_calls: bool = True,
+        small_model: bool = False,
+    ):
+        """
+        데드라인 안에서 모델을 호출한다.
+        주 모델이 hedge_delay 안에 응답하지 않으면 보조 모델로 같은 요청을 보내고
+        먼저 도착한 응답을 사용한다. 주 모델이 실패하거나 차단기가 열려 있으면 바로 보조 모델로 넘긴다.
+        예산 안에 응답이 없으면 DeadlineExceeded.
+        allow_tool_calls=False면 툴 스키마는 유지하되 tool_choice="none"으로 답변만 받는다.
+        small_model=True면 (토큰 예산 초과 시) 보조 모델을 주 모델로 쓰고 헤지하지 않는다.
+        이벤트 sink가 설정된 턴(WebSocket)에서는 스트리밍으로 호출해 토큰을 바로 내보낸다.
+        """
+        sink = events.current_sink.get()
+        gate = _StreamGate(sink) if sink is not None else None
+        model, name = self.chat_model, self.model_name
+        hedge = self.fallback_model is not None
+        if small_model and self.fallback_model is not None:
+            model, name = self.fallback_model, self.fallback_model_name
+            hedge = False
+        primary = self._bind(model, tools, allow_tool_calls)
+        if deadline is None and not hedge:
+            return _call_model(f"llm:{name}", primary, messages, gate)
+
+        futures = [self._submit(f"llm:{name}", primary, messages, gate)]
+        timeout = deadline.remaining() if deadline else None
+
+        if hedge and (timeout is None or hedge_delay < timeout):
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done or futures[0].exception() is not None:
+                logger.info(f"[LLM] {name} 응답 지연/실패 → 보조 모델 헤지 요청")
+                tracing.event("llm_hedge", primary=name, fallback=self.fallback_model_name)
+                fallback = self._bind(self.fallback_model, tools, allow_tool_calls)
+                futures.append(self._submit(f"llm:{self.fallback_model_name}", fallback, messages, gate))
+
+        pending = set(futures)
+        last_error: Optional[BaseException] = None
+        while pending:
+            timeout = deadline.remaining() if deadline else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+        if last_error is not None and not pending:
+            raise last_error
+        raise DeadlineExceeded(f"LLM 응답이 턴 예산({deadline.budget_seconds}s)을 초과했습니다.")
+
+    @staticmethod
+    def _bind(model, tools: Optional[list], allow_tool_calls: bool):
+        if not tools:
+            return model
+        if allow_tool_calls:
+            return model.bind_tools(tools)
+        return model.bind_tools(tools, tool_choice="none")
+
+    @staticmethod
+    def _submit(dependency_name: str, model, messages, gate: Optional[_StreamGate] = None):
+        # 호출 스레드의 contextvars(요청 컨텍스트)를 그대로 넘긴다.
+        ctx = contextvars.copy_context()
+        return _invoke_executor.submit(ctx.run, _call_model, dependency_name, model, messages, gate)
+
     def generate_text(self, system_prompt: str, user_prompt: str) -> str:
         """Simple text generation helper (used for diary summarization)."""
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_prompt),
         ]
-        response = self.chat_model.invoke(messages)
+        response = _call_model(f"llm:{self.model_name}", self.chat_model, messages)
         return response.content
+
+
+_shared_client: Optional[LLMClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """프로세스 공용 LLMClient. ChatOpenAI(주/보조 모델)마다 HTTP 연결 풀이 있어 호출마다 새로 만들지 않는다."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = LLMClient()
+    return _shared_client
@@ -0,0 +1,218 @@
+import os
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .request_context import current_mode
+
+logger = logging.getLogger(__name__)
+
+# 0/false면 기록을 모두 건너뛰고 /api/metrics도 비활성화
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# 파일 I/O(ms)부터 LLM 왕복(수십 초)까지 덮는 버킷
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+_NULL = nullcontext()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # key -> [버킷별 카운트..., 합계, 개수]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[float, int]]:
+        """라벨별 (합계, 개수). 벤치마크가 구간 전후 차이로 단계별 시간을 구할 때 사용."""
+        with self._lock:
+            return {key: (series[-2], int(series[-1])) for key, series in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative:g}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]:g}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]:g}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Metric definitions
+# ---------------------------------------------------------------------------
+STAGE_SECONDS = Histogram(
+    "lifeclover_stage_seconds",
+    "Latency of request stages (session I/O, profile sync, graph nodes).",
+    ("stage", "mode"),
+)
+TOOL_SECONDS = Histogram("lifeclover_tool_seconds", "Latency of tool executions.", ("tool", "mode"))
+DEPENDENCY_SECONDS = Histogram(
+    "lifeclover_dependency_seconds",
+    "Latency of external calls (llm:<model>, embeddings, pinecone:<namespace>).",
+    ("dependency", "mode"),
+)
+# turn: first_warm / first_cold (로그인 후 첫 턴, 워밍업 여부) / steady
+TURN_SECONDS = Histogram("lifeclover_turn_seconds", "End-to-end latency of one chat turn.", ("mode", "turn"))
+ERRORS = Counter("lifeclover_errors_total", "Failed stages, tools and dependency calls.", ("kind", "name", "mode"))
+
+_METRICS = [STAGE_SECONDS, TOOL_SECONDS, DEPENDENCY_SECONDS, TURN_SECONDS, ERRORS]
+# 렌더링 시점에 값을 읽어오는 수집기: () -> [(name, help, {labels}, value[, type])]
+# type은 "gauge"(기본) 또는 누적값이면 "counter".
+Sample = Tuple[Any, ...]
+_collectors: List[Callable[[], Iterable[Sample]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[Sample]]):
+    """스크랩 시점에 호출되는 게이지/카운터 수집기 등록 (대기열 깊이, 차단기 상태 등)."""
+    _collectors.append(collector)
+
+
+@contextmanager
+def _timed(histogram: Histogram, kind: str, label: str, name: str):
+    started = time.perf_counter()
+    mode = current_mode.get()
+    try:
+        yield
+    except BaseException:
+        ERRORS.inc(kind=kind, name=name, mode=mode)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, **{label: name, "mode": mode})
+
+
+def observe_stage(stage: str):
+    """with observe_stage("session_load"): ... 형태로 단계 지연 기록."""
+    if not METRICS_ENABLED:
+        return _NULL
+    return _timed(STAGE_SECONDS, "stage", "stage", stage)
+
+
+def observe_dependency(dependency: str):
+    if not METRICS_ENABLED:
+        return _NULL
+    return _timed(DEPENDENCY_SECONDS, "dependency", "dependency", dependency)
+
+
+def observe_turn(mode: str, seconds: float, turn: str = "steady"):
+    if METRICS_ENABLED:
+        TURN_SECONDS.observe(seconds, mode=mode, turn=turn)
+
+
+def render() -> str:
+    """Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    # 한 메트릭의 샘플은 연속해야 하므로(Prometheus/OpenMetrics) 이름별로 모아서 쓴다.
+    families: Dict[str, List[str]] = {}
+    for collector in _collectors:
+        try:
+            samples = list(collector())
+        except Exception as e:
+            logger.warning(f"metrics collector 실패: {e}")
+            continue
+        for name, help_text, labels, value, *rest in samples:
+            if name not in families:
+                families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {rest[0] if rest else 'gauge'}"]
+            label_str = _format_labels(tuple(labels), tuple(labels.values()))
+            families[name].append(f"{name}{label_str} {value:g}")
+    for family in families.values():
+        lines.extend(family)
+    return "\n".join(lines) + "\n"
+
+
+class ToolMetricsCallback(BaseCallbackHandler):
+    """LangChain 콜백으로 툴 실행 시간을 툴 이름별로 기록 (ToolNode/수동 툴 호출 공용)."""
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[str, str, float]] = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._started[run_id] = (name, current_mode.get(), time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            name, mode, t0 = started
+            TOOL_SECONDS.observe(time.perf_counter() - t0, tool=name, mode=mode)
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            name, mode, t0 = started
+            TOOL_SECONDS.observe(time.perf_counter() - t0, tool=name, mode=mode)
+            ERRORS.inc(kind="tool", name=name, mode=mode)
+
+
+def callbacks() -> list:
+    """LangChain/LangGraph config["callbacks"]에 넣을 핸들러 목록."""
+    return [ToolMetricsCallback()] if METRICS_ENABLED else []
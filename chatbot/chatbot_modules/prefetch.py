@@ -0,0 +1,126 @@
+import os
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .diagnostics import register_cache
+
+logger = logging.getLogger(__name__)
+
+# 로그인 워밍업처럼 턴 밖에서 띄운 선행 검색을 보관하는 최대 시간
+PREFETCH_MAX_AGE_SECONDS = float(os.getenv("PREFETCH_MAX_AGE_SECONDS", "600"))
+
+
+class ToolPrefetcher:
+    """
+    툴 검색 결과를 LLM 호출과 병렬로 미리 가져오는 투기적 실행기.
+
+    엔진이 턴 시작 시 schedule()로 예상 검색을 띄워 두고, 툴은 claim()으로
+    같은 키의 결과가 있으면 재사용한다. 턴 종료 시 finish_turn()이
+    쓰이지 않은 결과를 낭비(wasted)로 집계한다.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[Hashable, Tuple[Future, float]]] = {}
+        self._stats = {
+            "scheduled": 0,
+            "hits": 0,
+            "misses": 0,
+            "wasted": 0,
+            "wasted_seconds": 0.0,
+            "errors": 0,
+        }
+
+    @staticmethod
+    def _timed(fn: Callable[..., Any], *args) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - started
+
+    def schedule(self, user_id: str, key: Hashable, fn: Callable[..., Any], *args) -> None:
+        """키에 해당하는 검색을 백그라운드에서 시작 (이미 있으면 무시)."""
+        with self._lock:
+            slots = self._pending.setdefault(user_id, {})
+            if key in slots:
+                return
+            # 요청 컨텍스트(모드/사용자)를 선행 검색 스레드로 넘긴다.
+            ctx = contextvars.copy_context()
+            slots[key] = (self._executor.submit(ctx.run, self._timed, fn, *args), time.monotonic())
+            self._stats["scheduled"] += 1
+
+    def claim(self, user_id: str, key: Hashable, timeout: Optional[float] = None) -> Optional[Any]:
+        """미리 가져온 결과를 꺼낸다. 없거나 실패했으면 None (툴이 직접 검색)."""
+        with self._lock:
+            entry = self._pending.get(user_id, {}).pop(key, None)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+        future = entry[0]
+        try:
+            result, _ = future.result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"[Prefetch] 결과 사용 실패({key}): {e}")
+            with self._lock:
+                self._stats["errors"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return result
+
+    def finish_turn(self, user_id: str) -> None:
+        """턴 종료 시 사용되지 않은 선행 검색을 정리하고 낭비로 기록."""
+        with self._lock:
+            leftovers = self._pending.pop(user_id, {})
+        self._discard(user_id, leftovers)
+
+    def sweep(self, max_age: float = PREFETCH_MAX_AGE_SECONDS) -> None:
+        """턴이 오지 않아 오래 남은 선행 검색(예: 로그인 후 대화 없음)을 정리."""
+        cutoff = time.monotonic() - max_age
+        expired: Dict[str, Dict[Hashable, Tuple[Future, float]]] = {}
+        with self._lock:
+            for user_id, slots in list(self._pending.items()):
+                stale = {k: v for k, v in slots.items() if v[1] < cutoff}
+                for key in stale:
+                    del slots[key]
+                if not slots:
+                    del self._pending[user_id]
+                if stale:
+                    expired[user_id] = stale
+        for user_id, stale in expired.items():
+            self._discard(user_id, stale)
+
+    def _discard(self, user_id: str, leftovers: Dict[Hashable, Tuple[Future, float]]) -> None:
+        if not leftovers:
+            return
+        wasted_seconds = 0.0
+        for future, _ in leftovers.values():
+            if future.cancel():
+                continue
+            if future.done() and future.exception() is None:
+                wasted_seconds += future.result()[1]
+        with self._lock:
+            self._stats["wasted"] += len(leftovers)
+            self._stats["wasted_seconds"] += wasted_seconds
+        logger.info(f"[Prefetch] user={user_id} 미사용 {len(leftovers)}건 ({wasted_seconds:.2f}s)")
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(slots) for slots in self._pending.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """히트/미스/낭비 통계 (정책 튜닝용)."""
+        with self._lock:
+            stats = dict(self._stats)
+        claimed = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / claimed, 3) if claimed else 0.0
+        return stats
+
+
+prefetcher = ToolPrefetcher()
+# 메모리 경보 때는 나이와 상관없이 대기 중인 선행 검색을 모두 버린다 (툴이 직접 검색하게 될 뿐)
+register_cache("prefetch_pending", prefetcher.pending_count, lambda: prefetcher.sweep(max_age=0))
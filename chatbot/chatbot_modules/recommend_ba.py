@@ -1,13 +1,19 @@
 import os
 import json
 import logging
+import threading
 from pathlib import Path
-from collections import defaultdict, Counter
-from typing import Dict, Set
+from typing import Set
 
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.tools import tool
-from pinecone import Pinecone
+
+from .dedup_store import ACTIVITY_CATALOG, QUESTION_CATALOG, dedup_store
+from .keywords import keywords_from_messages, top_keywords
+from .prefetch import prefetcher
+from .resilience import DependencyUnavailable, guarded_call
+from .session_manager import SessionManager
+from .vector_backend import VECTOR_BACKEND, local_index, make_embeddings
+from . import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -32,17 +38,27 @@ RULE_CANDIDATES = [
     _PKG_DIR / "../data/conversation_rules.json",
     _ROOT_DIR / "data" / "conversation_rules.json",  # 루트/data 기본 경로
 ]
-for candidate in RULE_CANDIDATES:
-    try:
-        if candidate.exists():
-            with open(candidate, "r", encoding="utf-8") as f:
-                RULES = json.load(f)
-                logger.info(f"conversation_rules.json loaded from {candidate}")
-                break
-    except Exception as e:
-        logger.warning(f"conversation_rules.json load failed at {candidate}: {e}")
-if not RULES:
-    logger.warning("conversation_rules.json을 찾지 못했습니다. 기본 매핑 없이 진행합니다.")
+_rules_loaded = False
+
+
+def load_rules():
+    """기동 단계(startup)에서 한 번 로드. 그 전에 매핑이 필요하면 그때 로드."""
+    global _rules_loaded
+    if _rules_loaded:
+        return
+    for candidate in RULE_CANDIDATES:
+        try:
+            if candidate.exists():
+                with open(candidate, "r", encoding="utf-8") as f:
+                    RULES.update(json.load(f))
+                    logger.info(f"conversation_rules.json loaded from {candidate}")
+                    break
+        except Exception as e:
+            logger.warning(f"conversation_rules.json load failed at {candidate}: {e}")
+    if not RULES:
+        logger.warning("conversation_rules.json을 찾지 못했습니다. 기본 매핑 없이 진행합니다.")
+    _rules_loaded = True
+
 
 # ---------------------------------------------------------------------------
 # Pinecone / Embeddings (lazy init)
@@ -51,10 +67,7 @@ pc = None
 index = None
 embeddings = None
 _pinecone_init_attempted = False
-
-# user-level dedup caches
-_recommended_activities_by_user: Dict[str, Set[str]] = defaultdict(set)
-_asked_questions_by_user: Dict[str, Set[str]] = defaultdict(set)
+_init_lock = threading.Lock()
 
 
 def _ensure_clients():
@@ -62,13 +75,33 @@ def _ensure_clients():
     global pc, index, embeddings, _pinecone_init_attempted
     if _pinecone_init_attempted:
         return
-    _pinecone_init_attempted = True
+    # 선행 검색 스레드와 툴 스레드가 동시에 초기화하지 않도록 잠근다.
+    with _init_lock:
+        if _pinecone_init_attempted:
+            return
+        _init_pinecone()
+        _pinecone_init_attempted = True
+
+
+def _init_pinecone():
+    global pc, index, embeddings
+
+    if VECTOR_BACKEND == "local":
+        # 인제스트 CLI가 만든 로컬 인덱스 (테스트/오프라인)
+        index = local_index(INDEX_NAME)
+        embeddings = make_embeddings(model=EMBEDDING_MODEL)
+        logger.info(f"로컬 벡터 인덱스 사용: {index.path}")
+        return
 
     if not PINECONE_API_KEY:
         logger.warning("Pinecone 비활성화: PINECONE_API_KEY 미설정")
         return
 
     try:
+        # 벤더 SDK는 첫 사용 시 import (서버 기동 시간 단축)
+        from pinecone import Pinecone
+        from langchain_openai import OpenAIEmbeddings
+
         pc = Pinecone(api_key=PINECONE_API_KEY)
         if PINECONE_HOST:
             index_host = PINECONE_HOST
@@ -88,57 +121,143 @@ def _ensure_clients():
 
 
 # ---------------------------------------------------------------------------
-# Tools
+# Retrieval helpers (툴과 선행 검색이 공유)
 # ---------------------------------------------------------------------------
-@tool
-def recommend_activities_tool(
-    user_emotion: str,
-    mobility_status: str = "거동 가능",
-    user_id: str = "",
-) -> str:
-    """
-    사용자의 감정(B1)과 거동/활동 범위(A2/A4)를 기반으로 '의미 있는 활동'을 추천합니다.
-    동일 활동을 반복 추천하지 않습니다.
-    """
-    _ensure_clients()
-    if not index or not embeddings:
-        return "DB 연결 오류"
+MAX_QUESTION_DEPTH = 3
+_sessions = SessionManager()
+SEARCH_UNAVAILABLE_TEXT = "검색 서비스 연결이 잠시 원활하지 않습니다. 검색 없이 대화를 이어가 주세요."
 
+
+def activity_prefetch_key(user_emotion: str, mobility_status: str) -> tuple:
+    """감정/거동 상태를 (태그, 에너지 상한) 검색 키로 변환."""
+    load_rules()
     mappings = RULES.get("mappings", {})
 
     target_tags = []
     for key, tags in mappings.get("emotion_to_feeling_tags", {}).items():
-        if key in user_emotion:
+        if key in (user_emotion or ""):
             target_tags.extend(tags)
     if not target_tags:
         target_tags = ["평온/이완"]
 
     energy_limit = 5
     for key, val in mappings.get("mobility_to_energy_range", {}).items():
-        if key in mobility_status:
+        if key in (mobility_status or ""):
             energy_limit = val.get("max_energy", 5)
 
+    return ("activities", tuple(target_tags), energy_limit)
+
+
+def query_activities(target_tags: tuple, energy_limit: int) -> list:
+    """활동 벡터 검색 (dedup 이전의 원본 매치 목록)."""
+    _ensure_clients()
+    if not index or not embeddings:
+        return []
     query = f"효과: {', '.join(target_tags)} 인 활동"
-    vec = embeddings.embed_query(query)
+    search_filter = {"type": {"$eq": "activity"}, "ENERGY_REQUIRED": {"$lte": energy_limit}}
+    with tracing.span("search:activities", k=8, filter=search_filter) as span:
+        vec = guarded_call("embeddings", embeddings.embed_query, query)
+        res = guarded_call(
+            f"pinecone:{INDEX_NAME}",
+            index.query,
+            vector=vec,
+            top_k=8,
+            include_metadata=True,
+            filter=search_filter,
+        )
+        matches = list(res.get("matches", []))
+        span.set(results=len(matches))
+    return matches
 
-    res = index.query(
-        vector=vec,
-        top_k=8,
-        include_metadata=True,
-        filter={"type": {"$eq": "activity"}, "ENERGY_REQUIRED": {"$lte": energy_limit}},
-    )
+
+def extract_keywords(recent_messages: list[str] | None, limit: int = 5) -> list[str]:
+    """최근 대화에서 상위 키워드 추출 (세션 키워드 통계가 없을 때 사용)."""
+    return keywords_from_messages(recent_messages, limit)
+
+
+def build_question_query(
+    context: str, recent_messages: list[str] | None, keyword_stats: dict | None = None
+) -> str:
+    """공감 질문 검색용 쿼리 문자열 생성 (세션에 누적된 키워드 통계 우선)."""
+    query_text = context
+    if keyword_stats and keyword_stats.get("top"):
+        keywords = top_keywords(keyword_stats, text=context)
+    else:
+        keywords = extract_keywords(recent_messages)
+    if keywords:
+        query_text += " / 키워드: " + ", ".join(keywords)
+    return query_text
+
+
+def query_questions(query_text: str) -> list:
+    """질문 벡터 검색. 선행 검색과 공유하기 위해 최대 depth 기준으로 가져온다."""
+    _ensure_clients()
+    if not index or not embeddings:
+        return []
+    top_k = 3 + MAX_QUESTION_DEPTH
+    with tracing.span("search:questions", k=top_k, filter={"type": "question"}) as span:
+        vec = guarded_call("embeddings", embeddings.embed_query, query_text)
+        res = guarded_call(
+            f"pinecone:{INDEX_NAME}",
+            index.query,
+            vector=vec,
+            top_k=top_k,
+            include_metadata=True,
+            filter={"type": {"$eq": "question"}},
+        )
+        matches = list(res.get("matches", []))
+        span.set(results=len(matches))
+    return matches
+
+
+def _keyword_stats(user_id: str) -> dict | None:
+    """세션에 누적된 사용자 키워드 통계 (세션 캐시를 거치므로 파일을 다시 파싱하지 않는다)."""
+    if not user_id:
+        return None
+    return _sessions.load_session(user_id).get("keyword_stats")
+
+
+# ---------------------------------------------------------------------------
+# Tools
+# ---------------------------------------------------------------------------
+@tool
+def recommend_activities_tool(
+    user_emotion: str,
+    mobility_status: str = "거동 가능",
+    user_id: str = "",
+) -> str:
+    """
+    사용자의 감정(B1)과 거동/활동 범위(A2/A4)를 기반으로 '의미 있는 활동'을 추천합니다.
+    동일 활동을 반복 추천하지 않습니다.
+    """
+    _ensure_clients()
+    if not index or not embeddings:
+        return "DB 연결 오류"
+
+    key = activity_prefetch_key(user_emotion, mobility_status)
+    matches = prefetcher.claim(user_id, key)
+    tracing.annotate(prefetch_hit=matches is not None)
+    if matches is None:
+        try:
+            matches = query_activities(*key[1:])
+        except DependencyUnavailable:
+            return SEARCH_UNAVAILABLE_TEXT
 
     uid = user_id or "__global__"
-    already = _recommended_activities_by_user[uid]
+    # 이미 추천한 활동은 CSV activity_id 비트셋으로 거른다 (워커 간 공유, 재시작 후에도 유지).
+    already = dedup_store.seen(uid, "activity")
     seen_local: Set[str] = set()
+    picked_ids = []
     results = []
 
-    for match in res.get("matches", []):
+    for match in matches:
         meta = match.get("metadata", {})
         activity = meta.get("activity_kr") or meta.get("activity") or ""
-        if not activity or activity in already or activity in seen_local:
+        activity_id = ACTIVITY_CATALOG.id_for(meta, activity)
+        if not activity or activity_id in already or activity in seen_local:
             continue
         seen_local.add(activity)
+        picked_ids.append(activity_id)
         results.append(f"- {activity} (기대효과: {meta.get('FEELING_TAGS')})")
         if len(results) >= 3:
             break
@@ -146,7 +265,7 @@ def recommend_activities_tool(
     if not results:
         return "이미 추천드린 활동과 겹쳐서 새로운 추천을 찾지 못했습니다. 다른 감정이나 상황을 알려주시면 새로 찾아볼게요."
 
-    already.update(seen_local)
+    dedup_store.add(uid, "activity", picked_ids)
     return "\n".join(results)
 
 
@@ -166,73 +285,46 @@ def search_empathy_questions_tool(
     if not index or not embeddings:
         return "DB 연결 오류"
 
-    depth = max(1, min(depth, 3))
-
-    # 최근 대화에서 상위 키워드 추출: 자주 언급 + 최근 발화 가중치
-    keywords = []
-    if recent_messages:
-        stop = {
-            "그리고",
-            "그래서",
-            "합니다",
-            "했습니다",
-            "그런데",
-            "지금",
-            "조금",
-            "정말",
-            "뭔가",
-            "나는",
-            "제가",
-            "저는",
-            "근데",
-            "그러면",
-        }
-        weights = list(range(1, len(recent_messages[-5:]) + 1))  # 최근 발화일수록 가중치 큼
-        counts: Counter[str] = Counter()
-        for weight, msg in zip(weights, recent_messages[-5:]):
-            for raw in msg.replace("\n", " ").split(" "):
-                token = raw.strip().strip(",.?!\"'()[]")
-                if len(token) < 2 or token in stop or any(c.isdigit() for c in token):
-                    continue
-                counts[token] += weight
-        keywords = [w for w, _ in counts.most_common(5)]
-
-    query_text = context
-    if keywords:
-        query_text += " / 키워드: " + ", ".join(keywords)
+    depth = max(1, min(depth, MAX_QUESTION_DEPTH))
 
-    vec = embeddings.embed_query(query_text)
-    res = index.query(
-        vector=vec,
-        top_k=3 + depth,
-        include_metadata=True,
-        filter={"type": {"$eq": "question"}},
-    )
+    query_text = build_question_query(context, recent_messages, _keyword_stats(user_id))
+    matches = prefetcher.claim(user_id, ("questions", query_text))
+    tracing.annotate(prefetch_hit=matches is not None, depth=depth)
+    if matches is None:
+        try:
+            matches = query_questions(query_text)
+        except DependencyUnavailable:
+            return SEARCH_UNAVAILABLE_TEXT
+    # 선행 검색은 최대 depth 기준으로 가져오므로 요청 depth에 맞춰 자른다.
+    matches = matches[: 3 + depth]
 
     uid = user_id or "__global__"
-    already = _asked_questions_by_user[uid]
+    already = dedup_store.seen(uid, "question")
     seen_local: Set[str] = set()
+    picked_ids = []
 
     questions = []
 
-    for m in res.get("matches", []):
+    for m in matches:
         meta = m.get("metadata", {})
         q_text = meta.get("question_text")
-        if not q_text or q_text in already or q_text in seen_local:
+        question_id = QUESTION_CATALOG.id_for(meta, q_text)
+        if not q_text or question_id in already or q_text in seen_local:
             continue
         seen_local.add(q_text)
+        picked_ids.append(question_id)
         questions.append(f"- {q_text} (의도: {meta.get('intent')})")
         if len(questions) >= 3:
             break
 
-    if not questions and res.get("matches"):
+    if not questions and matches:
         # fallback: allow repeats if nothing fresh
         questions = [
             f"- {m['metadata'].get('question_text')} (의도: {m['metadata'].get('intent')})"
-            for m in res.get("matches", [])[:3]
+            for m in matches[:3]
         ]
 
-    already.update(seen_local)
+    dedup_store.add(uid, "question", picked_ids)
     return "\n".join(questions) if questions else "적절한 질문이 없습니다."
 
 
@@ -0,0 +1,258 @@
+"""
+시/군/구 인접 그래프.
+
+data/region_centroids.json의 대략적인 중심 좌표(위도, 경도)로 노드를 만들고, 인접은 거리 상한을 둔
+가브리엘 그래프로 근사한다 (두 지역을 지름으로 하는 원 안에 다른 지역 중심이 없으면 이웃).
+노드 키는 "서울 종로구"처럼 짧은 시/도 + 시/군/구이고, facilities_region_list.json의 표기
+("서울특별시 종로구", "강원도 춘천시", "강원특별자치도 춘천시" ...)는 members로 묶는다.
+
+'서울 근교', '서울과 수원 사이', '수도권' 같은 공간 표현을 LLM 추측 없이 정해진 지역 목록으로
+바꿔 한 번의 필터 검색으로 보내는 데 쓴다 (search_info.search_funeral_facilities).
+"""
+import os
+import re
+import json
+import math
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+REGION_CENTROIDS_PATH = os.getenv("REGION_CENTROIDS_PATH", os.path.join(_ROOT_DIR, "data", "region_centroids.json"))
+REGION_MAX_EDGE_KM = float(os.getenv("REGION_MAX_EDGE_KM", "50"))  # 이보다 먼 지역은 이웃으로 보지 않는다 (섬 등)
+REGION_EXPANSION_LIMIT = int(os.getenv("REGION_EXPANSION_LIMIT", "12"))  # 근처/사이 확장 시 최대 시/군/구 수
+BETWEEN_SLACK = 1.25  # a→c→b 거리가 a→b 직선거리의 몇 배까지면 '사이'로 보는지
+_NEAREST_CANDIDATES = 12  # 가브리엘 간선 후보로 볼 가까운 지역 수
+
+SIDO_ALIASES = {
+    "서울특별시": "서울", "서울시": "서울", "서울": "서울",
+    "부산광역시": "부산", "부산시": "부산", "부산": "부산",
+    "대구광역시": "대구", "대구시": "대구", "대구": "대구",
+    "인천광역시": "인천", "인천시": "인천", "인천": "인천",
+    "광주광역시": "광주", "광주": "광주",
+    "대전광역시": "대전", "대전시": "대전", "대전": "대전",
+    "울산광역시": "울산", "울산시": "울산", "울산": "울산",
+    "세종특별자치시": "세종", "세종시": "세종", "세종": "세종",
+    "경기도": "경기", "경기": "경기",
+    "강원도": "강원", "강원특별자치도": "강원", "강원": "강원",
+    "충청북도": "충북", "충북": "충북",
+    "충청남도": "충남", "충남": "충남",
+    "전라북도": "전북", "전북특별자치도": "전북", "전북": "전북",
+    "전라남도": "전남", "전남": "전남",
+    "경상북도": "경북", "경북": "경북",
+    "경상남도": "경남", "경남": "경남",
+    "제주특별자치도": "제주", "제주도": "제주", "제주": "제주",
+}
+
+# 광역 권역 이름 → 시/도
+METRO_GROUPS = {
+    "수도권": ("서울", "인천", "경기"),
+    "부울경": ("부산", "울산", "경남"),
+    "동남권": ("부산", "울산", "경남"),
+    "대경권": ("대구", "경북"),
+    "충청권": ("대전", "세종", "충북", "충남"),
+    "호남권": ("광주", "전북", "전남"),
+    "강원권": ("강원",),
+    "제주권": ("제주",),
+}
+
+NEAR_WORDS = ("근교", "근처", "인근", "주변", "가까운 곳", "가까운")
+_BETWEEN_RE = re.compile(r"^(.+?)\s*(?:과|와|하고|이랑|랑|에서|,|/)\s*(.+?)\s*(?:사이|중간)")
+_UNIT_SUFFIXES = ("시", "군", "구")
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def _stem(unit: str) -> str:
+    """'수원시' → '수원', '종로구' → '종로' (두 글자 이름은 그대로)."""
+    if len(unit) >= 3 and unit[-1] in _UNIT_SUFFIXES:
+        return unit[:-1]
+    return unit
+
+
+class RegionGraph:
+    """시/군/구 중심 좌표 + 근사 인접 + 공간 표현 확장."""
+
+    def __init__(self, centroids: Dict[str, Sequence[float]], raw_names: Iterable[str] = ()):
+        self.centroids: Dict[str, Tuple[float, float]] = {k: (float(v[0]), float(v[1])) for k, v in centroids.items()}
+        self.sido: Dict[str, str] = {node: node.split(" ", 1)[0] for node in self.centroids}
+        self.unit: Dict[str, str] = {node: node.split(" ", 1)[1] for node in self.centroids}
+        self.members: Dict[str, List[str]] = defaultdict(list)
+        self.unmatched: List[str] = []
+        for raw in raw_names:
+            node = self.canonical(raw)
+            if node:
+                self.members[node].append(raw)
+            else:
+                self.unmatched.append(raw)
+        if self.unmatched:
+            logger.info(f"좌표가 없는 지역 표기 {len(self.unmatched)}개: {self.unmatched[:5]}")
+        self.adjacency: Dict[str, set] = self._build_adjacency()
+
+    @classmethod
+    def from_file(cls, raw_names: Iterable[str] = (), path: str = REGION_CENTROIDS_PATH) -> "RegionGraph":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), raw_names)
+
+    # ------------------------------------------------------------------
+    # 그래프 구성
+
+    def _build_adjacency(self) -> Dict[str, set]:
+        """거리 상한이 있는 가브리엘 그래프.
+
+        c가 a-b를 지름으로 하는 원 안에 있으면 d(a,c) < d(a,b)이므로, a에서 b보다 가까운 후보만 보면 된다.
+        """
+        nodes = list(self.centroids)
+        adjacency: Dict[str, set] = {node: set() for node in nodes}
+        for a in nodes:
+            ranked = sorted(
+                ((haversine_km(self.centroids[a], self.centroids[b]), b) for b in nodes if b != a),
+            )[:_NEAREST_CANDIDATES]
+            for i, (d_ab, b) in enumerate(ranked):
+                if d_ab > REGION_MAX_EDGE_KM:
+                    break
+                blocked = False
+                for d_ac, c in ranked[:i]:
+                    d_bc = haversine_km(self.centroids[b], self.centroids[c])
+                    if d_ac ** 2 + d_bc ** 2 < d_ab ** 2:
+                        blocked = True
+                        break
+                if not blocked:
+                    adjacency[a].add(b)
+                    adjacency[b].add(a)
+        return adjacency
+
+    # ------------------------------------------------------------------
+    # 이름 해석
+
+    def canonical(self, raw: str) -> Optional[str]:
+        """데이터의 지역 표기 하나 → 노드 키. '세종특별자치시 조치원읍'처럼 세부 주소도 시/도 기준으로 묶는다."""
+        parts = raw.split()
+        if not parts:
+            return None
+        sido = SIDO_ALIASES.get(parts[0])
+        if sido is None:
+            # '포항시 북구'처럼 시/도가 빠진 표기: 시/군/구 이름이 유일하면 그 지역
+            candidates = [n for n in self.centroids if self.unit[n] == parts[0]]
+            return candidates[0] if len(candidates) == 1 else None
+        if sido == "세종":
+            return "세종 세종시" if "세종 세종시" in self.centroids else None
+        if len(parts) < 2:
+            return None
+        node = f"{sido} {parts[1]}"
+        return node if node in self.centroids else None
+
+    def resolve(self, text: str) -> List[str]:
+        """'서울' → 서울 25개 구, '수원'/'수원시' → 경기 수원시, '대구 수성' → 대구 수성구, '중구' → 여러 개."""
+        text = text.strip()
+        if not text:
+            return []
+        node = self.canonical(text)
+        if node:
+            return [node]
+        parts = text.split()
+        sido = SIDO_ALIASES.get(parts[0])
+        if sido and len(parts) == 1:
+            return [n for n in self.centroids if self.sido[n] == sido]
+        if sido:
+            unit = parts[1]
+            return [n for n in self.centroids if self.sido[n] == sido and (self.unit[n] == unit or _stem(self.unit[n]) == unit)]
+        unit = parts[0]
+        return [n for n in self.centroids if self.unit[n] == unit or _stem(self.unit[n]) == unit]
+
+    def center(self, nodes: Sequence[str]) -> Tuple[float, float]:
+        lat = sum(self.centroids[n][0] for n in nodes) / len(nodes)
+        lon = sum(self.centroids[n][1] for n in nodes) / len(nodes)
+        return (lat, lon)
+
+    def names(self, nodes: Iterable[str]) -> List[str]:
+        """노드 → 검색 필터에 넣을 데이터 표기 목록 (노드 순서 유지)."""
+        out: List[str] = []
+        for node in nodes:
+            out.extend(self.members.get(node, ()))
+        return out
+
+    # ------------------------------------------------------------------
+    # 확장
+
+    def _by_distance(self, nodes: Iterable[str], anchor: Tuple[float, float]) -> List[str]:
+        return sorted(set(nodes), key=lambda n: (haversine_km(self.centroids[n], anchor), n))
+
+    def neighbors(self, region, hops: int = 1, include_self: bool = True) -> List[str]:
+        """지역(이름 또는 노드 목록)에서 hops 단계 안의 이웃. 시작 지역 중심에서 가까운 순."""
+        start = self.resolve(region) if isinstance(region, str) else list(region)
+        if not start:
+            return []
+        seen = set(start)
+        frontier = set(start)
+        for _ in range(hops):
+            frontier = {b for a in frontier for b in self.adjacency[a]} - seen
+            seen |= frontier
+        if not include_self:
+            seen -= set(start)
+        return self._by_distance(seen, self.center(start))
+
+    def between(self, a, b, limit: Optional[int] = None) -> List[str]:
+        """두 지역 사이: a→c→b 경로가 직선거리의 BETWEEN_SLACK배 안인 지역. a에서 b 방향 순서.
+
+        '서울'처럼 광역 지명이면 상대 쪽에 가장 가까운 구역을 끝점으로 삼는다 (서울 한가운데가 아니라 경계 쪽).
+        limit을 넘으면 돌아가는 거리가 작은 지역부터 남긴다 (양 끝은 항상 포함).
+        """
+        start = self.resolve(a) if isinstance(a, str) else list(a)
+        end = self.resolve(b) if isinstance(b, str) else list(b)
+        if not start or not end:
+            return []
+        end_center = self.center(end)
+        node_a = min(start, key=lambda n: (haversine_km(self.centroids[n], end_center), n))
+        node_b = min(end, key=lambda n: (haversine_km(self.centroids[n], self.centroids[node_a]), n))
+        pa, pb = self.centroids[node_a], self.centroids[node_b]
+        direct = haversine_km(pa, pb)
+        detours = {}
+        for n, c in self.centroids.items():
+            detour = haversine_km(pa, c) + haversine_km(c, pb) - direct
+            if detour <= direct * (BETWEEN_SLACK - 1):
+                detours[n] = detour
+        detours[node_a] = detours[node_b] = -1.0
+        picked = sorted(detours, key=lambda n: (detours[n], n))[:limit]
+        return sorted(picked, key=lambda n: (haversine_km(pa, self.centroids[n]), n))
+
+    def group(self, name: str) -> List[str]:
+        sidos = METRO_GROUPS.get(name.strip(), ())
+        return [n for n in self.centroids if self.sido[n] in sidos]
+
+    def expand(self, phrase: str, limit: int = REGION_EXPANSION_LIMIT) -> Optional[Tuple[str, List[str]]]:
+        """공간 표현 → (종류, 노드 목록). 공간 표현이 아니거나 지역을 못 찾으면 None.
+
+        - 권역('수도권'): 해당 시/도 전체 (권역 자체가 범위라 limit을 적용하지 않는다)
+        - 사이('서울과 수원 사이'): between
+        - 근처/근교('수원 근처', '서울 근교'): 1단계 이웃. 시/도 전체를 말한 '근교'는 그 시/도 밖만.
+        """
+        phrase = phrase.strip()
+        for name in METRO_GROUPS:
+            if name in phrase:
+                return ("group", self.group(name))
+
+        m = _BETWEEN_RE.match(phrase)
+        if m:
+            nodes = self.between(m.group(1), m.group(2), limit)
+            return ("between", nodes) if nodes else None
+
+        if any(word in phrase for word in NEAR_WORDS):
+            base = phrase
+            for word in NEAR_WORDS:
+                base = base.replace(word, " ")
+            # '서울의 근교' → '서울'
+            base = " ".join(t[:-1] if t.endswith("의") and len(t) > 1 else t for t in base.split())
+            start = self.resolve(base)
+            if not start:
+                return None
+            whole_sido = len(base.split()) == 1 and base in SIDO_ALIASES
+            nodes = self.neighbors(start, hops=1, include_self=not whole_sido)
+            return ("near", nodes[:limit]) if nodes else None
+        return None
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# 요청(턴) 단위 컨텍스트. LangGraph/툴/LLM 스레드풀은 contextvars를 복사해 넘기므로
+# 하위 호출에서도 그대로 읽을 수 있다.
+current_user_id: ContextVar[Optional[str]] = ContextVar("current_user_id", default=None)
+current_mode: ContextVar[str] = ContextVar("current_mode", default="-")
+current_node: ContextVar[str] = ContextVar("current_node", default="-")
+
+
+@contextmanager
+def bind(user_id: Optional[str] = None, mode: Optional[str] = None, node: Optional[str] = None):
+    """with 블록 동안 요청 컨텍스트 값을 설정."""
+    tokens = []
+    if user_id is not None:
+        tokens.append((current_user_id, current_user_id.set(user_id)))
+    if mode is not None:
+        tokens.append((current_mode, current_mode.set(mode)))
+    if node is not None:
+        tokens.append((current_node, current_node.set(node)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
@@ -0,0 +1,245 @@
+import os
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+
+from .metrics import observe_dependency
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))  # 최근 호출 N건으로 실패율 계산
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+BULKHEAD_WAIT_SECONDS = float(os.getenv("BULKHEAD_WAIT_SECONDS", "0.5"))
+
+# 의존성 이름 prefix별 동시 실행 상한
+BULKHEAD_LIMITS = {
+    "llm": int(os.getenv("BULKHEAD_LLM", "8")),
+    "embeddings": int(os.getenv("BULKHEAD_EMBEDDINGS", "8")),
+    "pinecone": int(os.getenv("BULKHEAD_PINECONE", "4")),
+}
+DEFAULT_BULKHEAD_LIMIT = 4
+
+FAST_FAIL_TEXT = (
+    "지금은 답변을 만드는 서비스 연결이 원활하지 않아요. "
+    "잠시 후 다시 말씀해 주시면 바로 이어서 도와드릴게요."
+)
+
+
+class DependencyUnavailable(Exception):
+    """외부 의존성을 지금 호출할 수 없을 때 (차단기 열림/격벽 포화)."""
+
+    def __init__(self, name: str, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(DependencyUnavailable):
+    """차단기가 열려 있어 호출하지 않고 즉시 실패."""
+
+
+class BulkheadFullError(DependencyUnavailable):
+    """동시 실행 한도에 도달해 대기 시간 안에 자리를 얻지 못함."""
+
+
+class CircuitBreaker:
+    """최근 호출 실패율 기반 차단기 (closed → open → half_open → closed)."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_probes: int = BREAKER_HALF_OPEN_PROBES,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._outcomes = deque(maxlen=window)  # True=실패
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """호출 전 확인. 열려 있으면 CircuitOpenError."""
+        with self._lock:
+            if self._state == self.OPEN:
+                waited = time.monotonic() - self._opened_at
+                if waited < self.open_seconds:
+                    raise CircuitOpenError(
+                        self.name,
+                        f"'{self.name}' 차단기 열림",
+                        retry_after=self.open_seconds - waited,
+                    )
+                self._state = self.HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info(f"[Breaker] {self.name}: half-open 전환, 시험 호출 허용")
+            if self._state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    raise CircuitOpenError(self.name, f"'{self.name}' 시험 호출 진행 중", retry_after=1.0)
+                self._probes_in_flight += 1
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+                logger.info(f"[Breaker] {self.name}: 시험 호출 성공 → closed")
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(True)
+            if len(self._outcomes) >= self.min_calls and self._failure_rate() >= self.failure_rate_threshold:
+                self._trip()
+
+    def release_probe(self):
+        """결과 없이 끝난 시험 호출 자리를 반납."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        logger.warning(f"[Breaker] {self.name}: open ({self.open_seconds:.0f}s 동안 즉시 실패)")
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _current_state(self) -> str:
+        # open 유지 시간이 지났으면 다음 호출이 시험 호출이 되므로 half_open으로 본다.
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            return self.HALF_OPEN
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            retry_after = 0.0
+            if state == self.OPEN:
+                retry_after = self.open_seconds - (time.monotonic() - self._opened_at)
+            return {
+                "state": state,
+                "failure_rate": round(self._failure_rate(), 3),
+                "window_calls": len(self._outcomes),
+                "retry_after": round(retry_after, 1),
+            }
+
+
+class Bulkhead:
+    """의존성별 동시 실행 상한. 느린 의존성이 워커를 모두 잡아두지 않게 한다."""
+
+    def __init__(self, name: str, limit: int, wait_seconds: float = BULKHEAD_WAIT_SECONDS):
+        self.name = name
+        self.limit = limit
+        self.wait_seconds = wait_seconds
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def __enter__(self):
+        if not self._semaphore.acquire(timeout=self.wait_seconds):
+            with self._lock:
+                self._rejected += 1
+            raise BulkheadFullError(self.name, f"'{self.name}' 동시 실행 한도({self.limit}) 초과", retry_after=1.0)
+        with self._lock:
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            self._in_flight -= 1
+        self._semaphore.release()
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": self._in_flight, "limit": self.limit, "rejected": self._rejected}
+
+
+class Dependency:
+    """차단기 + 격벽으로 감싼 외부 의존성."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        limit = BULKHEAD_LIMITS.get(name.split(":", 1)[0], DEFAULT_BULKHEAD_LIMIT)
+        self.bulkhead = Bulkhead(name, limit)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self.breaker.before_call()
+        try:
+            with self.bulkhead, observe_dependency(self.name):
+                result = fn(*args, **kwargs)
+        except BulkheadFullError:
+            # 격벽 포화는 의존성 장애가 아니므로 실패율에 넣지 않는다.
+            self.breaker.release_probe()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.breaker.snapshot(), "bulkhead": self.bulkhead.snapshot()}
+
+
+_dependencies: Dict[str, Dependency] = {}
+_registry_lock = threading.Lock()
+
+
+def dependency(name: str) -> Dependency:
+    """이름별 의존성 객체 (llm, embeddings, pinecone:<namespace> ...)."""
+    dep = _dependencies.get(name)
+    if dep is None:
+        with _registry_lock:
+            dep = _dependencies.setdefault(name, Dependency(name))
+    return dep
+
+
+def guarded_call(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """차단기/격벽을 거쳐 외부 호출을 실행."""
+    return dependency(name).call(fn, *args, **kwargs)
+
+
+def dependency_states() -> Dict[str, Dict[str, Any]]:
+    """/api/health 노출용 의존성 상태."""
+    with _registry_lock:
+        deps = list(_dependencies.values())
+    return {dep.name: dep.snapshot() for dep in deps}
+
+
+def is_open(name: str) -> bool:
+    dep = _dependencies.get(name)
+    return bool(dep and dep.breaker.state == CircuitBreaker.OPEN)
@@ -2,14 +2,20 @@ import os
 import re
 import json
 import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import List
 
-from pinecone import Pinecone
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.tools import tool
-from langchain_pinecone import PineconeVectorStore
 from difflib import get_close_matches
 
+from .resilience import DependencyUnavailable, guarded_call
+from .region_graph import RegionGraph
+from .request_context import current_user_id
+from .vector_backend import VECTOR_BACKEND, LocalVectorStore, local_index, make_embeddings
+from . import tracing
+
 # 연결 상태 로깅
 # logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,6 +46,14 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 INDEX_NAME = "funeral-services"
 EMBEDDING_MODEL = "text-embedding-3-small"
 
+# 검색 튜닝 값 (benchmarks.retrieval로 정확도/지연을 함께 보고 조정)
+ORDINANCE_SEARCH_K = int(os.getenv("ORDINANCE_SEARCH_K", "3"))
+DOCUMENT_SEARCH_K = int(os.getenv("DOCUMENT_SEARCH_K", "5"))  # 디지털 유산/상속
+FACILITY_SEARCH_TOTAL_K = int(os.getenv("FACILITY_SEARCH_TOTAL_K", "30"))  # 지역 수로 나눠 지역별 k를 정한다
+FACILITY_SEARCH_MIN_K = int(os.getenv("FACILITY_SEARCH_MIN_K", "5"))
+FACILITY_REGION_MATCHES = int(os.getenv("FACILITY_REGION_MATCHES", "100"))  # 시설 검색 필터에 넣을 최대 지역 수
+REGION_MATCH_CUTOFF = float(os.getenv("REGION_MATCH_CUTOFF", "0.6"))  # difflib 유사도 하한
+
 # 전역 객체 초기화
 pc = None
 index = None
@@ -48,6 +62,7 @@ vectorstore_ordinance = None
 vectorstore_funeral_facilities = None
 vectorstore_digital_legacy = None
 vectorstore_legacy = None
+_init_lock = threading.Lock()
 
 def _safe_load_json(path: str, default):
     if not os.path.exists(path):
@@ -60,46 +75,246 @@ def _safe_load_json(path: str, default):
         logger.warning(f"JSON 로드 실패 {path}: {e}")
         return default
 
-region_list_json = _safe_load_json(ordinance_file_path, {
+# 지역 목록은 기동 단계(startup)에서 load_region_data()로 채운다. 그 전에 쓰이면 그때 로드.
+region_list_json = {
     "public_funeral_ordinance": [],
     "cremation_detail": [],
     "cremation_etcetera": [],
-})
-facilities_region_list_json = _safe_load_json(facilities_file_path, {})
+}
+facilities_region_list_json = {}
+_region_data_loaded = False
+_region_graph = None
+
+
+def load_region_data():
+    global _region_data_loaded
+    if _region_data_loaded:
+        return
+    region_list_json.update(_safe_load_json(ordinance_file_path, {}))
+    facilities_region_list_json.update(_safe_load_json(facilities_file_path, {}))
+    _region_data_loaded = True
+
+
+def region_graph() -> RegionGraph:
+    """시설 지역 목록 표기를 묶은 시/군/구 인접 그래프 (기동 단계 또는 첫 사용 시 생성)."""
+    global _region_graph
+    if _region_graph is None:
+        load_region_data()
+        names = sorted({r for r_list in facilities_region_list_json.values() for r in r_list})
+        _region_graph = RegionGraph.from_file(names)
+    return _region_graph
+
+
+def _spatial_regions(phrase: str):
+    """'서울 근교', '서울과 수원 사이', '수도권' → 시설 필터에 넣을 지역 표기 목록. 공간 표현이 아니면 None."""
+    graph = region_graph()
+    expanded = graph.expand(phrase)
+    if not expanded:
+        return None
+    kind, nodes = expanded
+    names = graph.names(nodes)[:FACILITY_REGION_MATCHES]
+    tracing.annotate(region_expansion=kind, regions=len(names))
+    return names or None
+
 
 def _init_clients():
     global pc, index, embeddings
     global vectorstore_ordinance, vectorstore_funeral_facilities, vectorstore_digital_legacy, vectorstore_legacy
 
+    load_region_data()
     if index and embeddings:
         return
+    # 기동/워밍업/요청 스레드가 동시에 들어올 수 있어 잠그고, 전역 변수는 모두 만든 뒤에 넣는다.
+    # index/embeddings를 마지막에 넣으므로 위 검사를 통과하면 벡터 스토어도 준비된 상태다.
+    with _init_lock:
+        if index and embeddings:
+            return
+        built = _build_clients()
+        if built is None:
+            return
+        client, new_index, new_embeddings, stores = built
+        vectorstore_ordinance = stores["ordinance"]
+        vectorstore_funeral_facilities = stores["funeral_facilities"]
+        vectorstore_digital_legacy = stores["digital_legacy"]
+        vectorstore_legacy = stores["legacy"]
+        pc = client
+        embeddings = new_embeddings
+        index = new_index
+
+
+def _build_clients():
+    """(pc, index, embeddings, 네임스페이스별 벡터 스토어). 사용할 수 없으면 None."""
+    namespaces = ("ordinance", "funeral_facilities", "digital_legacy", "legacy")
+    if VECTOR_BACKEND == "local":
+        # 인제스트 CLI가 만든 로컬 인덱스 (테스트/오프라인)
+        new_index = local_index(INDEX_NAME)
+        new_embeddings = make_embeddings(model=EMBEDDING_MODEL)
+        stores = {ns: LocalVectorStore(new_index, ns) for ns in namespaces}
+        logger.info(f"로컬 벡터 인덱스 사용: {new_index.path}")
+        return None, new_index, new_embeddings, stores
 
     try:
-        pc = Pinecone(api_key=PINECONE_API_KEY) if PINECONE_API_KEY else None
-        if not pc:
+        # 벤더 SDK는 첫 사용 시 import (서버 기동 시간 단축)
+        from pinecone import Pinecone
+        from langchain_openai import OpenAIEmbeddings
+        from langchain_pinecone import PineconeVectorStore
+
+        client = Pinecone(api_key=PINECONE_API_KEY) if PINECONE_API_KEY else None
+        if not client:
             logger.warning("Pinecone 비활성화: PINECONE_API_KEY 미설정")
-            return
-        index = pc.Index(INDEX_NAME)
-        embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY"))
-        vectorstore_ordinance = PineconeVectorStore(index=index, embedding=embeddings, namespace="ordinance")
-        vectorstore_funeral_facilities = PineconeVectorStore(index=index, embedding=embeddings, namespace='funeral_facilities')
-        vectorstore_digital_legacy = PineconeVectorStore(index=index, embedding=embeddings, namespace='digital_legacy')
-        vectorstore_legacy = PineconeVectorStore(index=index, embedding=embeddings, namespace='legacy')
+            return None
+        new_index = client.Index(INDEX_NAME)
+        new_embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY"))
+        stores = {
+            ns: PineconeVectorStore(index=new_index, embedding=new_embeddings, namespace=ns) for ns in namespaces
+        }
         logger.info("Pinecone/VectorStores 초기화 완료 (정보 탭)")
+        return client, new_index, new_embeddings, stores
     except Exception as e:
         logger.warning(f"Pinecone 초기화 실패: {e}")
-        pc = None
-        index = None
-        embeddings = None
-        vectorstore_ordinance = None
-        vectorstore_funeral_facilities = None
-        vectorstore_digital_legacy = None
-        vectorstore_legacy = None
+        return None
+
+
+SEARCH_UNAVAILABLE_TEXT = "검색 서비스 연결이 잠시 원활하지 않습니다. 잠시 후 다시 시도해 주세요."
+
+# collect_scores() 안에서 실행된 검색의 (문서, 유사도)를 모은다. 툴은 점수를 돌려주지 않기 때문.
+_score_sink: ContextVar = ContextVar("search_scores", default=None)
+
+
+@contextmanager
+def collect_scores():
+    """with 블록 안에서 _similarity_search가 찾은 (Document, score) 목록을 모아 돌려준다."""
+    scored = []
+    token = _score_sink.set(scored)
+    try:
+        yield scored
+    finally:
+        _score_sink.reset(token)
+
+
+def _similarity_search(vectorstore, namespace: str, query: str, k: int, filter: dict = None):
+    """임베딩/네임스페이스 검색을 각각 차단기·격벽으로 감싼 similarity_search."""
+    with tracing.span(f"search:{namespace}", k=k, filter=filter) as span:
+        vec = guarded_call("embeddings", embeddings.embed_query, query)
+        docs_and_scores = guarded_call(
+            f"pinecone:{namespace}",
+            vectorstore.similarity_search_by_vector_with_score,
+            vec,
+            k=k,
+            filter=filter,
+        )
+        span.set(results=len(docs_and_scores))
+    sink = _score_sink.get()
+    if sink is not None:
+        sink.extend(docs_and_scores)
+    return [doc for doc, _ in docs_and_scores]
+
+
+_SIDO_SUFFIXES = ("특별자치도", "특별자치시", "특별시", "광역시", "도")
+_region_aliases = None
+# 일상어와 겹치는 지명 어간. '상주시', '고령군'처럼 행정구역 접미사가 붙었을 때만 지역으로 본다
+# (예: "상주가 해야 할 일", "고령이라", "오래 장수하고", "강화된 지원금", "고양이").
+AMBIGUOUS_REGION_STEMS = frozenset(
+    {
+        "상주", "고령", "장수", "강화", "강진", "고성", "고양", "공주", "광명", "광산", "구미", "구리",
+        "기장", "남동", "남해", "달성", "동작", "동해", "무안", "보은", "부여", "사상", "성주", "수성",
+        "수영", "양산", "양주", "연수", "영광", "영양", "예산", "오산", "완주", "유성", "음성", "인제",
+        "장성", "진도", "진주", "태안", "화성",
+    }
+)
+# 토큰에서 지명을 뺀 나머지로 허용하는 조사/어미 (없거나 이 중 하나여야 지명으로 본다)
+_REGION_TAIL_RE = re.compile(
+    r"(?:청|근처|쪽)?"  # '경주시청', '수원근처'
+    r"(?:에서는|에서도|에서|에는|에도|에게|으로|이랑|까지|부터|하고|이에요|예요|인데|이고|"
+    r"은|는|이|가|을|를|에|의|도|로|와|과|랑|만|요)?"
+)
+_HANGUL_TOKEN_RE = re.compile(r"[가-힣]+")
+
+
+def _build_region_aliases():
+    """'경기도 수원시' → {'수원시': '수원시', '수원': '수원시', '경기도': '경기도', '경기': '경기도'} 형태의 별칭 사전."""
+    load_region_data()
+    names = set()
+    for r_list in facilities_region_list_json.values():
+        names.update(r_list)
+    for key in ("public_funeral_ordinance", "cremation_detail", "cremation_etcetera"):
+        names.update(region_list_json.get(key, []))
+    aliases = {}
+    for name in names:
+        for part in name.split():
+            if len(part) < 2:
+                continue
+            aliases.setdefault(part, part)
+            stem = part
+            for suffix in _SIDO_SUFFIXES:
+                if part.endswith(suffix) and len(part) > len(suffix) + 1:
+                    stem = part[: -len(suffix)]
+                    break
+            else:
+                if part[-1] in "시군구" and len(part) >= 3:
+                    stem = part[:-1]
+            if stem not in AMBIGUOUS_REGION_STEMS:
+                aliases.setdefault(stem, part)
+    return aliases
+
+
+def _region_in_token(token: str):
+    """토큰 앞부분이 지명 별칭이고 나머지가 조사뿐이면 (별칭 길이, 지역). 긴 별칭부터 본다."""
+    for end in range(len(token), 1, -1):
+        region = _region_aliases.get(token[:end])
+        if region is not None and _REGION_TAIL_RE.fullmatch(token[end:]):
+            return end, region
+    return None
+
+
+def detect_region(texts):
+    """
+    최근 발화부터 거꾸로 훑어 처음 언급된 지역명(시/군/구/도)을 반환. 없으면 None.
+    지명은 어절 시작에서만 찾고 뒤에는 조사만 올 수 있다 ('수원에' O, '강화된' X).
+    """
+    global _region_aliases
+    if _region_aliases is None:
+        _region_aliases = _build_region_aliases()
+    for text in reversed([t for t in texts if t]):
+        best = None
+        for token in _HANGUL_TOKEN_RE.findall(text):
+            found = _region_in_token(token)
+            if found is None:
+                continue
+            length, region = found
+            # 더 긴 별칭 우선 (예: '수원시' > '수원'), 같은 길이면 시/군/구 단위 우선
+            rank = (length, region[-1] in "시군구")
+            if best is None or rank > best[0]:
+                best = (rank, region)
+        if best:
+            return best[1]
+    return None
+
+
+def _default_region():
+    """모델이 지역을 넘기지 않았을 때 쓰는 현재 사용자의 거주 지역 (사용자 기억)."""
+    from .user_memory import user_memory  # user_memory가 detect_region을 import하므로 지연 import
+
+    region = user_memory.default_region(current_user_id.get())
+    if region:
+        tracing.annotate(region_default=region)
+    return region
+
+
+def dedup_documents(docs):
+    """여러 지역 검색 결과를 합칠 때 본문이 같은 문서는 처음 것만 남긴다 (순서 유지)."""
+    unique = []
+    seen_content = set()
+    for doc in docs:
+        if doc.page_content not in seen_content:
+            unique.append(doc)
+            seen_content.add(doc.page_content)
+    return unique
 
 
 # 유사한 지역 반환 함수
-def find_matching_regions(user_input, region_list, n=3):
-    """유사한 지역 여러 개 반환"""
+def find_matching_regions(user_input, region_list, n=3, cutoff=None):
+    """유사한 지역 여러 개 반환 (cutoff 기본값은 REGION_MATCH_CUTOFF)"""
     matched = []
     
     # 1. 양방향 체크
@@ -111,7 +326,9 @@ def find_matching_regions(user_input, region_list, n=3):
     
     # 2. 유사도 기반 매칭
     if not matched:
-        matched = get_close_matches(user_input, region_list, n=n, cutoff=0.6)
+        if cutoff is None:
+            cutoff = REGION_MATCH_CUTOFF
+        matched = get_close_matches(user_input, region_list, n=n, cutoff=cutoff)
     
     return matched if matched else None
 
@@ -128,9 +345,10 @@ def search_public_funeral_ordinance(query: str, region: str = None):
     if not index or not embeddings or not vectorstore_ordinance:
         return "DB 연결 오류"
 
+    region = region or _default_region()
     # filter_dict 먼저 초기화
     filter_dict = {"type": "Public_Funeral_Ordinance"}
-    k = 3
+    k = ORDINANCE_SEARCH_K
     
     if region:
         region_list = region_list_json["public_funeral_ordinance"]
@@ -142,7 +360,10 @@ def search_public_funeral_ordinance(query: str, region: str = None):
             else:
                 filter_dict["region"] = {"$in": matched}  # 여러 개면 in
 
-    results = vectorstore_ordinance.similarity_search(query, k=k, filter=filter_dict)
+    try:
+        results = _similarity_search(vectorstore_ordinance, "ordinance", query, k=k, filter=filter_dict)
+    except DependencyUnavailable:
+        return SEARCH_UNAVAILABLE_TEXT
     return results
 
 @tool
@@ -161,8 +382,9 @@ def search_cremation_subsidy_ordinance(query: str, region: str = None):
     if not index or not embeddings or not vectorstore_ordinance:
         return "DB 연결 오류"
 
+    region = region or _default_region()
     filter_dict = {"type": "Cremation_Subsidy_Ordinance"}
-    k = 3
+    k = ORDINANCE_SEARCH_K
     
     if region:
         region_list = region_list_json["cremation_detail"] + region_list_json["cremation_etcetera"]
@@ -175,8 +397,11 @@ def search_cremation_subsidy_ordinance(query: str, region: str = None):
             else:
                 filter_dict["region"] = {"$in": matched}  # 여러 개면 in
 
-    results = vectorstore_ordinance.similarity_search(query, k=k, filter=filter_dict)
-    
+    try:
+        results = _similarity_search(vectorstore_ordinance, "ordinance", query, k=k, filter=filter_dict)
+    except DependencyUnavailable:
+        return SEARCH_UNAVAILABLE_TEXT
+
     # print("툴 검색 결과:",results)
     return results
 
@@ -187,16 +412,37 @@ def search_funeral_facilities(query: str, region: str = None, regions : List[str
     
     Args:
         query: 검색 문장 (예: "경기도 수원시 시설 좋은 묘지", "대구 남구 천주교 납골당")
-        region: 지역명, 지역 한 개 검색 시 사용 (예: "경기도 성남시", "경상북도 경주시")
+        region: 지역명, 지역 한 개 검색 시 사용 (예: "경기도 성남시", "경상북도 경주시").
+            공간 표현도 그대로 넣는다 (예: "서울 근교", "서울과 수원 사이", "수원 근처", "수도권")
         regions: 지역명, 지역 여러개 검색 시 사용 (예: ["경기도 의왕시", "경기도 안양시", "경기도 군포시"], ["경상남도 양산시", "경상남도 밀양시"])
 
     """
+    if not region and not regions:
+        region = _default_region()
     print(f"쿼리 : {query}, 지역 : {region}, 지역들 : {regions}")
 
     _init_clients()
     if not index or not embeddings or not vectorstore_funeral_facilities:
         return "DB 연결 오류"
 
+    # 공간 표현은 인접 그래프로 지역 목록을 정해 필터 검색 한 번으로 끝낸다
+    if regions is None and region:
+        spatial = _spatial_regions(region)
+        if spatial:
+            logger.debug(f"공간 표현 '{region}' → 지역 {len(spatial)}개: {spatial}")
+            try:
+                results = _similarity_search(
+                    vectorstore_funeral_facilities,
+                    "funeral_facilities",
+                    query,
+                    k=FACILITY_SEARCH_TOTAL_K,
+                    filter={"region": {"$in": spatial}},
+                )
+            except DependencyUnavailable:
+                return SEARCH_UNAVAILABLE_TEXT
+            logger.debug(f"공간 검색 결과 {len(results)}건 반환")
+            return dedup_documents(results)
+
     all_regions = []
     for r_list in facilities_region_list_json.values():
         all_regions.extend(r_list)
@@ -213,14 +459,14 @@ def search_funeral_facilities(query: str, region: str = None, regions : List[str
             regions = [region]
 
     # 지역별 반환 건수 상향 (총합 최대 약 30건 수준)
-    k = max(5, 30 // len(regions))
+    k = max(FACILITY_SEARCH_MIN_K, FACILITY_SEARCH_TOTAL_K // len(regions))
 
     for rgn in regions:
 
         filter_dict = {}
 
         if rgn: # 하나의 지역
-            matched = find_matching_regions(rgn, all_regions, n=100) 
+            matched = find_matching_regions(rgn, all_regions, n=FACILITY_REGION_MATCHES)
             print(f"매칭된 지역: {matched}")
 
             if matched:         # 매치 없더라도 아무거나 벡터 유사도로 넘겨줄라고 else: continue 안 했다. 
@@ -230,26 +476,24 @@ def search_funeral_facilities(query: str, region: str = None, regions : List[str
                     filter_dict["region"] = {"$in": matched} 
 
         try:
-            results = vectorstore_funeral_facilities.similarity_search(
-                query, 
-                k=k, 
-                filter=filter_dict
+            results = _similarity_search(
+                vectorstore_funeral_facilities,
+                "funeral_facilities",
+                query,
+                k=k,
+                filter=filter_dict,
             )
             print(f"검색 결과 {len(results)}건 반환")
             results_list.extend(results)
-            
+
+        except DependencyUnavailable:
+            return SEARCH_UNAVAILABLE_TEXT
         except Exception as e:
             print(f"검색 오류: {e}")
             continue
         
         
-    unique_results = []
-    seen_content = set()
-    for doc in results_list:
-        if doc.page_content not in seen_content:
-            unique_results.append(doc)
-            seen_content.add(doc.page_content)
-
+    unique_results = dedup_documents(results_list)
     # print(f"최종 병합된 검색 결과: {len(unique_results)}건")
     return unique_results
 
@@ -265,7 +509,10 @@ def search_digital_legacy(query: str):
     if not index or not embeddings or not vectorstore_digital_legacy:
         return "DB 연결 오류"
 
-    results = vectorstore_digital_legacy.similarity_search(query, k=5)
+    try:
+        results = _similarity_search(vectorstore_digital_legacy, "digital_legacy", query, k=DOCUMENT_SEARCH_K)
+    except DependencyUnavailable:
+        return SEARCH_UNAVAILABLE_TEXT
 
     print("툴 검색 결과:",results)
     return results
@@ -282,7 +529,10 @@ def search_legacy(query: str):
     if not index or not embeddings or not vectorstore_legacy:
         return "DB 연결 오류"
 
-    results = vectorstore_legacy.similarity_search(query, k=5)
+    try:
+        results = _similarity_search(vectorstore_legacy, "legacy", query, k=DOCUMENT_SEARCH_K)
+    except DependencyUnavailable:
+        return SEARCH_UNAVAILABLE_TEXT
 
     print("툴 검색 결과:",results)
     return results
@@ -0,0 +1,415 @@
+"""
+세션 저장소 전체 통계 (운영용).
+
+sessions/*.json (과 sessions/archive/*.json.gz)을 샤드 단위로 나눠 프로세스 풀에서 읽고,
+샤드마다 집계한 결과만 부모로 돌려받아 합친다. 파일 목록도 scandir로 흘려 보내므로
+세션 수가 수십만이어도 메모리는 (동시에 처리 중인 샤드 수 × 샤드 크기) 정도로 묶인다.
+
+    python -m chatbot.chatbot_modules.session_analytics                  # 요약 출력
+    python -m chatbot.chatbot_modules.session_analytics --export csv     # 세션별 한 행 CSV도 저장
+    python -m chatbot.chatbot_modules.session_analytics --export parquet --output stats.parquet   # pyarrow 필요
+    python -m chatbot.chatbot_modules.session_analytics --workers 8 --shard-size 2000 --json
+
+집계: 일자별 턴 수, 모드(chat/info) 비율, 프로필 감정(B1) 분포, 평균 답변 길이(전체/모드별).
+모드는 턴을 기록할 때 함께 저장하므로 그 이전 대화는 unknown으로 잡힌다.
+"""
+import os
+import sys
+import csv
+import gzip
+import json
+import time
+import shutil
+import logging
+import tempfile
+import subprocess
+import multiprocessing
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .session_archive import ARCHIVE_SUFFIX, archive_dir
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", str(min(8, os.cpu_count() or 1))))
+ANALYTICS_SHARD_SIZE = int(os.getenv("ANALYTICS_SHARD_SIZE", "1000"))  # 워커에 한 번에 넘기는 파일 수
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", os.path.join("sessions", "analytics"))
+ANALYTICS_TIMEOUT_SECONDS = float(os.getenv("ANALYTICS_TIMEOUT_SECONDS", "1800"))
+_ROOT_DIR = Path(__file__).resolve().parents[2]
+EXPORT_FORMATS = ("csv", "parquet")
+EXPORT_COLUMNS = (
+    "user_id",
+    "archived",
+    "last_visit",
+    "first_message_at",
+    "last_message_at",
+    "turns",
+    "chat_turns",
+    "info_turns",
+    "avg_answer_chars",
+    "emotion",
+)
+NO_EMOTION = "미응답"
+UNKNOWN_MODE = "unknown"
+
+
+def _empty() -> Dict[str, Any]:
+    return {
+        "files": 0,
+        "sessions": 0,
+        "unreadable": 0,
+        "messages": 0,
+        "turns": 0,
+        "turns_per_day": Counter(),
+        "turns_by_mode": Counter(),
+        "emotions": Counter(),
+        "answers_by_mode": Counter(),
+        "answer_chars_by_mode": Counter(),
+    }
+
+
+def _merge(total: Dict[str, Any], part: Dict[str, Any]) -> None:
+    for key, value in part.items():
+        if isinstance(value, Counter):
+            total[key].update(value)
+        else:
+            total[key] += value
+
+
+def _emotions(profile: Dict[str, Any]) -> List[str]:
+    """체크리스트 B1(없으면 정규화된 emotion). 여러 개 고른 경우 각각 센다."""
+    raw = profile.get("B1") or profile.get("emotion")
+    values = raw if isinstance(raw, list) else [raw]
+    cleaned = [str(v).strip() for v in values if v is not None and str(v).strip()]
+    return cleaned or [NO_EMOTION]
+
+
+def _read(path: str) -> Dict[str, Any]:
+    if path.endswith(ARCHIVE_SUFFIX):
+        with gzip.open(path, "rb") as f:
+            return json.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _account(agg: Dict[str, Any], session: Dict[str, Any]) -> Dict[str, Any]:
+    """세션 하나를 집계에 더하고 내보내기용 행을 돌려준다."""
+    history = session.get("conversation_history") or []
+    profile = session.get("user_profile") or {}
+    emotions = _emotions(profile if isinstance(profile, dict) else {})
+    turns = Counter()
+    answers = 0
+    answer_chars = 0
+    first = last = None
+    for message in history:
+        if not isinstance(message, dict):
+            continue
+        mode = message.get("mode") or UNKNOWN_MODE
+        stamp = str(message.get("timestamp") or "")
+        if stamp:
+            first = stamp if first is None or stamp < first else first
+            last = stamp if last is None or stamp > last else last
+        if message.get("role") == "user":
+            turns[mode] += 1
+            agg["turns_per_day"][stamp[:10] or UNKNOWN_MODE] += 1
+        elif message.get("role") == "assistant":
+            length = len(message.get("content") or "")
+            answers += 1
+            answer_chars += length
+            agg["answers_by_mode"][mode] += 1
+            agg["answer_chars_by_mode"][mode] += length
+
+    agg["sessions"] += 1
+    agg["messages"] += len(history)
+    agg["turns"] += sum(turns.values())
+    agg["turns_by_mode"].update(turns)
+    agg["emotions"].update(emotions)
+    return {
+        "user_id": session.get("user_id"),
+        "last_visit": session.get("last_visit") or "",
+        "first_message_at": first or "",
+        "last_message_at": last or "",
+        "turns": sum(turns.values()),
+        "chat_turns": turns.get("chat", 0),
+        "info_turns": turns.get("info", 0),
+        "avg_answer_chars": round(answer_chars / answers, 1) if answers else 0.0,
+        "emotion": "|".join(emotions),
+    }
+
+
+def scan_shard(paths: List[str], part_path: Optional[str] = None) -> Dict[str, Any]:
+    """워커 프로세스에서 실행. 파일을 하나씩 읽어 집계하고, part_path가 있으면 세션별 행을 CSV로 쓴다."""
+    agg = _empty()
+    writer = None
+    part = open(part_path, "w", encoding="utf-8", newline="") if part_path else None
+    try:
+        if part is not None:
+            writer = csv.DictWriter(part, fieldnames=EXPORT_COLUMNS)
+        for path in paths:
+            agg["files"] += 1
+            try:
+                session = _read(path)
+            except (OSError, ValueError, EOFError):
+                agg["unreadable"] += 1
+                continue
+            if not isinstance(session, dict):
+                agg["unreadable"] += 1
+                continue
+            row = _account(agg, session)
+            if writer is not None:
+                name = os.path.basename(path)
+                archived = name.endswith(ARCHIVE_SUFFIX)
+                row["user_id"] = row["user_id"] or name[: -len(ARCHIVE_SUFFIX if archived else ".json")]
+                row["archived"] = archived
+                writer.writerow(row)
+    finally:
+        if part is not None:
+            part.close()
+    return agg
+
+
+def iter_shards(storage_path: str, shard_size: int, include_archived: bool = True) -> Iterator[List[str]]:
+    """세션 파일 경로를 shard_size개씩 흘려 보낸다 (전체 목록을 한 번에 만들지 않는다)."""
+    directories: List[Tuple[str, str]] = [(storage_path, ".json")]
+    if include_archived and os.path.isdir(archive_dir(storage_path)):
+        directories.append((archive_dir(storage_path), ARCHIVE_SUFFIX))
+    shard: List[str] = []
+    for directory, suffix in directories:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix) and not entry.name.startswith(".") and entry.is_file():
+                    shard.append(entry.path)
+                    if len(shard) >= shard_size:
+                        yield shard
+                        shard = []
+    if shard:
+        yield shard
+
+
+def summarize(agg: Dict[str, Any]) -> Dict[str, Any]:
+    turns = agg["turns"]
+    answers = sum(agg["answers_by_mode"].values())
+    days = sorted(day for day in agg["turns_per_day"] if day != UNKNOWN_MODE)
+    return {
+        "sessions": agg["sessions"],
+        "unreadable": agg["unreadable"],
+        "messages": agg["messages"],
+        "turns": turns,
+        "first_day": days[0] if days else None,
+        "last_day": days[-1] if days else None,
+        "turns_per_day": {day: agg["turns_per_day"][day] for day in days},
+        "modes": {
+            mode: {"turns": count, "share": round(count / turns, 3) if turns else 0.0}
+            for mode, count in agg["turns_by_mode"].most_common()
+        },
+        "emotions": dict(agg["emotions"].most_common()),
+        "avg_answer_chars": round(sum(agg["answer_chars_by_mode"].values()) / answers, 1) if answers else 0.0,
+        "avg_answer_chars_by_mode": {
+            mode: round(agg["answer_chars_by_mode"][mode] / count, 1)
+            for mode, count in agg["answers_by_mode"].most_common()
+        },
+    }
+
+
+def _export_path(export: str, output: Optional[str]) -> str:
+    if output:
+        return output
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(ANALYTICS_DIR, f"sessions-{stamp}.{export}")
+
+
+def _write_export(parts: List[str], export: str, path: str) -> None:
+    """샤드별 CSV 조각을 하나로 합친다. parquet은 조각을 배치로 읽어 ParquetWriter로 흘려 쓴다."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if export == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as out:
+            csv.writer(out).writerow(EXPORT_COLUMNS)
+            for part in parts:
+                with open(part, "r", encoding="utf-8", newline="") as f:
+                    shutil.copyfileobj(f, out)
+        return
+
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("user_id", pa.string()),
+            ("archived", pa.bool_()),
+            ("last_visit", pa.string()),
+            ("first_message_at", pa.string()),
+            ("last_message_at", pa.string()),
+            ("turns", pa.int64()),
+            ("chat_turns", pa.int64()),
+            ("info_turns", pa.int64()),
+            ("avg_answer_chars", pa.float64()),
+            ("emotion", pa.string()),
+        ]
+    )
+    read_options = pa_csv.ReadOptions(column_names=list(EXPORT_COLUMNS))
+    convert_options = pa_csv.ConvertOptions(column_types=schema)
+    with pq.ParquetWriter(path, schema) as writer:
+        for part in parts:
+            if os.path.getsize(part) == 0:
+                continue
+            reader = pa_csv.open_csv(part, read_options=read_options, convert_options=convert_options)
+            for batch in reader:
+                writer.write_table(pa.Table.from_batches([batch], schema=schema))
+
+
+def analyze(
+    storage_path: str = "sessions",
+    workers: int = ANALYTICS_WORKERS,
+    shard_size: int = ANALYTICS_SHARD_SIZE,
+    include_archived: bool = True,
+    export: Optional[str] = None,
+    output: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    세션 저장소 전체 집계. workers가 1 이하면 현재 프로세스에서 순서대로 처리한다.
+    동시에 제출하는 샤드는 workers × 2개로 묶어, 결과가 돌아오는 대로 합치고 다음 샤드를 넣는다.
+    """
+    if export is not None and export not in EXPORT_FORMATS:
+        raise ValueError(f"export must be one of {', '.join(EXPORT_FORMATS)}")
+    if export == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow)")
+
+    started = time.perf_counter()
+    total = _empty()
+    parts_dir = tempfile.mkdtemp(prefix="analytics-parts-") if export else None
+    parts: List[str] = []
+    shards = iter_shards(storage_path, max(1, shard_size), include_archived)
+
+    def part_for(index: int) -> Optional[str]:
+        if parts_dir is None:
+            return None
+        parts.append(os.path.join(parts_dir, f"part-{index:06d}.csv"))
+        return parts[-1]
+
+    try:
+        if workers <= 1:
+            for index, shard in enumerate(shards):
+                _merge(total, scan_shard(shard, part_for(index)))
+        else:
+            # 서버 작업 스레드에서도 호출되므로 fork 대신 spawn (스레드/락 상태를 물려받지 않게)
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                pending = set()
+                index = 0
+                for shard in shards:
+                    pending.add(pool.submit(scan_shard, shard, part_for(index)))
+                    index += 1
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            _merge(total, future.result())
+                for future in pending:
+                    _merge(total, future.result())
+
+        summary = summarize(total)
+        if export:
+            path = _export_path(export, output)
+            _write_export(sorted(parts), export, path)
+            summary["export"] = {"format": export, "path": path, "rows": summary["sessions"]}
+    finally:
+        if parts_dir is not None:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    summary["scan"] = {
+        "files": total["files"],
+        "workers": max(1, workers),
+        "shard_size": shard_size,
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(total["files"] / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info(f"[Analytics] 세션 {summary['sessions']}개, 턴 {summary['turns']}개 ({elapsed:.2f}s)")
+    return summary
+
+
+def analyze_in_subprocess(
+    storage_path: str = "sessions",
+    include_archived: bool = True,
+    export: Optional[str] = None,
+    timeout: float = ANALYTICS_TIMEOUT_SECONDS,
+) -> Dict[str, Any]:
+    """
+    서버에서 호출. 이 모듈의 CLI를 별도 프로세스로 실행해 결과 JSON을 받는다.
+    spawn 워커가 서버의 __main__(main.py)을 다시 import하지 않고, 집계 메모리도 서버 프로세스 밖에 머문다.
+    """
+    command = [sys.executable, "-m", __name__, "--json", "--sessions-dir", os.path.abspath(storage_path)]
+    if not include_archived:
+        command.append("--no-archived")
+    if export:
+        command += ["--export", export, "--output", os.path.abspath(_export_path(export, None))]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(_ROOT_DIR), os.getenv("PYTHONPATH")]))}
+    proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"analytics exited with {proc.returncode}: {proc.stderr.strip()[-500:]}")
+    return json.loads(proc.stdout)
+
+
+def _print_summary(summary: Dict[str, Any], days: int) -> None:
+    scan = summary["scan"]
+    print(
+        f"세션 {summary['sessions']}개 (읽기 실패 {summary['unreadable']}), 턴 {summary['turns']}개, "
+        f"평균 답변 {summary['avg_answer_chars']}자  "
+        f"[{scan['files']}개 파일, {scan['seconds']}s, {scan['files_per_second']}개/s, 워커 {scan['workers']}]"
+    )
+    modes = ", ".join(
+        f"{mode} {m['share']:.0%} ({m['turns']}턴, 답변 {summary['avg_answer_chars_by_mode'].get(mode, 0)}자)"
+        for mode, m in summary["modes"].items()
+    )
+    print(f"모드: {modes or '-'}")
+    emotions = ", ".join(f"{name} {count}" for name, count in summary["emotions"].items())
+    print(f"감정(B1): {emotions or '-'}")
+    if summary["turns_per_day"]:
+        recent = list(summary["turns_per_day"].items())[-days:]
+        print(f"일자별 턴 ({summary['first_day']} ~ {summary['last_day']}, 최근 {len(recent)}일):")
+        for day, count in recent:
+            print(f"  {day}  {count}")
+    if "export" in summary:
+        print(f"내보내기: {summary['export']['path']} ({summary['export']['rows']}행)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="세션 저장소 통계 (병렬 스트리밍 집계)")
+    parser.add_argument("--sessions-dir", default="sessions")
+    parser.add_argument("--workers", type=int, default=ANALYTICS_WORKERS, help="1이면 프로세스 풀 없이 실행")
+    parser.add_argument("--shard-size", type=int, default=ANALYTICS_SHARD_SIZE)
+    parser.add_argument("--no-archived", action="store_true", help="아카이브된 세션은 제외")
+    parser.add_argument("--export", choices=EXPORT_FORMATS, help="세션별 한 행으로 내보내기")
+    parser.add_argument("--output", help=f"내보내기 경로 (기본: {ANALYTICS_DIR}/sessions-<시각>.<형식>)")
+    parser.add_argument("--days", type=int, default=14, help="일자별 턴 수를 출력할 최근 일수")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = analyze(
+            args.sessions_dir,
+            workers=args.workers,
+            shard_size=args.shard_size,
+            include_archived=not args.no_archived,
+            export=args.export,
+            output=args.output,
+        )
+    except RuntimeError as e:
+        parser.error(str(e))
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        _print_summary(summary, args.days)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+"""
+비활성 세션 콜드 스토리지.
+
+last_visit이 SESSION_ARCHIVE_DAYS일보다 오래된 sessions/<user_id>.json을
+sessions/archive/<user_id>.json.gz (들여쓰기 없는 JSON + gzip)로 옮긴다.
+SessionManager.load_session은 세션 파일이 없고 아카이브가 있으면 복원한 뒤 읽는다.
+
+    python -m chatbot.chatbot_modules.session_archive                 # 30일 넘은 세션 아카이브
+    python -m chatbot.chatbot_modules.session_archive --days 14 --dry-run
+    python -m chatbot.chatbot_modules.session_archive --stats --measure 20   # 절감 용량 + 복원 지연
+    python -m chatbot.chatbot_modules.session_archive --restore <user_id>
+
+cron 등으로 주기 실행한다. 서버가 떠 있는 동안 실행해도 되며, 읽는 사이에 갱신된 세션은 건너뛴다.
+"""
+import os
+import gzip
+import json
+import time
+import shutil
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_ARCHIVE_DAYS = float(os.getenv("SESSION_ARCHIVE_DAYS", "30"))
+SESSION_ARCHIVE_LEVEL = int(os.getenv("SESSION_ARCHIVE_LEVEL", "6"))  # gzip 압축 레벨
+ARCHIVE_DIRNAME = "archive"
+ARCHIVE_SUFFIX = ".json.gz"
+
+
+def archive_dir(storage_path: str) -> str:
+    return os.path.join(storage_path, ARCHIVE_DIRNAME)
+
+
+def archive_path(storage_path: str, user_id: str) -> str:
+    return os.path.join(archive_dir(storage_path), f"{user_id}{ARCHIVE_SUFFIX}")
+
+
+def _session_path(storage_path: str, user_id: str) -> str:
+    return os.path.join(storage_path, f"{user_id}.json")
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _last_active(session: Dict[str, Any], mtime: float) -> datetime:
+    """last_visit이 없거나 깨졌으면 파일 수정 시각으로 대신한다."""
+    try:
+        return datetime.fromisoformat(session.get("last_visit") or "")
+    except (TypeError, ValueError):
+        return datetime.fromtimestamp(mtime)
+
+
+def archive_session(storage_path: str, user_id: str, cutoff: Optional[datetime] = None) -> Optional[Dict[str, int]]:
+    """세션 하나를 아카이브. cutoff가 있으면 그 이후 활동이 있는 세션은 건너뛴다. {"before", "after"} 바이트."""
+    path = _session_path(storage_path, user_id)
+    try:
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        session = json.loads(raw)
+    except (OSError, ValueError) as e:
+        logger.warning(f"[Archive] 세션 읽기 실패 {user_id}: {e}")
+        return None
+    if cutoff is not None and _last_active(session, st.st_mtime) >= cutoff:
+        return None
+
+    compact = json.dumps(session, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    blob = gzip.compress(compact, compresslevel=SESSION_ARCHIVE_LEVEL, mtime=0)
+    os.makedirs(archive_dir(storage_path), exist_ok=True)
+    target = archive_path(storage_path, user_id)
+    _atomic_write(target, blob)
+
+    # 읽은 뒤 요청이 세션을 저장했으면 원본을 남기고 아카이브를 버린다
+    try:
+        latest = os.stat(path)
+    except OSError:
+        latest = None
+    if latest is None or (latest.st_mtime_ns, latest.st_size) != (st.st_mtime_ns, st.st_size):
+        os.unlink(target)
+        return None
+    os.unlink(path)
+    return {"before": len(raw), "after": len(blob)}
+
+
+def read_archived(storage_path: str, user_id: str) -> Optional[Dict[str, Any]]:
+    path = archive_path(storage_path, user_id)
+    try:
+        with gzip.open(path, "rb") as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def restore_session(storage_path: str, user_id: str) -> bool:
+    """아카이브를 세션 파일로 되돌린다. 아카이브가 없으면 False."""
+    target = archive_path(storage_path, user_id)
+    if not os.path.exists(target):
+        return False
+    try:
+        session = read_archived(storage_path, user_id)
+    except (OSError, ValueError, EOFError) as e:
+        logger.error(f"[Archive] 복원 실패 {user_id}: {e}")
+        return False
+    if session is None:
+        return False  # 다른 요청이 먼저 복원함
+    path = _session_path(storage_path, user_id)
+    if not os.path.exists(path):
+        # save_session과 같은 형식으로 쓴다
+        _atomic_write(path, json.dumps(session, indent=4, ensure_ascii=False).encode("utf-8"))
+    try:
+        os.unlink(target)
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def archive_inactive(storage_path: str = "sessions", days: float = SESSION_ARCHIVE_DAYS, dry_run: bool = False) -> Dict[str, Any]:
+    """last_visit이 days일보다 오래된 세션을 모두 아카이브."""
+    cutoff = datetime.now() - timedelta(days=days)
+    report = {"scanned": 0, "archived": 0, "bytes_before": 0, "bytes_after": 0, "users": []}
+    with os.scandir(storage_path) as entries:
+        candidates = [e for e in entries if e.is_file() and e.name.endswith(".json")]
+    for entry in candidates:
+        report["scanned"] += 1
+        # 파일 수정 시각이 cutoff 이후면 last_visit도 그 이후일 수 있으니 열어 보고, 이전이면 확실히 비활성
+        user_id = entry.name[: -len(".json")]
+        if datetime.fromtimestamp(entry.stat().st_mtime) >= cutoff:
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    session = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if _last_active(session, entry.stat().st_mtime) >= cutoff:
+                continue
+        if dry_run:
+            report["archived"] += 1
+            report["bytes_before"] += entry.stat().st_size
+            report["users"].append(user_id)
+            continue
+        result = archive_session(storage_path, user_id, cutoff)
+        if result:
+            report["archived"] += 1
+            report["bytes_before"] += result["before"]
+            report["bytes_after"] += result["after"]
+            report["users"].append(user_id)
+    logger.info(f"[Archive] {report['archived']}/{report['scanned']}개 세션 아카이브")
+    return report
+
+
+def stats(storage_path: str = "sessions") -> Dict[str, Any]:
+    """활성/아카이브 세션 수와 크기. 아카이브 원본 크기는 압축 해제 후 들여쓰기 형식 기준으로 추정."""
+    active = [e for e in os.scandir(storage_path) if e.is_file() and e.name.endswith(".json")]
+    archived = []
+    if os.path.isdir(archive_dir(storage_path)):
+        archived = [e for e in os.scandir(archive_dir(storage_path)) if e.name.endswith(ARCHIVE_SUFFIX)]
+    original = 0
+    for e in archived:
+        with gzip.open(e.path, "rb") as f:
+            original += len(json.dumps(json.loads(f.read()), indent=4, ensure_ascii=False).encode("utf-8"))
+    compressed = sum(e.stat().st_size for e in archived)
+    return {
+        "active_sessions": len(active),
+        "active_bytes": sum(e.stat().st_size for e in active),
+        "archived_sessions": len(archived),
+        "archived_bytes": compressed,
+        "archived_original_bytes": original,
+        "saved_bytes": original - compressed,
+    }
+
+
+def measure_restore(storage_path: str = "sessions", sample: int = 20) -> Dict[str, Any]:
+    """아카이브 sample개를 임시 디렉터리에 복사해 복원 시간(압축 해제 + 파싱 + 파일 쓰기)을 잰다."""
+    directory = archive_dir(storage_path)
+    names = sorted(n for n in os.listdir(directory) if n.endswith(ARCHIVE_SUFFIX))[:sample] if os.path.isdir(directory) else []
+    timings: List[float] = []
+    with tempfile.TemporaryDirectory(prefix="archive-restore-") as tmp:
+        os.makedirs(archive_dir(tmp))
+        for name in names:
+            shutil.copy2(os.path.join(directory, name), archive_dir(tmp))
+            user_id = name[: -len(ARCHIVE_SUFFIX)]
+            started = time.perf_counter()
+            restore_session(tmp, user_id)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    if not timings:
+        return {"sample": 0}
+    return {
+        "sample": len(timings),
+        "p50_ms": round(timings[len(timings) // 2], 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "max_ms": round(timings[-1], 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="비활성 세션 아카이브 (gzip 콜드 스토리지)")
+    parser.add_argument("--sessions-dir", default="sessions")
+    parser.add_argument("--days", type=float, default=SESSION_ARCHIVE_DAYS, help="이 기간 방문이 없으면 아카이브")
+    parser.add_argument("--dry-run", action="store_true", help="옮기지 않고 대상만 출력")
+    parser.add_argument("--stats", action="store_true", help="아카이브하지 않고 현황(절감 용량)만 출력")
+    parser.add_argument("--measure", type=int, default=0, metavar="N", help="아카이브 N개로 복원 지연 측정")
+    parser.add_argument("--restore", metavar="USER_ID", help="해당 사용자 세션을 즉시 복원")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    if args.restore:
+        ok = restore_session(args.sessions_dir, args.restore)
+        print("복원했습니다" if ok else "아카이브가 없습니다")
+        return 0 if ok else 1
+
+    output: Dict[str, Any] = {}
+    if not args.stats:
+        output["archive"] = archive_inactive(args.sessions_dir, args.days, dry_run=args.dry_run)
+    output["stats"] = stats(args.sessions_dir)
+    if args.measure:
+        output["restore"] = measure_restore(args.sessions_dir, args.measure)
+
+    if args.json:
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+        return 0
+    if "archive" in output:
+        a = output["archive"]
+        suffix = "  (dry-run)" if args.dry_run else f"  {a['bytes_before'] / 1024:.1f}KB → {a['bytes_after'] / 1024:.1f}KB"
+        print(f"아카이브: {a['archived']}/{a['scanned']}개 (마지막 방문 {args.days:g}일 초과){suffix}")
+    s = output["stats"]
+    print(
+        f"활성 {s['active_sessions']}개 {s['active_bytes'] / 1024:.1f}KB / "
+        f"아카이브 {s['archived_sessions']}개 {s['archived_bytes'] / 1024:.1f}KB "
+        f"(원본 {s['archived_original_bytes'] / 1024:.1f}KB, 절감 {s['saved_bytes'] / 1024:.1f}KB)"
+    )
+    if "restore" in output:
+        r = output["restore"]
+        if r["sample"]:
+            print(f"복원 지연 ({r['sample']}개): p50 {r['p50_ms']}ms  p95 {r['p95_ms']}ms  max {r['max_ms']}ms")
+        else:
+            print("복원 지연: 아카이브가 없습니다")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,73 @@
 import os
 import json
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+
+from .keywords import update_stats
+from .diagnostics import register_cache
+from .metrics import observe_stage
+from .session_archive import archive_path, restore_session
+from . import tracing
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "512"))
+
+# 파일 경로 -> ((mtime_ns, size), 세션). 여러 SessionManager 인스턴스가 공유하며,
+# 파일이 바뀌지 않았으면 JSON 파싱 없이 복사본을 돌려준다.
+_session_cache: "OrderedDict[str, Tuple[Tuple[int, int], Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _copy_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """호출부가 수정하는 프로필/대화 기록만 복사 (deepcopy보다 훨씬 가볍다)."""
+    copied = dict(session)
+    if isinstance(session.get("user_profile"), dict):
+        copied["user_profile"] = dict(session["user_profile"])
+    if isinstance(session.get("conversation_history"), list):
+        copied["conversation_history"] = [dict(m) if isinstance(m, dict) else m for m in session["conversation_history"]]
+    return copied
+
+
+def _cache_put(path: str, version: Optional[Tuple[int, int]], session: Dict[str, Any]):
+    if version is None or SESSION_CACHE_SIZE <= 0:
+        return
+    with _cache_lock:
+        _session_cache[path] = (version, _copy_session(session))
+        _session_cache.move_to_end(path)
+        while len(_session_cache) > SESSION_CACHE_SIZE:
+            _session_cache.popitem(last=False)
+
+
+def _cache_get(path: str) -> Optional[Dict[str, Any]]:
+    version = _file_version(path)
+    with _cache_lock:
+        cached = _session_cache.get(path)
+        if cached is None or version is None or cached[0] != version:
+            return None
+        _session_cache.move_to_end(path)
+        return _copy_session(cached[1])
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _session_cache.clear()
+
+
+register_cache("session_cache", lambda: len(_session_cache), clear_cache)
+
 
 class SessionManager:
     """간단한 파일 기반 세션/프로필 관리기."""
@@ -21,9 +82,21 @@ class SessionManager:
 
     def load_session(self, user_id: str) -> Dict[str, Any]:
         """세션 로드 (필요 필드가 없으면 기본값 채움)."""
+        with observe_stage("session_load"), tracing.span("session_load"):
+            return self._load_session(user_id)
+
+    def _load_session(self, user_id: str) -> Dict[str, Any]:
         file_path = self._get_file_path(user_id)
+        cached = _cache_get(file_path)
+        if cached is not None:
+            return cached
+        if not os.path.exists(file_path) and os.path.exists(archive_path(self.storage_path, user_id)):
+            # 오래 방문하지 않아 아카이브된 세션은 이번 방문에 되살린다
+            with observe_stage("session_restore"):
+                restore_session(self.storage_path, user_id)
         if os.path.exists(file_path):
             try:
+                version = _file_version(file_path)
                 with open(file_path, "r", encoding="utf-8") as f:
                     session = json.load(f)
                     session.setdefault("last_visit", None)
@@ -37,7 +110,8 @@ class SessionManager:
                             "activity_range": "",
                         },
                     )
-                    return session
+                _cache_put(file_path, version, session)
+                return session
             except Exception as e:
                 logger.error(f"세션 로드 실패: {e}")
 
@@ -55,8 +129,10 @@ class SessionManager:
     def save_session(self, user_id: str, data: Dict[str, Any]):
         file_path = self._get_file_path(user_id)
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            with observe_stage("session_save"), tracing.span("session_save"):
+                with open(file_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
+                _cache_put(file_path, _file_version(file_path), data)
         except Exception as e:
             logger.error(f"세션 저장 실패: {e}")
 
@@ -90,6 +166,28 @@ class SessionManager:
         session["conversation_history"].append(message_entry)
         self.save_session(user_id, session)
 
+    def record_turn(self, user_id: str, user_text: str, assistant_text: str, mode: Optional[str] = None) -> Dict[str, Any]:
+        """한 턴(사용자 발화 + 응답)을 기록하고 마지막 방문 시간을 갱신 (로드/저장 1회). 저장한 세션을 돌려준다."""
+        session = self.load_session(user_id)
+        self.append_turn(session, user_text, assistant_text, mode)
+        self.save_session(user_id, session)
+        return session
+
+    @staticmethod
+    def append_turn(session: Dict[str, Any], user_text: str, assistant_text: str, mode: Optional[str] = None):
+        """메모리 세션에 한 턴을 추가 (저장은 호출부에서). mode는 통계용으로 두 메시지에 함께 남긴다."""
+        now = datetime.now().isoformat()
+        extra = {"mode": mode} if mode else {}
+        session.setdefault("conversation_history", []).extend(
+            [
+                {"timestamp": now, "role": "user", "content": user_text, **extra},
+                {"timestamp": now, "role": "assistant", "content": assistant_text, **extra},
+            ]
+        )
+        session["last_visit"] = now
+        # 질문 검색 키워드는 사용자 발화만으로 누적 (툴이 매번 대화를 다시 훑지 않도록)
+        session["keyword_stats"] = update_stats(session.get("keyword_stats"), user_text)
+
     def update_last_visit(self, user_id: str):
         """마지막 방문 시간 업데이트."""
         session = self.load_session(user_id)
@@ -104,7 +202,11 @@ class SessionManager:
 
     def get_welcome_message(self, user_id: str) -> str:
         """재접속 간격에 따른 환영 인사 생성."""
-        session = self.load_session(user_id)
+        return self.build_welcome_message(self.load_session(user_id))
+
+    @staticmethod
+    def build_welcome_message(session: Dict[str, Any]) -> str:
+        """이미 로드한 세션으로 환영 인사 생성 (파일 재조회 없음)."""
         name = session.get("user_profile", {}).get("name", "") or session.get("user_profile", {}).get("A1", "")
         last_visit_str = session.get("last_visit")
 
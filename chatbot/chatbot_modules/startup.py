@@ -0,0 +1,109 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# lazy: 서버가 먼저 뜨고(/api/health 응답) 엔진 생성·데이터 로드는 백그라운드 기동 단계에서
+# eager: 예전처럼 import 시점에 전부 (실패하면 프로세스가 바로 죽는다)
+STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy").lower()
+STARTUP_WAIT_SECONDS = float(os.getenv("STARTUP_WAIT_SECONDS", "60"))  # 요청이 기동 완료를 기다리는 상한
+
+
+class StartupTimeoutError(RuntimeError):
+    """기동 단계가 STARTUP_WAIT_SECONDS 안에 끝나지 않음."""
+
+
+class Startup:
+    """
+    서버 기동 단계 관리. 무거운 초기화(데이터 로드, LangGraph 엔진 생성, 작업 워커)를
+    이름 붙은 단계로 등록해 한 번만 실행하고, 단계별 소요 시간을 로그와 /api/health에 남긴다.
+    """
+
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[], Any]]] = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.phases: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.ready_after: Optional[float] = None
+        self.origin = time.perf_counter()  # ready_after 기준 시각 (main.py가 자기 import 시작 시각으로 덮어쓴다)
+
+    def step(self, name: str):
+        """@startup.step("engine") 형태로 기동 단계 등록 (등록 순서대로 실행)."""
+
+        def decorator(fn: Callable[[], Any]) -> Callable[[], Any]:
+            self._steps.append((name, fn))
+            return fn
+
+        return decorator
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = round(seconds, 4)
+        logger.info(f"[Startup] {name}: {seconds * 1000:.0f}ms")
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def run(self) -> None:
+        """등록된 단계를 한 번만 실행. 다른 스레드가 실행 중이면 끝날 때까지 기다린다."""
+        if self._ready.is_set():
+            return
+        with self._lock:
+            if self._ready.is_set():
+                return
+            try:
+                for name, fn in self._steps:
+                    if name in self.phases:  # 이전 시도에서 성공한 단계는 건너뜀
+                        continue
+                    started = time.perf_counter()
+                    fn()
+                    self.record(name, time.perf_counter() - started)
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                logger.error(f"[Startup] 기동 실패: {self.error}")
+                raise
+            self.error = None
+            self.ready_after = round(time.perf_counter() - self.origin, 4)
+            self._ready.set()
+        logger.info(f"[Startup] 준비 완료 ({STARTUP_MODE}, {self.ready_after:.2f}s)")
+
+    def start_background(self) -> None:
+        """서버 기동 직후 호출. 요청을 막지 않고 백그라운드에서 run()."""
+        if self._ready.is_set() or self._thread is not None:
+            return
+
+        def target():
+            try:
+                self.run()
+            except Exception:
+                pass  # error에 기록됨. 다음 요청의 ensure()가 다시 시도한다.
+
+        self._thread = threading.Thread(target=target, name="startup", daemon=True)
+        self._thread.start()
+
+    def ensure(self, timeout: float = STARTUP_WAIT_SECONDS) -> None:
+        """요청 처리 전에 기동 완료 보장 (스레드풀에서 호출)."""
+        if self._ready.is_set():
+            return
+        if self._thread is not None and self._thread.is_alive():
+            if not self._ready.wait(timeout):
+                raise StartupTimeoutError(f"startup not finished in {timeout:.0f}s")
+            return
+        self.run()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "mode": STARTUP_MODE,
+            "ready": self.ready,
+            "ready_after_seconds": self.ready_after,
+            "phases": dict(self.phases),
+            "error": self.error,
+        }
+
+
+startup = Startup()
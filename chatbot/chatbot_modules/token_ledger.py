@@ -0,0 +1,284 @@
+import os
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from .diagnostics import register_cache
+from .request_context import current_mode, current_node, current_user_id
+from .tracing import current_request_id
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+TOKEN_LEDGER_ENABLED = os.getenv("TOKEN_LEDGER_ENABLED", "1").lower() not in ("0", "false", "no")
+TOKEN_LEDGER_DIR = os.getenv("TOKEN_LEDGER_DIR", os.path.join("logs", "tokens"))
+# 일일 토큰 예산 (prompt + completion, 0이면 제한 없음)
+TOKEN_BUDGET_USER_DAILY = int(os.getenv("TOKEN_BUDGET_USER_DAILY", "0"))
+TOKEN_BUDGET_GLOBAL_DAILY = int(os.getenv("TOKEN_BUDGET_GLOBAL_DAILY", "0"))
+# 예산 대비 사용 비율에 따라 단계적으로 저렴하게: soft → 짧은 맥락, 1.0 → 작은 모델, hard → 툴 없음
+TOKEN_BUDGET_SOFT_RATIO = float(os.getenv("TOKEN_BUDGET_SOFT_RATIO", "0.8"))
+TOKEN_BUDGET_HARD_RATIO = float(os.getenv("TOKEN_BUDGET_HARD_RATIO", "1.2"))
+DEFAULT_HISTORY_LIMIT = 8
+BUDGET_HISTORY_LIMIT = int(os.getenv("TOKEN_BUDGET_HISTORY_LIMIT", "4"))
+
+
+class BudgetPolicy(NamedTuple):
+    """이번 턴에 적용할 토큰 절약 정책."""
+
+    level: str = "normal"  # normal | soft | over | hard
+    history_limit: int = DEFAULT_HISTORY_LIMIT
+    use_small_model: bool = False
+    allow_tools: bool = True
+    reason: str = ""
+
+
+NORMAL_POLICY = BudgetPolicy()
+
+
+def _cached_tokens(response: Any) -> int:
+    """OpenAI prompt caching으로 재사용된 입력 토큰 수 (없으면 0)."""
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return int(details.get("cached_tokens") or 0)
+
+
+def _tool_outputs(messages: List[Any]) -> Dict[str, int]:
+    """마지막 사용자 발화 이후 프롬프트에 들어간 툴 결과 (툴 이름 → 글자 수)."""
+    names_by_call: Dict[str, str] = {}
+    outputs: Dict[str, int] = {}
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            break
+        if isinstance(msg, AIMessage):
+            for call in msg.tool_calls or []:
+                names_by_call[call.get("id", "")] = call.get("name", "")
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            break
+        if isinstance(msg, ToolMessage):
+            name = msg.name or names_by_call.get(msg.tool_call_id, "") or "unknown"
+            outputs[name] = outputs.get(name, 0) + len(str(msg.content))
+    return outputs
+
+
+class TokenLedger:
+    """LLM 호출별 토큰 사용량을 일자별 JSONL로 기록하고 일일 예산을 관리."""
+
+    def __init__(self, ledger_dir: str = TOKEN_LEDGER_DIR):
+        self.ledger_dir = ledger_dir
+        self._lock = threading.Lock()
+        self._day: Optional[str] = None
+        self._user_totals: Dict[str, int] = defaultdict(int)
+        self._global_total = 0
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.ledger_dir, f"{day}.jsonl")
+
+    def _roll_day(self) -> str:
+        """날짜가 바뀌면 카운터를 오늘 원장 기준으로 다시 채운다 (재시작 후에도 예산 유지). lock 안에서 호출."""
+        today = date.today().isoformat()
+        if self._day == today:
+            return today
+        self._day = today
+        self._user_totals = defaultdict(int)
+        self._global_total = 0
+        for record in _read_records([self._path(today)]):
+            tokens = record.get("prompt_tokens", 0) + record.get("completion_tokens", 0)
+            self._user_totals[record.get("user_id") or "-"] += tokens
+            self._global_total += tokens
+        return today
+
+    def record(self, model: str, messages: List[Any], response: Any, latency: float):
+        """LLM 호출 1건 기록 (LLMClient에서 호출)."""
+        if not TOKEN_LEDGER_ENABLED:
+            return
+        usage = getattr(response, "usage_metadata", None) or {}
+        user_id = current_user_id.get() or "-"
+        entry = {
+            "ts": round(time.time(), 3),
+            "request_id": current_request_id(),
+            "user_id": user_id,
+            "mode": current_mode.get(),
+            "node": current_node.get(),
+            "model": model,
+            "prompt_tokens": int(usage.get("input_tokens", 0)),
+            "completion_tokens": int(usage.get("output_tokens", 0)),
+            "cached_tokens": _cached_tokens(response),
+            "latency": round(latency, 3),
+            "tool_outputs": _tool_outputs(messages),
+            "tool_calls": [c.get("name") for c in getattr(response, "tool_calls", None) or []],
+        }
+        tokens = entry["prompt_tokens"] + entry["completion_tokens"]
+        line = json.dumps(entry, ensure_ascii=False)
+        try:
+            with self._lock:
+                day = self._roll_day()
+                self._user_totals[user_id] += tokens
+                self._global_total += tokens
+                os.makedirs(self.ledger_dir, exist_ok=True)
+                with open(self._path(day), "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            logger.warning(f"[TokenLedger] 기록 실패: {e}")
+
+    def usage(self, user_id: str) -> Dict[str, int]:
+        with self._lock:
+            self._roll_day()
+            return {"user": self._user_totals.get(user_id, 0), "global": self._global_total}
+
+    def policy_for(self, user_id: str) -> BudgetPolicy:
+        """오늘 사용량과 예산을 비교해 이번 턴의 절약 정책을 정한다."""
+        if not TOKEN_LEDGER_ENABLED or not (TOKEN_BUDGET_USER_DAILY or TOKEN_BUDGET_GLOBAL_DAILY):
+            return NORMAL_POLICY
+        used = self.usage(user_id)
+        ratios = []
+        if TOKEN_BUDGET_USER_DAILY:
+            ratios.append((used["user"] / TOKEN_BUDGET_USER_DAILY, "user"))
+        if TOKEN_BUDGET_GLOBAL_DAILY:
+            ratios.append((used["global"] / TOKEN_BUDGET_GLOBAL_DAILY, "global"))
+        ratio, scope = max(ratios)
+        reason = f"{scope} {ratio:.0%}"
+        if ratio >= TOKEN_BUDGET_HARD_RATIO:
+            return BudgetPolicy("hard", BUDGET_HISTORY_LIMIT, True, False, reason)
+        if ratio >= 1.0:
+            return BudgetPolicy("over", BUDGET_HISTORY_LIMIT, True, True, reason)
+        if ratio >= TOKEN_BUDGET_SOFT_RATIO:
+            return BudgetPolicy("soft", BUDGET_HISTORY_LIMIT, False, True, reason)
+        return NORMAL_POLICY
+
+
+ledger = TokenLedger()
+register_cache("token_ledger_users", lambda: len(ledger._user_totals))  # 날짜가 바뀌면 비워진다
+
+
+# ---------------------------------------------------------------------------
+# Report: python -m chatbot.chatbot_modules.token_ledger [--days N]
+# ---------------------------------------------------------------------------
+def _read_records(paths: Iterable[str]):
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _percentile(values: List[int], pct: float) -> int:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct * (len(values) - 1))))]
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """턴/모드/노드/모델/툴별 토큰 합계."""
+
+    def bucket():
+        return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "latency": 0.0}
+
+    def add(b, r):
+        b["calls"] += 1
+        b["prompt_tokens"] += r.get("prompt_tokens", 0)
+        b["completion_tokens"] += r.get("completion_tokens", 0)
+        b["cached_tokens"] += r.get("cached_tokens", 0)
+        b["latency"] += r.get("latency", 0.0)
+
+    groups: Dict[str, Dict[str, Dict[str, Any]]] = {
+        "mode": defaultdict(bucket),
+        "node": defaultdict(bucket),
+        "model": defaultdict(bucket),
+        "user": defaultdict(bucket),
+    }
+    # 툴 결과가 들어간 후속 호출의 입력 토큰을 해당 툴 몫으로 본다.
+    tools: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "output_chars": 0, "followup_prompt_tokens": 0})
+    turns: Dict[str, int] = defaultdict(int)
+    total = bucket()
+
+    for r in records:
+        add(total, r)
+        for key, field in (("mode", "mode"), ("node", "node"), ("model", "model"), ("user", "user_id")):
+            add(groups[key][r.get(field) or "-"], r)
+        for name in r.get("tool_calls") or []:
+            tools[name]["calls"] += 1
+        for name, chars in (r.get("tool_outputs") or {}).items():
+            tools[name]["output_chars"] += chars
+            tools[name]["followup_prompt_tokens"] += r.get("prompt_tokens", 0)
+        if r.get("request_id"):
+            turns[r["request_id"]] += r.get("prompt_tokens", 0) + r.get("completion_tokens", 0)
+
+    per_turn = list(turns.values())
+    return {
+        "total": total,
+        "turns": {
+            "count": len(per_turn),
+            "avg_tokens": round(sum(per_turn) / len(per_turn), 1) if per_turn else 0,
+            "p50_tokens": _percentile(per_turn, 0.5),
+            "p95_tokens": _percentile(per_turn, 0.95),
+        },
+        **{key: dict(value) for key, value in groups.items()},
+        "tool": dict(tools),
+    }
+
+
+def _print_table(title: str, rows: Dict[str, Dict[str, Any]], limit: int = 20):
+    print(f"\n[{title}]")
+    print(f"{'name':<28}{'calls':>7}{'prompt':>11}{'completion':>12}{'cached':>9}{'cache%':>8}{'avg s':>8}")
+    ordered = sorted(rows.items(), key=lambda kv: kv[1]["prompt_tokens"] + kv[1]["completion_tokens"], reverse=True)
+    for name, b in ordered[:limit]:
+        avg = b["latency"] / b["calls"] if b["calls"] else 0.0
+        cached_ratio = b["cached_tokens"] / b["prompt_tokens"] if b["prompt_tokens"] else 0.0
+        print(
+            f"{name[:27]:<28}{b['calls']:>7}{b['prompt_tokens']:>11}{b['completion_tokens']:>12}"
+            f"{b['cached_tokens']:>9}{cached_ratio:>8.1%}{avg:>8.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="토큰 사용량 리포트")
+    parser.add_argument("--days", type=int, default=1, help="오늘 포함 최근 N일")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    today = date.today()
+    days = [(today - timedelta(days=i)).isoformat() for i in range(args.days)]
+    report = summarize(_read_records(os.path.join(TOKEN_LEDGER_DIR, f"{d}.jsonl") for d in reversed(days)))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    total = report["total"]
+    cached_ratio = total["cached_tokens"] / total["prompt_tokens"] if total["prompt_tokens"] else 0.0
+    turns = report["turns"]
+    print(f"기간: {days[-1]} ~ {days[0]}  ({TOKEN_LEDGER_DIR})")
+    print(
+        f"LLM 호출 {total['calls']}건, prompt {total['prompt_tokens']} / completion {total['completion_tokens']}, "
+        f"cached {cached_ratio:.1%}"
+    )
+    print(
+        f"턴 {turns['count']}건, 턴당 평균 {turns['avg_tokens']} / p50 {turns['p50_tokens']} / "
+        f"p95 {turns['p95_tokens']} tokens"
+    )
+    for key, title in (("mode", "모드별"), ("node", "노드별"), ("model", "모델별"), ("user", "사용자별 (상위)")):
+        _print_table(title, report[key])
+    print("\n[툴별]")
+    print(f"{'tool':<34}{'calls':>7}{'output chars':>14}{'followup prompt':>17}")
+    for name, t in sorted(report["tool"].items(), key=lambda kv: kv[1]["followup_prompt_tokens"], reverse=True):
+        print(f"{name[:33]:<34}{t['calls']:>7}{t['output_chars']:>14}{t['followup_prompt_tokens']:>17}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
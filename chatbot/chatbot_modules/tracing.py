@@ -0,0 +1,348 @@
+import os
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1").lower() not in ("0", "false", "no")
+TRACE_DIR = os.getenv("TRACE_DIR", "logs")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # traces.jsonl 기록 비율
+TRACE_SLOW_SECONDS = float(os.getenv("TRACE_SLOW_SECONDS", "8"))  # 이보다 느린 요청은 항상 slow 로그에 기록
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(5 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "3"))
+TRACE_FILE = "traces.jsonl"
+SLOW_FILE = "slow_requests.jsonl"
+
+
+class Span:
+    """트레이스 안의 구간 하나 (시작 오프셋/길이/속성)."""
+
+    __slots__ = ("span_id", "parent_id", "name", "start", "end", "attrs", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+
+class _NullSpan:
+    """트레이스가 없을 때 쓰는 빈 span (호출부가 분기하지 않도록)."""
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """요청 1건의 span 모음. 여러 스레드(툴/LLM 헤지)에서 span이 추가된다."""
+
+    def __init__(self, request_id: str, name: str, attrs: Dict[str, Any]):
+        self.request_id = request_id
+        self.started_at = time.time()
+        self.root = Span(name, None, attrs)
+        self._spans: List[Span] = [self.root]
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        t0 = self.root.start
+        with self._lock:
+            spans = list(self._spans)
+        rows = []
+        for s in spans:
+            rows.append(
+                {
+                    "id": s.span_id,
+                    "parent": s.parent_id,
+                    "name": s.name,
+                    "start": round(s.start - t0, 4),
+                    # 헤지에서 진 LLM 호출처럼 요청이 끝난 뒤에도 진행 중이면 None
+                    "duration": round(s.end - s.start, 4) if s.end is not None else None,
+                    "attrs": s.attrs,
+                    **({"error": s.error} if s.error else {}),
+                }
+            )
+        return {
+            "request_id": self.request_id,
+            "timestamp": self.started_at,
+            "duration": rows[0]["duration"],
+            "prompt_tokens": sum(s.attrs.get("prompt_tokens", 0) for s in spans),
+            "completion_tokens": sum(s.attrs.get("completion_tokens", 0) for s in spans),
+            "spans": rows,
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+_writers: Dict[str, logging.Logger] = {}
+_writers_lock = threading.Lock()
+
+
+def _writer(filename: str) -> logging.Logger:
+    """파일별 회전 JSONL 기록기 (처음 쓸 때 생성)."""
+    writer = _writers.get(filename)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(filename)
+            if writer is None:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                handler = RotatingFileHandler(
+                    os.path.join(TRACE_DIR, filename),
+                    maxBytes=TRACE_MAX_BYTES,
+                    backupCount=TRACE_BACKUP_COUNT,
+                    encoding="utf-8",
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                writer = logging.getLogger(f"lifeclover.trace.{filename}")
+                writer.setLevel(logging.INFO)
+                writer.propagate = False
+                writer.addHandler(handler)
+                _writers[filename] = writer
+    return writer
+
+
+def _emit(trace: Trace):
+    record = trace.to_dict()
+    slow = record["duration"] is not None and record["duration"] >= TRACE_SLOW_SECONDS
+    sampled = random.random() < TRACE_SAMPLE_RATE
+    if not (slow or sampled):
+        return
+    try:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        if sampled:
+            _writer(TRACE_FILE).info(line)
+        if slow:
+            _writer(SLOW_FILE).info(line)
+            logger.warning(f"[Trace] 느린 요청 {trace.request_id}: {record['duration']:.2f}s")
+    except Exception as e:
+        logger.warning(f"[Trace] 기록 실패 {trace.request_id}: {e}")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def trace(request_id: str, name: str = "request", **attrs):
+    """요청 1건의 루트 span. 블록이 끝나면 traces.jsonl(및 slow 로그)에 기록."""
+    if not TRACE_ENABLED:
+        yield _NULL_SPAN
+        return
+    tr = Trace(request_id, name, attrs)
+    trace_token = _current_trace.set(tr)
+    span_token = _current_span.set(tr.root)
+    try:
+        yield tr.root
+    except BaseException as e:
+        tr.root.error = repr(e)
+        raise
+    finally:
+        tr.root.finish()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        _emit(tr)
+
+
+def _start_span(name: str, attrs: Dict[str, Any]) -> Optional[Span]:
+    tr = _current_trace.get()
+    if tr is None:
+        return None
+    parent = _current_span.get()
+    s = Span(name, parent.span_id if parent else None, attrs)
+    tr.add(s)
+    return s
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """현재 트레이스에 하위 span 추가. 트레이스 밖에서는 아무것도 하지 않는다."""
+    s = _start_span(name, attrs)
+    if s is None:
+        yield _NULL_SPAN
+        return
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = repr(e)
+        raise
+    finally:
+        s.finish()
+        _current_span.reset(token)
+
+
+def event(name: str, **attrs):
+    """길이 0인 span (라우터 분기 같은 결정 기록용)."""
+    s = _start_span(name, attrs)
+    if s is not None:
+        s.finish()
+
+
+def annotate(**attrs):
+    """현재 span에 속성 추가."""
+    s = _current_span.get()
+    if s is not None and _current_trace.get() is not None:
+        s.set(**attrs)
+
+
+class ToolTraceCallback(BaseCallbackHandler):
+    """툴 실행마다 span을 만들고, 툴 본문에서 열리는 검색 span이 그 아래에 붙도록 한다."""
+
+    def __init__(self):
+        self._open: Dict[UUID, Any] = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, inputs=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        s = _start_span(f"tool:{name}", {"args": inputs if inputs is not None else input_str})
+        if s is not None:
+            # 콜백은 툴 본문과 같은 컨텍스트에서 동기 실행되므로 현재 span을 바꿔 둘 수 있다.
+            self._open[run_id] = (s, _current_span.set(s))
+
+    def _close(self, run_id: UUID, error: Optional[BaseException] = None):
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        s, token = opened
+        if error is not None:
+            s.error = repr(error)
+        s.finish()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            pass  # 다른 컨텍스트에서 끝난 경우 (시작 컨텍스트는 이미 사라짐)
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        self._close(run_id)
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs):
+        self._close(run_id, error)
+
+
+def callbacks() -> list:
+    """LangChain/LangGraph config["callbacks"]에 넣을 핸들러 목록."""
+    return [ToolTraceCallback()] if TRACE_ENABLED else []
+
+
+# ---------------------------------------------------------------------------
+# CLI: python -m chatbot.chatbot_modules.tracing <request_id>
+# ---------------------------------------------------------------------------
+def _trace_files(filename: str) -> List[str]:
+    base = os.path.join(TRACE_DIR, filename)
+    paths = [base] + [f"{base}.{i}" for i in range(1, TRACE_BACKUP_COUNT + 1)]
+    return [p for p in paths if os.path.exists(p)]
+
+
+def _iter_records(filenames: List[str]):
+    for filename in filenames:
+        for path in _trace_files(filename):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+
+def find_trace(request_id: str) -> Optional[Dict[str, Any]]:
+    for record in _iter_records([TRACE_FILE, SLOW_FILE]):
+        if record.get("request_id") == request_id:
+            return record
+    return None
+
+
+def _format_attrs(attrs: Dict[str, Any]) -> str:
+    return " ".join(f"{k}={json.dumps(v, ensure_ascii=False, default=str)}" for k, v in attrs.items())
+
+
+def render_waterfall(record: Dict[str, Any], width: int = 40) -> str:
+    """span 트리를 시작 시각 순으로 들여쓰기 + 막대로 출력."""
+    spans = record["spans"]
+    total = record.get("duration") or max((s["start"] + (s["duration"] or 0)) for s in spans) or 1e-9
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        children.setdefault(s["parent"], []).append(s)
+
+    lines = [
+        f"request {record['request_id']}  total={total:.3f}s  "
+        f"tokens={record.get('prompt_tokens', 0)}/{record.get('completion_tokens', 0)}"
+    ]
+
+    def walk(parent_id: Optional[str], depth: int):
+        for s in sorted(children.get(parent_id, []), key=lambda x: x["start"]):
+            duration = s["duration"]
+            begin = int(width * s["start"] / total)
+            length = max(1, int(width * (duration if duration is not None else total - s["start"]) / total))
+            bar = " " * begin + ("█" if duration is not None else "░") * min(length, width - begin)
+            took = f"{duration:7.3f}s" if duration is not None else "  (open)"
+            label = "  " * depth + s["name"]
+            if s.get("error"):
+                label += " !"
+            lines.append(f"{s['start']:7.3f}s {took} |{bar:<{width}}| {label}  {_format_attrs(s['attrs'])}".rstrip())
+            walk(s["id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="요청 트레이스 waterfall 출력")
+    parser.add_argument("request_id", nargs="?", help="ChatResponse.request_id")
+    parser.add_argument("--slow", action="store_true", help="느린 요청 목록 출력")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.slow or not args.request_id:
+        records = sorted(_iter_records([SLOW_FILE]), key=lambda r: r.get("timestamp", 0), reverse=True)
+        for r in records[: args.limit]:
+            root = r["spans"][0]["attrs"] if r.get("spans") else {}
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r.get("timestamp", 0)))
+            print(f"{stamp}  {r['request_id']}  {r['duration']:.2f}s  {_format_attrs(root)}")
+        return 0
+
+    record = find_trace(args.request_id)
+    if record is None:
+        print(f"트레이스를 찾을 수 없습니다: {args.request_id} ({TRACE_DIR})")
+        return 1
+    print(render_waterfall(record))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,273 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .diagnostics import register_cache
+from .metrics import observe_stage
+from .search_info import detect_region
+
+logger = logging.getLogger(__name__)
+
+MEMORY_DIR = os.getenv("USER_MEMORY_DIR", os.path.join("sessions", "memory"))
+MEMORY_CACHE_SIZE = int(os.getenv("USER_MEMORY_CACHE_SIZE", "512"))
+MAX_CONCERNS = 5
+
+# 발화에서 사실을 뽑는 규칙. (?<![가-힣]) 는 '어린 시절에'의 '절에'처럼 단어 중간 매칭을 막는다.
+RELIGION_PATTERNS = {
+    "기독교": r"교회|기독교|개신교|목사님|하나님|찬송",
+    "천주교": r"성당|천주교|신부님|미사|성모",
+    "불교": r"불교|스님|부처님|(?<![가-힣])절에|사찰|염불",
+    "무교": r"종교가 없|종교는 없|무교",
+}
+FAMILY_PATTERNS = {
+    "배우자": r"남편|아내|집사람|영감|마누라|와이프",
+    "자녀": r"아들|딸(?!기)|자식|자녀",
+    "손주": r"손주|손자|손녀",
+    "부모": r"어머니|아버지|엄마|아빠|부모님",
+    "형제": r"형님|누나|언니|오빠|동생|형제",
+}
+BEREAVED_PATTERN = r"돌아가|세상을 떠|먼저 갔|먼저 간|여의|사별|하늘나라"
+LIVING_ALONE_PATTERN = r"(혼자|홀로) ?(살|사는|지내)|독거"
+# 거주지를 말할 때 쓰는 표현. 이런 표현 없이 지역만 나오면 다른 지역을 묻는 경우가 많아 기존 값을 덮지 않는다.
+RESIDENCE_PATTERN = r"살아|살고|사는|살았|거주|우리 ?동네|사니까"
+CONCERN_PATTERNS = {
+    "장례": r"장례|화장|납골|봉안|묘지|수목장|자연장",
+    "상속/유언": r"상속|유산|유언",
+    "연명의료": r"연명|사전의료|호스피스",
+    "건강": r"병원|아프|통증|수술|투병",
+    "디지털 유산": r"디지털|계정|사진 정리",
+    "외로움": r"외롭|쓸쓸|적적",
+    "비용": r"비용|장려금|지원금|돈이",
+}
+
+
+def _empty_memory() -> Dict[str, Any]:
+    return {
+        "region": None,
+        "religion": None,
+        "family": {"mentioned": [], "bereaved": [], "living_alone": None},
+        "concerns": [],
+        "history_summary": None,
+        "history_summary_until": 0,
+        "turns": 0,
+        "updated_at": None,
+    }
+
+
+def extract_facts(text: str) -> Dict[str, Any]:
+    """한 발화에서 규칙 기반으로 사실 추출 (LLM 호출 없음)."""
+    facts: Dict[str, Any] = {}
+    region = detect_region([text])
+    if region:
+        facts["region"] = region
+        facts["region_is_residence"] = bool(re.search(RESIDENCE_PATTERN, text))
+    for religion, pattern in RELIGION_PATTERNS.items():
+        if re.search(pattern, text):
+            facts["religion"] = religion
+            break
+
+    mentioned, bereaved = [], []
+    for sentence in re.split(r"[.!?\n]", text):
+        lost = re.search(BEREAVED_PATTERN, sentence)
+        for relation, pattern in FAMILY_PATTERNS.items():
+            if re.search(pattern, sentence):
+                mentioned.append(relation)
+                if lost:
+                    bereaved.append(relation)
+    if mentioned:
+        facts["family_mentioned"] = sorted(set(mentioned))
+    if bereaved:
+        facts["family_bereaved"] = sorted(set(bereaved))
+    if re.search(LIVING_ALONE_PATTERN, text):
+        facts["living_alone"] = True
+
+    concerns = [topic for topic, pattern in CONCERN_PATTERNS.items() if re.search(pattern, text)]
+    if concerns:
+        facts["concerns"] = concerns
+    return facts
+
+
+def merge_facts(memory: Dict[str, Any], facts: Dict[str, Any], now: Optional[str] = None) -> Dict[str, Any]:
+    """추출한 사실을 기존 기억에 합친다 (최근 발화 우선)."""
+    now = now or datetime.now().isoformat(timespec="seconds")
+    # 거주 표현("~에 살아요")과 함께 나온 지역만 기억한다. 지나가듯 언급한 지명이 이후 정보 검색의
+    # 기본 지역(search_info._default_region)으로 굳지 않도록.
+    if facts.get("region") and facts.get("region_is_residence"):
+        memory["region"] = facts["region"]
+    if facts.get("religion"):
+        memory["religion"] = facts["religion"]
+
+    family = memory.setdefault("family", {"mentioned": [], "bereaved": [], "living_alone": None})
+    for key, fact_key in (("mentioned", "family_mentioned"), ("bereaved", "family_bereaved")):
+        for relation in facts.get(fact_key, []):
+            if relation not in family[key]:
+                family[key].append(relation)
+    if facts.get("living_alone"):
+        family["living_alone"] = True
+
+    concerns = {c["topic"]: c for c in memory.get("concerns", [])}
+    for topic in facts.get("concerns", []):
+        entry = concerns.setdefault(topic, {"topic": topic, "count": 0})
+        entry["count"] += 1
+        entry["last_seen"] = now
+    memory["concerns"] = sorted(
+        concerns.values(), key=lambda c: (c.get("last_seen", ""), c["count"]), reverse=True
+    )[:MAX_CONCERNS]
+
+    memory["turns"] = memory.get("turns", 0) + 1
+    memory["updated_at"] = now
+    return memory
+
+
+def render_memory(memory: Optional[Dict[str, Any]]) -> str:
+    """프롬프트에 붙일 짧은 요약. 아는 것이 없으면 빈 문자열."""
+    if not memory:
+        return ""
+    lines = []
+    if memory.get("region"):
+        lines.append(f"- 거주 지역: {memory['region']}")
+    if memory.get("recent_region"):
+        lines.append(f"- 최근 언급 지역: {memory['recent_region']}")
+    if memory.get("religion"):
+        lines.append(f"- 종교: {memory['religion']}")
+    family = memory.get("family") or {}
+    parts = [
+        f"{relation}(사별)" if relation in family.get("bereaved", []) else relation
+        for relation in family.get("mentioned", [])
+    ]
+    if family.get("living_alone"):
+        parts.append("혼자 지냄")
+    if parts:
+        lines.append(f"- 가족: {', '.join(parts)}")
+    if memory.get("concerns"):
+        lines.append(f"- 최근 이야기한 고민: {', '.join(c['topic'] for c in memory['concerns'])}")
+    if memory.get("history_summary"):
+        lines.append(f"- 이전 대화 요약: {memory['history_summary']}")
+    return "\n".join(lines)
+
+
+def build_memory_context(memory: Optional[Dict[str, Any]]) -> str:
+    """정보 모드용 [사용자 정보] 블록 (고정 시스템 프롬프트 뒤에 붙는다)."""
+    remembered = render_memory(memory)
+    return f"[사용자 정보]\n{remembered}" if remembered else ""
+
+
+class UserMemoryStore:
+    """
+    사용자별 구조화된 기억 (지역, 종교, 가족 상황, 고민, 이전 대화 요약) 저장소.
+
+    턴이 저장된 뒤 작업 큐(extract_facts)에서 갱신하고, 에이전트 프롬프트와
+    정보 툴의 기본 지역으로 사용한다. sessions/memory/<user_id>.json 에 저장.
+    """
+
+    def __init__(self, storage_path: str = MEMORY_DIR):
+        self.storage_path = storage_path
+        os.makedirs(storage_path, exist_ok=True)
+        self._lock = threading.Lock()
+        # 작업 큐 워커 여러 개가 같은 사용자 기억을 읽고-쓰기 할 때 갱신이 사라지지 않도록
+        self._write_lock = threading.Lock()
+        # user_id -> ((mtime_ns, size), 기억). 다른 워커 프로세스가 파일을 바꿨으면 다시 읽는다.
+        self._cache: "OrderedDict[str, Tuple[Optional[Tuple[int, int]], Dict[str, Any]]]" = OrderedDict()
+
+    def _get_file_path(self, user_id: str) -> str:
+        return os.path.join(self.storage_path, f"{user_id}.json")
+
+    def _version(self, user_id: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._get_file_path(user_id))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._get_file_path(user_id), "r", encoding="utf-8") as f:
+                return {**_empty_memory(), **json.load(f)}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"[Memory] user={user_id} 로드 실패: {e}")
+            return None
+
+    def _save(self, user_id: str, memory: Dict[str, Any]):
+        path = self._get_file_path(user_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(memory, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def _remember(self, user_id: str, version: Optional[Tuple[int, int]], memory: Dict[str, Any]):
+        with self._lock:
+            self._cache[user_id] = (version, memory)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > MEMORY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """현재 기억 (복사본). 없으면 빈 기억. 캐시는 파일의 (mtime_ns, size)가 같을 때만 쓴다."""
+        version = self._version(user_id)
+        with self._lock:
+            cached = self._cache.get(user_id)
+        if cached is not None and cached[0] == version:
+            memory = cached[1]
+        else:
+            memory = self._load(user_id) or _empty_memory()
+            self._remember(user_id, version, memory)
+        return json.loads(json.dumps(memory))
+
+    def default_region(self, user_id: Optional[str]) -> Optional[str]:
+        return self.get(user_id).get("region") if user_id else None
+
+    def update(self, user_id: str, texts: Iterable[str]) -> Dict[str, Any]:
+        with observe_stage("memory_update"), self._write_lock:
+            memory = self.get(user_id)
+            for text in texts:
+                if text:
+                    merge_facts(memory, extract_facts(text))
+            self._store(user_id, memory)
+            return memory
+
+    def set_summary(self, user_id: str, summary: str, until: int) -> None:
+        """대화 요약 작업 결과 저장 (until: 요약에 포함된 대화 기록 길이)."""
+        with self._write_lock:
+            memory = self.get(user_id)
+            memory["history_summary"] = summary
+            memory["history_summary_until"] = until
+            self._store(user_id, memory)
+
+    def _store(self, user_id: str, memory: Dict[str, Any]) -> None:
+        try:
+            self._save(user_id, memory)
+        except Exception as e:
+            logger.error(f"[Memory] user={user_id} 저장 실패: {e}")
+            return
+        self._remember(user_id, self._version(user_id), memory)
+
+    def bootstrap(self, user_id: str, session: Dict[str, Any]):
+        """기억 파일이 없는 기존 사용자는 대화 기록 전체로 한 번 채운다."""
+        if os.path.exists(self._get_file_path(user_id)):
+            return
+        texts = [
+            m.get("content", "")
+            for m in session.get("conversation_history", [])
+            if isinstance(m, dict) and m.get("role") == "user"
+        ]
+        memory = self.update(user_id, texts)
+        profile = session.get("user_profile", {}) or {}
+        if profile.get("region") and not memory.get("region"):
+            with self._write_lock:
+                memory["region"] = profile["region"]
+                self._store(user_id, memory)
+
+
+user_memory = UserMemoryStore()
+register_cache("user_memory", lambda: len(user_memory._cache), user_memory.clear_cache)
@@ -0,0 +1,229 @@
+import os
+import json
+import math
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # pinecone | local
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", os.path.join("data", "vectors"))
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")  # openai | hash (API 없이 로컬 테스트)
+HASH_EMBEDDING_DIM = 256
+
+
+# ---------------------------------------------------------------------------
+# Filters (Pinecone 메타데이터 필터 문법의 부분집합)
+# ---------------------------------------------------------------------------
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, expected in condition.items():
+        if op == "$eq" and value != expected:
+            return False
+        if op == "$ne" and value == expected:
+            return False
+        if op == "$in" and value not in expected:
+            return False
+        if op == "$nin" and value in expected:
+            return False
+        if op in ("$lt", "$lte", "$gt", "$gte"):
+            if value is None:
+                return False
+            try:
+                v, e = float(value), float(expected)
+            except (TypeError, ValueError):
+                return False
+            if (op == "$lt" and not v < e) or (op == "$lte" and not v <= e) or (
+                op == "$gt" and not v > e
+            ) or (op == "$gte" and not v >= e):
+                return False
+    return True
+
+
+def match_filter(metadata: Dict[str, Any], flt: Optional[Dict[str, Any]]) -> bool:
+    """{"type": {"$eq": "activity"}, "ENERGY_REQUIRED": {"$lte": 3}, "$and": [...]} 형태 지원."""
+    if not flt:
+        return True
+    for key, condition in flt.items():
+        if key == "$and":
+            if not all(match_filter(metadata, c) for c in condition):
+                return False
+        elif key == "$or":
+            if not any(match_filter(metadata, c) for c in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Local backend
+# ---------------------------------------------------------------------------
+class LocalVectorIndex:
+    """
+    파일 기반 로컬 벡터 인덱스 (테스트/오프라인용).
+    pinecone.Index와 같은 query/upsert/delete/describe_index_stats 시그니처를 제공해
+    recommend_ba처럼 index를 직접 쓰는 코드에 그대로 넣을 수 있다.
+    <LOCAL_VECTOR_DIR>/<index_name>.json 한 파일에 네임스페이스별로 저장.
+    """
+
+    def __init__(self, name: str, directory: str = LOCAL_VECTOR_DIR):
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.json")
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._namespaces = json.load(f)
+
+    def _flush(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._namespaces, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def upsert(self, vectors: Iterable[Dict[str, Any]], namespace: str = "", **kwargs) -> Dict[str, int]:
+        count = 0
+        with self._lock:
+            ns = self._namespaces.setdefault(namespace, {})
+            for v in vectors:
+                ns[v["id"]] = {"values": list(v["values"]), "metadata": v.get("metadata", {})}
+                count += 1
+            self._flush()
+        return {"upserted_count": count}
+
+    def delete(self, ids: Optional[List[str]] = None, namespace: str = "", delete_all: bool = False, **kwargs):
+        with self._lock:
+            if delete_all:
+                self._namespaces.pop(namespace, None)
+            else:
+                ns = self._namespaces.get(namespace, {})
+                for vid in ids or []:
+                    ns.pop(vid, None)
+            self._flush()
+        return {}
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = True,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: str = "",
+        **kwargs,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self._namespaces.get(namespace, {}).items())
+        scored = [
+            (_cosine(vector, item["values"]), vid, item["metadata"])
+            for vid, item in items
+            if match_filter(item["metadata"], filter)
+        ]
+        scored.sort(key=lambda t: t[0], reverse=True)
+        return {
+            "matches": [
+                {"id": vid, "score": score, **({"metadata": meta} if include_metadata else {})}
+                for score, vid, meta in scored[:top_k]
+            ],
+            "namespace": namespace,
+        }
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {ns: {"vector_count": len(items)} for ns, items in self._namespaces.items()}
+        return {"namespaces": namespaces, "total_vector_count": sum(n["vector_count"] for n in namespaces.values())}
+
+
+class LocalVectorStore:
+    """
+    LocalVectorIndex 한 네임스페이스를 PineconeVectorStore처럼 쓰기 위한 어댑터.
+    search_info가 쓰는 similarity_search_by_vector_with_score만 구현 (page_content는 metadata["text"]).
+    """
+
+    def __init__(self, index: LocalVectorIndex, namespace: str, text_key: str = "text"):
+        self.index = index
+        self.namespace = namespace
+        self.text_key = text_key
+
+    def similarity_search_by_vector_with_score(self, embedding, k: int = 4, filter=None, **kwargs):
+        from langchain_core.documents import Document
+
+        res = self.index.query(vector=embedding, top_k=k, include_metadata=True, filter=filter, namespace=self.namespace)
+        results = []
+        for match in res["matches"]:
+            metadata = dict(match.get("metadata") or {})
+            text = metadata.pop(self.text_key, "")
+            results.append((Document(page_content=text, metadata=metadata), match["score"]))
+        return results
+
+
+_local_indexes: Dict[str, LocalVectorIndex] = {}
+_local_lock = threading.Lock()
+
+
+def local_index(name: str, directory: str = LOCAL_VECTOR_DIR) -> LocalVectorIndex:
+    """같은 이름의 로컬 인덱스는 프로세스 안에서 하나만 연다."""
+    key = os.path.join(directory, name)
+    with _local_lock:
+        if key not in _local_indexes:
+            _local_indexes[key] = LocalVectorIndex(name, directory)
+        return _local_indexes[key]
+
+
+# ---------------------------------------------------------------------------
+# Embeddings
+# ---------------------------------------------------------------------------
+class HashEmbeddings:
+    """
+    API 없이 쓰는 결정적 임베딩 (글자 2-gram 해싱). 로컬 백엔드 테스트/벤치마크용이며
+    의미 검색 품질은 기대하지 않는다. OpenAIEmbeddings와 같은 메서드 이름을 쓴다.
+    """
+
+    def __init__(self, dim: int = HASH_EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed_query(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        compact = "".join((text or "").split())
+        for i in range(max(len(compact) - 1, 1)):
+            gram = compact[i : i + 2]
+            h = int.from_bytes(hashlib.md5(gram.encode("utf-8")).digest()[:4], "little")
+            vec[h % self.dim] += 1.0 if h & 1 << 31 else -1.0
+        return vec
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+
+def make_embeddings(kind: str = EMBEDDING_BACKEND, model: Optional[str] = None):
+    if kind == "hash":
+        return HashEmbeddings()
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model or "text-embedding-3-small", openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def open_index(name: str, backend: str = VECTOR_BACKEND, host: Optional[str] = None):
+    """백엔드 설정에 따라 pinecone.Index 또는 LocalVectorIndex."""
+    if backend == "local":
+        return local_index(name)
+    from pinecone import Pinecone
+
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    return pc.Index(host=host) if host else pc.Index(name)
+
+
+def batched(items: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
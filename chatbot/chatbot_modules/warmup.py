@@ -0,0 +1,183 @@
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+from . import recommend_ba, search_info
+from .diagnostics import register_cache
+from .prefetch import prefetcher
+from .recommend_ba import activity_prefetch_key, query_activities
+from .search_info import detect_region
+from .session_manager import SessionManager
+from .user_memory import user_memory
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1").lower() not in ("0", "false", "no")
+WARMUP_TTL_SECONDS = float(os.getenv("WARMUP_TTL_SECONDS", "600"))
+WARMUP_MAX_USERS = int(os.getenv("WARMUP_MAX_USERS", "10000"))  # 첫 턴 판별용으로 기억하는 사용자 수 (LRU)
+REGION_HISTORY_WINDOW = 20  # 지역을 찾을 최근 사용자 발화 수
+
+
+def _user_texts(session: Dict[str, Any]):
+    history = session.get("conversation_history", []) or []
+    return [
+        m.get("content", "")
+        for m in history[-REGION_HISTORY_WINDOW * 2:]
+        if isinstance(m, dict) and m.get("role") == "user"
+    ]
+
+
+def resolve_region(session: Dict[str, Any]) -> Optional[str]:
+    """프로필에 적힌 거주 지역. 대화에서 언급만 된 지역은 거주지로 보지 않는다 (recent_region)."""
+    profile = session.get("user_profile", {}) or {}
+    return profile.get("region")
+
+
+def recent_region(session: Dict[str, Any]) -> Optional[str]:
+    """최근 대화에서 언급된 지역 (다른 지역을 묻는 경우가 많아 거주지와 따로 다룬다)."""
+    return detect_region(_user_texts(session))
+
+
+class UserWarmer:
+    """
+    로그인/환영 시점에 첫 대화에서 필요한 것들을 백그라운드로 준비.
+
+    - 세션/프로필 로드 (SessionManager 캐시에 올려 첫 턴이 파싱 없이 읽도록)
+    - 프로필/대화 기록에서 지역 확인
+    - 검색 클라이언트 초기화, B1 감정·A2/A4 거동에 맞는 활동 검색 선행 실행
+    첫 턴 지연은 warm/cold로 나눠 정상 상태 지연과 따로 기록한다.
+    """
+
+    def __init__(self, session_manager: Optional[SessionManager] = None):
+        self.session_manager = session_manager or SessionManager()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup")
+        self._lock = threading.Lock()
+        self._contexts: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Set[str] = set()
+        # 첫 턴 판별용 사용자 목록. 키만 쓰는 LRU라 오래 안 온 사용자부터 잊는다
+        # (잊힌 사용자의 다음 턴은 첫 턴으로 집계될 뿐이다).
+        self._first_turn_pending: "OrderedDict[str, None]" = OrderedDict()
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self.stats: Dict[str, Any] = {
+            "scheduled": 0,
+            "completed": 0,
+            "errors": 0,
+            "warm_seconds_total": 0.0,
+            "first_turn_warm": 0,
+            "first_turn_cold": 0,
+        }
+
+    @staticmethod
+    def _remember(users: "OrderedDict[str, None]", user_id: str) -> None:
+        users[user_id] = None
+        users.move_to_end(user_id)
+        while len(users) > WARMUP_MAX_USERS:
+            users.popitem(last=False)
+
+    def _fresh(self, user_id: str) -> Optional[Dict[str, Any]]:
+        ctx = self._contexts.get(user_id)
+        if ctx and time.monotonic() - ctx["warmed_at"] < WARMUP_TTL_SECONDS:
+            return ctx
+        return None
+
+    def warm(self, user_id: str) -> bool:
+        """백그라운드 워밍업 예약. 이미 진행 중이거나 최근에 끝났으면 False."""
+        with self._lock:
+            self._remember(self._first_turn_pending, user_id)
+            if not WARMUP_ENABLED or user_id in self._in_flight or self._fresh(user_id):
+                return False
+            self._in_flight.add(user_id)
+            self.stats["scheduled"] += 1
+        prefetcher.sweep()
+        self._executor.submit(self._warm, user_id)
+        return True
+
+    def _warm(self, user_id: str):
+        started = time.perf_counter()
+        try:
+            session = self.session_manager.load_session(user_id)
+            profile = session.get("user_profile", {}) or {}
+            user_memory.bootstrap(user_id, session)
+            region = user_memory.default_region(user_id) or resolve_region(session)
+
+            recommend_ba._ensure_clients()
+            search_info._init_clients()
+
+            activity_key = None
+            if profile.get("emotion"):
+                mobility = profile.get("mobility") or profile.get("activity_range") or ""
+                activity_key = activity_prefetch_key(profile["emotion"], mobility)
+                # 첫 턴의 _start_prefetch는 같은 키가 있으면 건너뛰고 툴이 이 결과를 가져간다.
+                prefetcher.schedule(user_id, activity_key, query_activities, *activity_key[1:])
+
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._contexts[user_id] = {
+                    "region": region,
+                    "activity_key": activity_key,
+                    "warmed_at": time.monotonic(),
+                }
+                self.stats["completed"] += 1
+                self.stats["warm_seconds_total"] += elapsed
+            logger.info(f"[Warmup] user={user_id} region={region} ({elapsed:.2f}s)")
+        except Exception as e:
+            logger.warning(f"[Warmup] user={user_id} 실패: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._in_flight.discard(user_id)
+
+    def turn_kind(self, user_id: str) -> str:
+        """이번 턴 구분: 로그인(또는 프로세스 시작) 후 첫 턴이면 first_warm/first_cold, 아니면 steady."""
+        with self._lock:
+            first = user_id in self._first_turn_pending or user_id not in self._seen
+            self._first_turn_pending.pop(user_id, None)
+            self._remember(self._seen, user_id)
+            if not first:
+                return "steady"
+            kind = "first_warm" if self._fresh(user_id) else "first_cold"
+            self.stats[f"first_turn_{kind[6:]}"] += 1
+            return kind
+
+    def region_for(self, user_id: str, session: Dict[str, Any]) -> Optional[str]:
+        """거주 지역: 사용자 기억 → 워밍업 때 확인한 지역 → 세션 프로필 순. 대화 언급만으로는 정하지 않는다."""
+        region = user_memory.default_region(user_id)
+        if region:
+            return region
+        with self._lock:
+            ctx = self._fresh(user_id)
+        if ctx is not None and ctx.get("region"):
+            return ctx["region"]
+        return resolve_region(session)
+
+    def shrink(self) -> None:
+        """TTL이 지난 워밍업 결과를 버린다 (로그인만 하고 대화하지 않은 사용자가 계속 쌓이지 않도록)."""
+        with self._lock:
+            for user_id in [uid for uid in self._contexts if not self._fresh(uid)]:
+                del self._contexts[user_id]
+
+    def forget_users(self) -> None:
+        """첫 턴 판별용 사용자 목록을 비운다 (메모리 경보 때)."""
+        with self._lock:
+            self._first_turn_pending.clear()
+            self._seen.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.stats["completed"]
+            return {
+                "warm_users": sum(1 for uid in self._contexts if self._fresh(uid)),
+                "in_flight": len(self._in_flight),
+                "avg_warm_seconds": round(self.stats["warm_seconds_total"] / completed, 3) if completed else 0.0,
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+            }
+
+
+warmer = UserWarmer()
+register_cache("warmup_contexts", lambda: len(warmer._contexts), warmer.shrink)
+register_cache("warmup_users", lambda: len(warmer._seen) + len(warmer._first_turn_pending), warmer.forget_users)
@@ -1,6 +1,9 @@
 import logging
+import os
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import TypedDict, Annotated, List, Literal, Dict, Any
+from typing import TypedDict, Annotated, List, Literal, Dict, Any, Optional, Tuple
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph import StateGraph, END
@@ -8,18 +11,48 @@ from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 from langchain_core.messages import SystemMessage, ToolMessage
 
-from chatbot.chatbot_modules.llm_client import LLMClient
+from chatbot.chatbot_modules.llm_client import get_llm_client
 from chatbot.chatbot_modules.session_manager import SessionManager
-from chatbot.chatbot_modules.recommend_ba import TOOLS
+from chatbot.chatbot_modules.recommend_ba import (
+    TOOLS,
+    activity_prefetch_key,
+    build_question_query,
+    query_activities,
+    query_questions,
+)
+from chatbot.chatbot_modules.prefetch import prefetcher
+from chatbot.chatbot_modules import events, metrics, tracing
+from chatbot.chatbot_modules.request_context import bind
+from chatbot.chatbot_modules.deadline import (
+    DEADLINE_FALLBACK_TEXT,
+    MAX_TOOL_ITERATIONS,
+    DeadlineExceeded,
+    TurnDeadline,
+)
 from chatbot.chatbot_modules.search_info import TOOLS_INFO
-
-from chatbot.chatbot_modules.empathy_agent import empathy_node
+from chatbot.chatbot_modules.token_ledger import BudgetPolicy, ledger
+from chatbot.chatbot_modules.warmup import recent_region, warmer
+from chatbot.chatbot_modules.user_memory import build_memory_context, user_memory
+from chatbot.chatbot_modules.background_jobs import schedule_after_turn
+
+from chatbot.chatbot_modules.resilience import FAST_FAIL_TEXT, DependencyUnavailable
+from chatbot.chatbot_modules.degraded_responder import DegradationMonitor, DegradedResponder
+from chatbot.chatbot_modules.empathy_agent import best_effort_answer, empathy_node
 from chatbot.chatbot_modules.info_agent import info_node
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# 정보 모드 수동 툴 루프의 정적 system 프롬프트 (import 시 한 번 생성, prefix 캐시 대상)
+INFO_FLOW_SYSTEM_MESSAGE = SystemMessage(
+    content=(
+        "당신은 정확한 행정 및 장례 정보를 제공하는 전문가입니다. "
+        "사실과 절차 위주로, 필요한 경우 제공된 도구를 활용해 검색하세요."
+    )
+)
+
+
 class AgentState(TypedDict):
     """LangGraph state definition."""
 
@@ -28,25 +61,39 @@ class AgentState(TypedDict):
     current_mode: Literal["chat", "info"]
     user_id: str
     recent_texts: List[str]
+    deadline: Optional[TurnDeadline]
+    budget: Optional[BudgetPolicy]
+    memory: Dict[str, Any]
 
 
 class ConversationEngine:
     """Main controller that wires empathy/info agents with tool calling."""
 
     WELCOME_COOLDOWN_MINUTES = 30
+    # 첫 LLM 호출과 병렬로 미리 띄울 검색 종류 (activities, questions)
+    PREFETCH_KINDS = {
+        kind.strip()
+        for kind in os.getenv("TOOL_PREFETCH", "activities,questions").split(",")
+        if kind.strip()
+    }
 
     def __init__(self):
-        self.llm_client = LLMClient()
+        self.llm_client = get_llm_client()
         self.session_manager = SessionManager()
         self.app = self._build_graph()
+        llm_dependencies = [f"llm:{self.llm_client.model_name}"]
+        if self.llm_client.fallback_model_name:
+            llm_dependencies.append(f"llm:{self.llm_client.fallback_model_name}")
+        self.degradation_monitor = DegradationMonitor(llm_dependencies)
+        self.degraded_responder = DegradedResponder()
 
     def _build_graph(self):
         workflow = StateGraph(AgentState)
 
-        workflow.add_node("empathy_agent", empathy_node)
-        workflow.add_node("info_agent", info_node)
-        workflow.add_node("tools", ToolNode(TOOLS))
-        workflow.add_node("info_tools", ToolNode(TOOLS_INFO))
+        workflow.add_node("empathy_agent", self._timed_node("empathy_agent", empathy_node))
+        workflow.add_node("info_agent", self._timed_node("info_agent", info_node))
+        workflow.add_node("tools", self._timed_node("tools", ToolNode(TOOLS)))
+        workflow.add_node("info_tools", self._timed_node("info_tools", ToolNode(TOOLS_INFO)))
 
         workflow.set_conditional_entry_point(
             self._route_mode,
@@ -69,27 +116,56 @@ class ConversationEngine:
 
         return workflow.compile()
 
+    @staticmethod
+    def _timed_node(name: str, node):
+        """노드 실행 시간을 stage 지표/트레이스 span으로 기록하는 래퍼 (함수/Runnable 모두 지원)."""
+        if hasattr(node, "invoke"):
+            def run(state, config):
+                with bind(node=name), metrics.observe_stage(name), tracing.span(f"node:{name}"):
+                    return node.invoke(state, config)
+        else:
+            def run(state):
+                with bind(node=name), metrics.observe_stage(name), tracing.span(f"node:{name}"):
+                    return node(state)
+        run.__name__ = name
+        return run
+
     def _route_mode(self, state: AgentState):
         """Route to empathy/info agent based on mode."""
         mode = state.get("current_mode", "chat")
         logger.info(f"[Router] Current Mode: {mode}")
-        if mode == "info":
-            return "info_agent"
-        return "empathy_agent"
+        route = "info_agent" if mode == "info" else "empathy_agent"
+        tracing.event("router", mode=mode, route=route)
+        return route
+
+    @staticmethod
+    def _deadline_hit(state: AgentState) -> bool:
+        deadline = state.get("deadline")
+        if deadline and deadline.expired():
+            logger.warning(f"[Router] 턴 예산 소진으로 툴 루프 중단: {deadline}")
+            return True
+        return False
+
+    def _next_step(self, state: AgentState, source: str, tools_node: str):
+        last_message = state["messages"][-1]
+        route = END
+        if last_message.tool_calls:
+            route = END if self._deadline_hit(state) else tools_node
+        tracing.event(
+            "router",
+            source=source,
+            route=route,
+            tool_calls=[c.get("name") for c in last_message.tool_calls or []],
+        )
+        return route
 
     def _should_continue_talk(self, state: AgentState):
         """Decide whether to invoke empathy/activities tools."""
-        last_message = state["messages"][-1]
-        if last_message.tool_calls:
-            return "tools"
-        return END
+        return self._next_step(state, "empathy_agent", "tools")
 
     def _should_continue_info(self, state: AgentState):
         """Decide whether to invoke info tools."""
-        last_message = state["messages"][-1]
-        if last_message.tool_calls:
-            return "info_tools"
-        return END
+        return self._next_step(state, "info_agent", "info_tools")
 
     def _should_show_welcome(self, session: Dict[str, Any], mode: str) -> bool:
         """Return True when a stored session is revisited after a cooldown."""
@@ -105,19 +181,91 @@ class ConversationEngine:
             return False
         return datetime.now() - last_dt > timedelta(minutes=self.WELCOME_COOLDOWN_MINUTES)
 
+    def _start_prefetch(
+        self,
+        user_id: str,
+        profile: Dict[str, Any],
+        text: str,
+        recent_texts: List[str],
+        keyword_stats: Optional[Dict[str, Any]] = None,
+    ):
+        """모델이 호출할 가능성이 높은 검색을 첫 LLM 호출과 동시에 시작."""
+        if "activities" in self.PREFETCH_KINDS and profile.get("emotion"):
+            mobility = profile.get("mobility") or profile.get("activity_range") or ""
+            key = activity_prefetch_key(profile["emotion"], mobility)
+            prefetcher.schedule(user_id, key, query_activities, *key[1:])
+        if "questions" in self.PREFETCH_KINDS:
+            # 프롬프트 지침대로 모델은 현재 발화를 context로, 최근 대화 5개를 recent_messages로 넘긴다.
+            query_text = build_question_query(text, (recent_texts + [text])[-5:], keyword_stats)
+            prefetcher.schedule(user_id, ("questions", query_text), query_questions, query_text)
+
     def process_user_message(self, user_id: str, text: str, mode: str = "chat") -> str:
         """
         Primary entry point used by the API.
         """
-        session = self.session_manager.load_session(user_id)
+        with self._turn(user_id, mode):
+            session = self.session_manager.load_session(user_id)
+            response_text, persist = self._run_turn(user_id, session, text, mode)
+            if persist:
+                self.session_manager.record_turn(user_id, text, response_text, mode)
+                schedule_after_turn(user_id, text, len(session.get("conversation_history", [])) + 2)
+            return response_text
+
+    def process_session_message(self, user_id: str, session: Dict[str, Any], text: str, mode: str = "chat") -> str:
+        """
+        연결이 들고 있는 세션으로 한 턴 처리 (WebSocket).
+        연결이 열린 뒤 HTTP 턴/프로필 변경이 파일에 쓴 내용을 덮지 않도록 턴마다 파일 기준으로 다시 읽고
+        (mtime 검증 캐시라 바뀌지 않았으면 파싱 없음), 저장도 최신 파일에 이번 턴만 더한다.
+        연결의 세션은 저장된 상태로 갱신한다.
+        """
+        with self._turn(user_id, mode):
+            session.clear()
+            session.update(self.session_manager.load_session(user_id))
+            response_text, persist = self._run_turn(user_id, session, text, mode)
+            if persist:
+                saved = self.session_manager.record_turn(user_id, text, response_text, mode)
+                session.clear()
+                session.update(saved)
+                schedule_after_turn(user_id, text, len(saved["conversation_history"]))
+            return response_text
+
+    @contextmanager
+    def _turn(self, user_id: str, mode: str):
+        started = time.perf_counter()
+        turn_kind = warmer.turn_kind(user_id)
+        tracing.annotate(turn=turn_kind)
+        with bind(user_id=user_id, mode=mode):
+            try:
+                yield
+            finally:
+                metrics.observe_turn(mode, time.perf_counter() - started, turn_kind)
+
+    @staticmethod
+    def _turn_memory(user_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+        """이전 턴들에서 모아 둔 사실. 거주 지역은 기억/프로필에서만, 대화에서 언급된 지역은 따로 둔다."""
+        memory = user_memory.get(user_id)
+        memory["region"] = warmer.region_for(user_id, session)
+        mentioned = recent_region(session)
+        if mentioned and mentioned != memory["region"]:
+            memory["recent_region"] = mentioned
+        return memory
+
+    def _run_turn(self, user_id: str, session: Dict[str, Any], text: str, mode: str) -> Tuple[str, bool]:
+        """응답 텍스트와 대화 기록 저장 여부를 반환 (즉시 실패 응답은 저장하지 않음)."""
+        deadline = TurnDeadline()
+        budget = ledger.policy_for(user_id)
+        if budget.level != "normal":
+            logger.info(f"[Engine] 토큰 예산 정책 {budget.level} ({budget.reason})")
+            tracing.annotate(budget=budget.level)
         profile = session.get("user_profile", {})
+        memory = self._turn_memory(user_id, session)
         welcome_text = None
         if self._should_show_welcome(session, mode):
-            welcome_text = self.session_manager.get_welcome_message(user_id)
+            welcome_text = SessionManager.build_welcome_message(session)
         # 최근 대화 기록을 LangGraph/툴로 전달해 맥락을 유지한다.
         history_messages: List[BaseMessage] = []
         recent_texts: List[str] = []
-        for m in session.get("conversation_history", [])[-8:]:
+        for m in session.get("conversation_history", [])[-budget.history_limit:]:
             if not isinstance(m, dict) or "role" not in m or "content" not in m:
                 continue
             role = m["role"]
@@ -128,42 +276,91 @@ class ConversationEngine:
                 history_messages.append(AIMessage(content=content))
             recent_texts.append(content)
 
-        config = {"configurable": {"thread_id": user_id}}
+        # 에이전트 1회 + (툴 + 에이전트) x 최대 반복 횟수를 넘지 않도록 그래프 스텝도 제한
+        config = {
+            "configurable": {"thread_id": user_id},
+            "recursion_limit": 2 * MAX_TOOL_ITERATIONS + 3,
+            "callbacks": metrics.callbacks() + tracing.callbacks() + events.callbacks(),
+        }
         inputs = {
             "messages": history_messages + [HumanMessage(content=text)],
             "user_profile": profile,
             "current_mode": mode,
             "user_id": user_id,
             "recent_texts": recent_texts,
+            "deadline": deadline,
+            "budget": budget,
+            "memory": memory,
         }
 
         response_text = ""
 
         # INFO 모드는 수동으로 툴콜 처리해 OpenAI 400 오류를 방지
         if mode == "info":
-            response_text = self._run_info_flow(profile, text, user_id, history_messages)
-            self.session_manager.add_message(user_id, "user", text)
-            self.session_manager.add_message(user_id, "assistant", response_text)
-            self.session_manager.update_last_visit(user_id)
-            return response_text
+            tracing.event("router", mode=mode, route="info_flow")
+            try:
+                with bind(node="info_flow"):
+                    response_text = self._run_info_flow(
+                        profile, text, user_id, history_messages, deadline, budget, memory
+                    )
+            except DependencyUnavailable as e:
+                logger.warning(f"[Info Flow] 의존성 차단으로 즉시 응답: {e}")
+                return FAST_FAIL_TEXT, False
+            return response_text, True
+
+        degrade_reason = self.degradation_monitor.should_degrade()
+        if degrade_reason:
+            # 과부하/지연/차단기 열림: LLM 없이 로컬 공감 응답으로 즉시 답한다.
+            logger.warning(f"[Engine] 로컬 응답 모드 ({degrade_reason})")
+            tracing.annotate(degraded=degrade_reason)
+            response_text = self.degraded_responder.respond(session, text)
+        else:
+            try:
+                with self.degradation_monitor.track_turn():
+                    response_text = self._run_chat_flow(
+                        inputs, config, profile, text, recent_texts, session.get("keyword_stats")
+                    )
+            except DependencyUnavailable as e:
+                logger.warning(f"[Engine] 의존성 차단으로 로컬 응답: {e}")
+                tracing.annotate(degraded=f"unavailable:{e.name}")
+                response_text = self.degraded_responder.respond(session, text)
+            except Exception as e:
+                logger.error(f"Error during graph execution: {e}")
+                return "시스템 오류가 발생했습니다.", False
+        logger.info(f"[Engine] chat turn {deadline.elapsed():.2f}s / {deadline.budget_seconds}s")
+
+        if welcome_text:
+            response_text = f"{welcome_text}\n\n{response_text}" if response_text else welcome_text
+        return response_text, True
 
+    def _run_chat_flow(
+        self,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any],
+        profile: Dict[str, Any],
+        text: str,
+        recent_texts: List[str],
+        keyword_stats: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """LangGraph empathy_agent <-> tools 루프 실행."""
+        user_id = inputs["user_id"]
+        response_text = ""
+        self._start_prefetch(user_id, profile, text, recent_texts, keyword_stats)
+        turn_messages: List[BaseMessage] = []
         try:
             for event in self.app.stream(inputs, config=config):
                 for _, v in event.items():
                     if "messages" in v:
+                        turn_messages.extend(v["messages"])
                         msg = v["messages"][-1]
                         if isinstance(msg, AIMessage) and not msg.tool_calls:
                             response_text = msg.content
-        except Exception as e:
-            logger.error(f"Error during graph execution: {e}")
-            return "시스템 오류가 발생했습니다."
-
-        self.session_manager.add_message(user_id, "user", text)
-        if welcome_text:
-            response_text = f"{welcome_text}\n\n{response_text}" if response_text else welcome_text
-        self.session_manager.add_message(user_id, "assistant", response_text)
-        self.session_manager.update_last_visit(user_id)
+        finally:
+            prefetcher.finish_turn(user_id)
 
+        if not response_text:
+            # 툴 루프가 예산 때문에 끊긴 경우: 이번 턴에서 확보한 최선의 답변
+            response_text = best_effort_answer(turn_messages)
         return response_text
 
     def _run_info_flow(
@@ -172,26 +369,36 @@ class ConversationEngine:
         text: str,
         user_id: str,
         history_messages: List[BaseMessage],
+        deadline: Optional[TurnDeadline] = None,
+        budget: BudgetPolicy = BudgetPolicy(),
+        memory: Optional[Dict[str, Any]] = None,
     ) -> str:
         """
         Manual tool-call loop for info mode to ensure tool messages are returned.
+        memory: 사용자 기억 (거주 지역 등, 발화에 지역이 없을 때 툴 인자로 쓰도록 알려준다)
         """
-        llm = self.llm_client.get_model_with_tools(TOOLS_INFO)
         tools_by_name = {t.name: t for t in TOOLS_INFO}
-
-        system_prompt = (
-            "당신은 정확한 행정 및 장례 정보를 제공하는 전문가입니다. "
-            "사실과 절차 위주로, 필요한 경우 제공된 도구를 활용해 검색하세요."
-        )
+        tools = TOOLS_INFO if budget.allow_tools else None
 
         # 1차 호출
-        messages: List[BaseMessage] = [SystemMessage(content=system_prompt)] + history_messages + [
-            HumanMessage(content=text)
-        ]
-        ai_msg: AIMessage = llm.invoke(messages)
+        messages: List[BaseMessage] = [INFO_FLOW_SYSTEM_MESSAGE]
+        memory_context = build_memory_context(memory)
+        if memory_context:
+            # 고정 시스템 프롬프트 뒤에 붙여 프리픽스 캐시를 깨지 않는다.
+            messages.append(SystemMessage(content=memory_context))
+        messages += history_messages + [HumanMessage(content=text)]
+        try:
+            ai_msg: AIMessage = self.llm_client.invoke(
+                messages, tools=tools, deadline=deadline, small_model=budget.use_small_model
+            )
+        except DeadlineExceeded as e:
+            logger.warning(f"[Info Flow] {e}")
+            return DEADLINE_FALLBACK_TEXT
 
         if not ai_msg.tool_calls:
             return ai_msg.content
+        if deadline and not deadline.allows_tools():
+            return ai_msg.content or DEADLINE_FALLBACK_TEXT
 
         # 툴 실행 후 재호출
         tool_messages: List[ToolMessage] = []
@@ -208,16 +415,28 @@ class ConversationEngine:
                 )
                 continue
             try:
-                result = tool.invoke(args)
+                callbacks = metrics.callbacks() + tracing.callbacks() + events.callbacks()
+                result = tool.invoke(args, config={"callbacks": callbacks})
             except Exception as e:
                 result = f"도구 실행 실패: {e}"
             tool_messages.append(
                 ToolMessage(
                     content=str(result),
+                    name=name,
                     tool_call_id=call.get("id", ""),
                 )
             )
 
         messages += [ai_msg] + tool_messages
-        final_ai: AIMessage = llm.invoke(messages)
+        try:
+            final_ai: AIMessage = self.llm_client.invoke(
+                messages,
+                tools=tools,
+                deadline=deadline,
+                allow_tool_calls=False,
+                small_model=budget.use_small_model,
+            )
+        except DeadlineExceeded as e:
+            logger.warning(f"[Info Flow] {e}")
+            return ai_msg.content or DEADLINE_FALLBACK_TEXT
         return final_ai.content
@@ -1,8 +1,13 @@
 # main.py - FastAPI 서버 (LangGraph 기반 백엔드)
 
+import asyncio
 import json
 import os
 import sys
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -11,20 +16,30 @@ import csv
 
 import jwt
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 # Allow running from repo root or ./chatbot directory
 ROOT_DIR = Path(__file__).resolve().parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from chatbot.conversation_engine import ConversationEngine
 from chatbot.chatbot_modules.session_manager import SessionManager
+from chatbot.chatbot_modules.resilience import CircuitBreaker, dependency_states
+from chatbot.chatbot_modules.background_jobs import diary_path, request_diary
+from chatbot.chatbot_modules.session_analytics import EXPORT_FORMATS
+from chatbot.chatbot_modules.dedup_store import dedup_store
+from chatbot.chatbot_modules.job_queue import job_queue
+from chatbot.chatbot_modules.prefetch import prefetcher
+from chatbot.chatbot_modules.warmup import warmer
+from chatbot.chatbot_modules import diagnostics, events, metrics, tracing
+from chatbot.chatbot_modules.request_context import bind
+from chatbot.chatbot_modules.startup import STARTUP_MODE, startup
 
 # Paths for serving frontend
 FRONTEND_DIR = Path(__file__).resolve().parent
@@ -50,13 +65,175 @@ load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
+# /api/admin/* 를 쓸 수 있는 사용자 (쉼표 구분). 비어 있으면 관리자 엔드포인트는 모두 403
+ADMIN_USER_IDS = {u.strip() for u in os.getenv("ADMIN_USER_IDS", "").split(",") if u.strip()}
 
 security = HTTPBearer()
 
 session_manager = SessionManager()
-engine = ConversationEngine()
+engine = None  # ConversationEngine, 기동 단계 "engine"에서 생성 (LangGraph/OpenAI SDK import 포함)
+
+
+@startup.step("data")
+def _load_data():
+    from chatbot.chatbot_modules import recommend_ba, search_info
+
+    search_info.load_region_data()
+    search_info.region_graph()
+    recommend_ba.load_rules()
+
+
+@startup.step("engine")
+def _build_engine():
+    global engine
+    from chatbot.conversation_engine import ConversationEngine
+
+    engine = ConversationEngine()
+
+
+# 추천/질문 중복 방지 DB (임포트 시점이 아니라 기동 단계에서 파일 생성)
+startup.step("dedup")(dedup_store.open)
+# 다이어리/요약/사실 추출 작업 워커 (이전 실행에서 남은 작업도 이어서 처리)
+startup.step("jobs")(job_queue.start)
+# RSS 워터마크 감시 (MEMORY_RSS_WATERMARK_MB가 없으면 아무것도 하지 않음)
+startup.step("memory_guard")(diagnostics.memory_guard.start)
+
+startup.origin = _IMPORT_STARTED
+startup.record("imports", time.perf_counter() - _IMPORT_STARTED)
+if STARTUP_MODE == "eager":
+    startup.run()
+
+
+@app.on_event("startup")
+async def _on_startup():
+    # lazy 모드: 헬스 체크는 바로 응답하고 무거운 초기화는 백그라운드에서
+    startup.start_background()
+
+
+async def get_engine():
+    """기동 단계가 끝나지 않았으면 (스레드풀에서) 기다린 뒤 엔진 반환."""
+    if not startup.ready:
+        try:
+            await run_in_threadpool(startup.ensure)
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Service is starting: {e}", headers={"Retry-After": "5"})
+    return engine
+
+# LLM 작업 입장 제어 설정
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+# 사용자별 동시 요청 상한 (처리 중 1건 포함). 1이면 처리 중인 요청이 있을 때 바로 거절
+PER_USER_MAX_PENDING = int(os.getenv("PER_USER_MAX_PENDING", "2"))
+
+
+class AdmissionController:
+    """LLM 작업 입장 제어: 전역 동시 실행 상한 + 대기열 + 사용자별 순차 처리."""
+
+    def __init__(
+        self,
+        max_concurrent: int = LLM_MAX_CONCURRENT,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        per_user_max_pending: int = PER_USER_MAX_PENDING,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_user_max_pending = per_user_max_pending
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._user_locks: Dict[str, asyncio.Lock] = {}
+        self._user_pending: Dict[str, int] = {}
+        self._queued = 0
+        self._in_flight = 0
+        self._service_ewma = 5.0  # 요청 1건 평균 처리 시간(초), Retry-After 추정용
+        self.stats: Dict[str, Any] = {
+            "admitted": 0,
+            "rejected_user_busy": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def retry_after(self) -> int:
+        backlog = (self._queued + self._in_flight) / max(1, self.max_concurrent)
+        return max(1, int(round(self._service_ewma * max(1.0, backlog))))
+
+    def _reject(self, reason: str, detail: str):
+        self.stats[f"rejected_{reason}"] += 1
+        raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(self.retry_after())})
+
+    @asynccontextmanager
+    async def admit(self, user_id: str):
+        if self._user_pending.get(user_id, 0) >= self.per_user_max_pending:
+            self._reject("user_busy", "이전 요청을 처리하고 있어요. 잠시 후 다시 시도해 주세요.")
+        user_lock = self._user_locks.get(user_id)
+        must_wait = (user_lock is not None and user_lock.locked()) or self._slots.locked()
+        if must_wait and self._queued >= self.max_queue:
+            self._reject("queue_full", "요청이 많아 잠시 후 다시 시도해 주세요.")
+
+        user_lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        self._user_pending[user_id] = self._user_pending.get(user_id, 0) + 1
+        holds_user = holds_slot = False
+
+        async def _acquire():
+            nonlocal holds_user, holds_slot
+            await user_lock.acquire()  # 같은 사용자의 요청은 순서대로 (세션 파일 동시 쓰기 방지)
+            holds_user = True
+            await self._slots.acquire()
+            holds_slot = True
+
+        try:
+            if must_wait:
+                self._queued += 1
+                started = time.monotonic()
+                try:
+                    await asyncio.wait_for(_acquire(), timeout=self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self._reject("timeout", "대기 시간이 길어져 요청을 처리하지 못했어요. 잠시 후 다시 시도해 주세요.")
+                finally:
+                    self._queued -= 1
+                    waited = time.monotonic() - started
+                    self.stats["wait_seconds_total"] += waited
+                    self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+            else:
+                await _acquire()
+
+            self.stats["admitted"] += 1
+            self._in_flight += 1
+            served_from = time.monotonic()
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+                self._service_ewma = 0.8 * self._service_ewma + 0.2 * (time.monotonic() - served_from)
+        finally:
+            if holds_slot:
+                self._slots.release()
+            if holds_user:
+                user_lock.release()
+            self._user_pending[user_id] -= 1
+            if self._user_pending[user_id] <= 0:
+                self._user_pending.pop(user_id, None)
+                self._user_locks.pop(user_id, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        admitted = self.stats["admitted"]
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "avg_wait_seconds": round(self.stats["wait_seconds_total"] / admitted, 3) if admitted else 0.0,
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+        }
+
+
+admission = AdmissionController()
 
 USERS_FILE = Path("./data/users.json")
+CHECKLIST_PATH = "./data/user_profile_checklist.csv"
 if not USERS_FILE.exists():
     USERS_FILE.parent.mkdir(exist_ok=True)
     with open(USERS_FILE, "w", encoding="utf-8") as f:
@@ -79,15 +256,34 @@ class ChatRequest(BaseModel):
     mode: Optional[str] = "chat"
 
 
+class DiaryRequest(BaseModel):
+    date: Optional[str] = None  # YYYY-MM-DD, 없으면 오늘
+
+
 class ProfileRequest(BaseModel):
     profile: Dict[str, Any]
 
 
+class TracemallocRequest(BaseModel):
+    enabled: bool
+    frames: int = diagnostics.MEMORY_TRACEMALLOC_FRAMES
+
+
+class SnapshotRequest(BaseModel):
+    label: str = ""
+
+
+class AnalyticsRequest(BaseModel):
+    export: Optional[str] = None  # csv | parquet
+    include_archived: bool = True
+
+
 class ChatResponse(BaseModel):
     response: str
     stage: str = "S2"
     mode: Optional[str] = None
     timestamp: str
+    request_id: Optional[str] = None
 
 
 class ChecklistItem(BaseModel):
@@ -121,8 +317,18 @@ def create_access_token(data: dict) -> str:
 
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    return decode_token(credentials.credentials)
+
+
+def verify_admin(user_id: str = Depends(verify_token)) -> str:
+    if user_id not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return user_id
+
+
+def decode_token(token: str) -> str:
+    """JWT에서 user_id 추출 (HTTP Bearer/WebSocket 공용)."""
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
@@ -130,17 +336,83 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
         return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
 def sync_session_profile(user_id: str) -> Optional[Dict[str, Any]]:
     """사용자 프로필을 세션 스토리지와 동기화."""
-    users = load_users()
-    profile = users.get(user_id, {}).get("profile")
-    if profile:
-        session_manager.update_user_profile(user_id, profile)
-    return profile
+    with metrics.observe_stage("sync_session_profile"), tracing.span("sync_session_profile"):
+        users = load_users()
+        profile = users.get(user_id, {}).get("profile")
+        if profile:
+            session_manager.update_user_profile(user_id, profile)
+        return profile
+
+
+BREAKER_STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+
+def _runtime_gauges():
+    """/api/metrics 스크랩 시점의 입장 제어/선행 검색/차단기 상태."""
+    snap = admission.snapshot()
+    yield ("lifeclover_admission_queue_depth", "Requests waiting for an LLM slot.", {}, snap["queue_depth"])
+    yield ("lifeclover_admission_in_flight", "Admitted LLM requests in progress.", {}, snap["in_flight"])
+    yield ("lifeclover_admission_wait_seconds_total", "Total queue wait time.", {}, snap["wait_seconds_total"], "counter")
+    yield ("lifeclover_admission_wait_seconds_max", "Longest queue wait time.", {}, snap["wait_seconds_max"])
+    yield ("lifeclover_admission_admitted_total", "Admitted LLM requests.", {}, snap["admitted"], "counter")
+    for reason in ("user_busy", "queue_full", "timeout"):
+        yield (
+            "lifeclover_admission_rejected_total",
+            "Requests rejected with 429.",
+            {"reason": reason},
+            snap[f"rejected_{reason}"],
+            "counter",
+        )
+    for key, value in prefetcher.stats().items():
+        yield ("lifeclover_prefetch", "Speculative tool prefetch counters.", {"stat": key}, value)
+    dedup = dedup_store.stats()
+    yield ("lifeclover_dedup_rows", "Per-user dedup bitset rows.", {}, dedup["rows"])
+    yield ("lifeclover_dedup_bytes", "Bytes stored in dedup bitsets.", {}, dedup["bytes"])
+    for kind, counts in job_queue.stats().items():
+        for status, count in counts.items():
+            yield ("lifeclover_jobs", "Background jobs by kind and status.", {"kind": kind, "status": status}, count)
+    for phase, seconds in startup.phases.items():
+        yield ("lifeclover_startup_seconds", "Duration of each startup phase.", {"phase": phase}, seconds)
+    yield ("lifeclover_startup_ready", "1 once startup phases have finished.", {}, int(startup.ready))
+    for key, value in warmer.snapshot().items():
+        yield ("lifeclover_warmup", "Login warm-up counters.", {"stat": key}, value)
+    rss = diagnostics.rss_bytes()
+    if rss is not None:
+        yield ("lifeclover_process_rss_bytes", "Resident set size of this worker.", {}, rss)
+    yield (
+        "lifeclover_memory_shrinks_total",
+        "Cache shrinks triggered by the RSS guard or admin.",
+        {},
+        diagnostics.memory_guard.triggers,
+        "counter",
+    )
+    for name, size in diagnostics.cache_sizes().items():
+        if size is not None:
+            yield ("lifeclover_cache_entries", "Entries held by each registered in-process cache.", {"cache": name}, size)
+    dependencies = dependency_states()
+    for name, dep in dependencies.items():
+        yield (
+            "lifeclover_breaker_state",
+            "Circuit breaker state (0=closed, 1=half_open, 2=open).",
+            {"dependency": name},
+            BREAKER_STATE_VALUES.get(dep["state"], 0),
+        )
+    for name, dep in dependencies.items():
+        yield (
+            "lifeclover_bulkhead_in_flight",
+            "Calls in flight per dependency bulkhead.",
+            {"dependency": name},
+            dep["bulkhead"]["in_flight"],
+        )
+
+
+metrics.register_collector(_runtime_gauges)
 
 
 @app.get("/")
@@ -153,7 +425,28 @@ async def serve_index():
 
 @app.get("/api/health")
 async def health():
-    return {"service": "Lifeclover API", "status": "running", "version": "2.0.0"}
+    dependencies = dependency_states()
+    degraded = any(d["state"] == CircuitBreaker.OPEN for d in dependencies.values())
+    if not startup.ready:
+        status = "starting"
+    else:
+        status = "degraded" if degraded else "running"
+    return {
+        "service": "Lifeclover API",
+        "status": status,
+        "version": "2.0.0",
+        "startup": startup.snapshot(),
+        "dependencies": dependencies,
+        "degradation": engine.degradation_monitor.snapshot() if engine else None,
+        "admission": admission.snapshot(),
+    }
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/api/auth/register")
@@ -194,6 +487,8 @@ async def login(req: LoginRequest):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     sync_session_profile(req.user_id)
+    # 첫 대화 전에 세션/지역/검색 결과를 백그라운드로 준비
+    warmer.warm(req.user_id)
 
     token = create_access_token({"sub": req.user_id})
 
@@ -206,26 +501,30 @@ async def login(req: LoginRequest):
     }
 
 
+def load_checklist(path: str = CHECKLIST_PATH) -> List[Dict[str, Any]]:
+    """체크리스트 CSV → ChecklistItem dict 목록."""
+    checklist: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            # Ensure missing fields become empty strings
+            row = {k: (v if v is not None else "") for k, v in row.items()}
+            item = ChecklistItem(
+                question_id=row.get("question_id", ""),
+                section=row.get("section", ""),
+                category=row.get("category", ""),
+                question_kr=row.get("question_kr", ""),
+                input_type=row.get("input_type", ""),
+                options_kr=row.get("options_kr", "") or "",
+            )
+            checklist.append(item.model_dump())
+    return checklist
+
+
 @app.get("/api/checklist")
 async def get_checklist(user_id: str = Depends(verify_token)):
     try:
-        checklist: List[Dict[str, Any]] = []
-        with open("./data/user_profile_checklist.csv", "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Ensure missing fields become empty strings
-                row = {k: (v if v is not None else "") for k, v in row.items()}
-                item = ChecklistItem(
-                    question_id=row.get("question_id", ""),
-                    section=row.get("section", ""),
-                    category=row.get("category", ""),
-                    question_kr=row.get("question_kr", ""),
-                    input_type=row.get("input_type", ""),
-                    options_kr=row.get("options_kr", "") or "",
-                )
-                checklist.append(item.model_dump())
-
-        return {"checklist": checklist}
+        return {"checklist": load_checklist()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load checklist: {str(e)}")
 
@@ -257,27 +556,208 @@ async def get_profile(user_id: str = Depends(verify_token)):
 @app.get("/api/welcome")
 async def get_welcome_message(user_id: str = Depends(verify_token)):
     sync_session_profile(user_id)
+    warmer.warm(user_id)
     welcome_msg = session_manager.get_welcome_message(user_id)
     return {"message": welcome_msg, "stage": "S2"}
 
 
 @app.post("/api/chat")
 async def chat(req: ChatRequest, user_id: str = Depends(verify_token)):
+    async with admission.admit(user_id):
+        return await _chat(req, user_id)
+
+
+async def _chat(req: ChatRequest, user_id: str) -> ChatResponse:
+    mode = req.mode or "chat"
+    request_id = tracing.new_request_id()
     try:
-        sync_session_profile(user_id)
-        mode = req.mode or "chat"
-        response_text = engine.process_user_message(user_id, req.message, mode=mode)
+        # 파일 I/O와 LLM 호출이 이벤트 루프를 막지 않도록 스레드풀에서 실행
+        with bind(user_id=user_id, mode=mode), tracing.trace(request_id, "chat", user_id=user_id, mode=mode):
+            await run_in_threadpool(sync_session_profile, user_id)
+            chat_engine = await get_engine()
+            response_text = await run_in_threadpool(chat_engine.process_user_message, user_id, req.message, mode=mode)
 
         return ChatResponse(
             response=response_text,
             stage="S2",
             mode=mode,
             timestamp=datetime.now().isoformat(),
+            request_id=request_id,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
 
+WS_AUTH_TIMEOUT = float(os.getenv("WS_AUTH_TIMEOUT", "10"))
+
+
+async def _ws_authenticate(websocket: WebSocket) -> Optional[str]:
+    """?token=<JWT> 또는 첫 메시지 {"type": "auth", "token": ...}로 연결당 한 번 인증."""
+    token = websocket.query_params.get("token")
+    try:
+        if not token:
+            first = json.loads(await asyncio.wait_for(websocket.receive_text(), timeout=WS_AUTH_TIMEOUT))
+            token = first.get("token") if isinstance(first, dict) and first.get("type") == "auth" else None
+        if not token:
+            raise HTTPException(status_code=401, detail="Missing token")
+        return decode_token(token)
+    except (HTTPException, asyncio.TimeoutError, ValueError) as e:
+        detail = e.detail if isinstance(e, HTTPException) else "Authentication required"
+        await websocket.send_json({"type": "error", "status": 401, "detail": detail})
+        await websocket.close(code=4401)
+        return None
+
+
+def _load_connection_state(user_id: str) -> Dict[str, Any]:
+    """연결 시작 시 users.json 프로필 동기화 후 세션을 한 번만 읽는다."""
+    sync_session_profile(user_id)
+    warmer.warm(user_id)
+    return session_manager.load_session(user_id)
+
+
+async def _ws_turn(websocket: WebSocket, user_id: str, session: Dict[str, Any], text: str, mode: str):
+    """한 턴 처리: 토큰/툴 이벤트를 흘려보내고 마지막에 message 이벤트로 전체 응답 전송."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    request_id = tracing.new_request_id()
+
+    def sink(event: Dict[str, Any]):
+        # 워커 스레드에서 호출되므로 이벤트 루프로 넘긴다.
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    async def forward():
+        while True:
+            event = await queue.get()
+            if event is None:
+                return
+            await websocket.send_json({**event, "request_id": request_id})
+
+    try:
+        async with admission.admit(user_id):
+            forwarder = asyncio.create_task(forward())
+            try:
+                with bind(user_id=user_id, mode=mode), events.bind_sink(sink), tracing.trace(
+                    request_id, "ws_chat", user_id=user_id, mode=mode
+                ):
+                    chat_engine = await get_engine()
+                    response_text = await run_in_threadpool(
+                        chat_engine.process_session_message, user_id, session, text, mode
+                    )
+            finally:
+                queue.put_nowait(None)
+                await forwarder
+    except HTTPException as e:
+        await websocket.send_json(
+            {
+                "type": "error",
+                "status": e.status_code,
+                "detail": e.detail,
+                "retry_after": (e.headers or {}).get("Retry-After"),
+                "request_id": request_id,
+            }
+        )
+        return
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        await websocket.send_json({"type": "error", "status": 500, "detail": f"Chat failed: {e}", "request_id": request_id})
+        return
+
+    await websocket.send_json(
+        {
+            "type": "message",
+            "response": response_text,
+            "mode": mode,
+            "stage": "S2",
+            "timestamp": datetime.now().isoformat(),
+            "request_id": request_id,
+        }
+    )
+
+
+@app.websocket("/api/ws/chat")
+async def chat_ws(websocket: WebSocket):
+    """
+    WebSocket 채팅 채널. 인증과 프로필/세션 로드는 연결 시 한 번만 하고,
+    이후 메시지는 턴마다 세션을 파일 기준으로 다시 읽어(mtime 검증 캐시) 처리하고 이번 턴만 더해 저장한다.
+
+    요청: {"type": "message", "message": "...", "mode": "chat" | "info"}, {"type": "reload"}
+    이벤트: ready, token(진행 중 토큰, 최종 응답은 message), tool_start, tool_end, message, error
+    """
+    await websocket.accept()
+    user_id = await _ws_authenticate(websocket)
+    if user_id is None:
+        return
+
+    session = await run_in_threadpool(_load_connection_state, user_id)
+    await websocket.send_json(
+        {"type": "ready", "user_id": user_id, "welcome": SessionManager.build_welcome_message(session)}
+    )
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Invalid JSON"})
+                continue
+            kind = data.get("type", "message") if isinstance(data, dict) else None
+            if kind == "reload":
+                # 다른 탭/HTTP에서 프로필이나 기록이 바뀐 경우 다시 읽는다.
+                session = await run_in_threadpool(_load_connection_state, user_id)
+                await websocket.send_json({"type": "ready", "user_id": user_id, "reloaded": True})
+                continue
+            if kind != "message" or not data.get("message"):
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Expected a message"})
+                continue
+            await _ws_turn(websocket, user_id, session, data["message"], data.get("mode") or "chat")
+    except WebSocketDisconnect:
+        pass
+
+
+@app.post("/api/diary")
+async def create_diary(req: DiaryRequest, user_id: str = Depends(verify_token)):
+    """다이어리 생성을 백그라운드 작업으로 등록하고 작업 id를 바로 돌려준다."""
+    day = req.date or datetime.now().date().isoformat()
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    session = await run_in_threadpool(session_manager.load_session, user_id)
+    job_id = await run_in_threadpool(request_diary, user_id, day, len(session.get("conversation_history", [])))
+    return {"job_id": job_id, "status_url": f"/api/jobs/{job_id}"}
+
+
+@app.get("/api/diary/{day}")
+async def get_diary(day: str, user_id: str = Depends(verify_token)):
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    path = diary_path(user_id, day)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Diary not found")
+    with open(path, "r", encoding="utf-8") as f:
+        return {"date": day, "diary": f.read()}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, user_id: str = Depends(verify_token)):
+    """작업 상태 조회 (queued/running/done/failed). done이면 result 포함."""
+    job = await run_in_threadpool(job_queue.get, job_id)
+    if job is None or job["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
 @app.get("/api/history")
 async def get_history(user_id: str = Depends(verify_token)):
     try:
@@ -296,6 +776,83 @@ async def get_sessions(user_id: str = Depends(verify_token)):
     return {"sessions": sessions}
 
 
+# ---------------------------------------------------------------------------
+# 관리자: 메모리 진단
+# ---------------------------------------------------------------------------
+def _diagnostics_call(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot not found: {e}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/admin/memory")
+async def memory_report(top: int = 10, objects: bool = True, user_id: str = Depends(verify_admin)):
+    """RSS, 등록된 캐시 크기, LangChain 객체 수, (추적 중이면) 상위 할당 위치."""
+    return await run_in_threadpool(diagnostics.report, top, objects)
+
+
+@app.post("/api/admin/memory/tracemalloc")
+async def set_tracemalloc(req: TracemallocRequest, user_id: str = Depends(verify_admin)):
+    if req.enabled:
+        diagnostics.start_tracing(req.frames)
+    else:
+        diagnostics.stop_tracing()
+    return diagnostics.tracing_status()
+
+
+@app.get("/api/admin/memory/snapshots")
+async def list_memory_snapshots(user_id: str = Depends(verify_admin)):
+    return {"snapshots": diagnostics.list_snapshots()}
+
+
+@app.post("/api/admin/memory/snapshots")
+async def take_memory_snapshot(req: SnapshotRequest, user_id: str = Depends(verify_admin)):
+    return await run_in_threadpool(_diagnostics_call, diagnostics.take_snapshot, req.label)
+
+
+@app.get("/api/admin/memory/snapshots/{snapshot_id}/top")
+async def memory_snapshot_top(
+    snapshot_id: int, limit: int = 20, key_type: str = "lineno", user_id: str = Depends(verify_admin)
+):
+    stats = await run_in_threadpool(_diagnostics_call, diagnostics.top_allocations, snapshot_id, limit, key_type)
+    return {"snapshot_id": snapshot_id, "top": stats}
+
+
+@app.get("/api/admin/memory/diff")
+async def memory_snapshot_diff(
+    base: int, target: int, limit: int = 20, key_type: str = "lineno", user_id: str = Depends(verify_admin)
+):
+    """두 스냅샷 사이에 늘어난 할당 위치 (base → target)."""
+    stats = await run_in_threadpool(_diagnostics_call, diagnostics.diff_snapshots, base, target, limit, key_type)
+    return {"base": base, "target": target, "diff": stats}
+
+
+@app.post("/api/admin/memory/shrink")
+async def shrink_memory(user_id: str = Depends(verify_admin)):
+    """등록된 캐시를 비우고 gc 실행 (워터마크 경보와 같은 동작)."""
+    return await run_in_threadpool(diagnostics.memory_guard.shrink, "manual")
+
+
+@app.post("/api/admin/analytics")
+async def request_analytics(req: AnalyticsRequest, user_id: str = Depends(verify_admin)):
+    """세션 저장소 통계 작업 등록. 결과(요약, 내보내기 경로)는 /api/jobs/{job_id}로 조회."""
+    if req.export is not None and req.export not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"export must be one of {', '.join(EXPORT_FORMATS)}")
+    job_id = await run_in_threadpool(
+        job_queue.enqueue,
+        "session_analytics",
+        user_id,
+        {"export": req.export, "include_archived": req.include_archived},
+        max_attempts=1,
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# 모듈 import 시점에 sessions/, logs/ 가 생기므로 리포지토리 밖의 임시 디렉터리에서 실행하고,
+# 외부 API 대신 로컬 벡터 백엔드/해시 임베딩을 쓴다.
+os.chdir(tempfile.mkdtemp(prefix="lifeclover-tests-"))
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ.setdefault("EMBEDDING_BACKEND", "hash")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-placeholder")
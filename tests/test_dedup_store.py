@@ -0,0 +1,33 @@
+import os
+
+from chatbot.chatbot_modules.dedup_store import (
+    ACTIVITY_CATALOG,
+    DEDUP_HASH_BASE,
+    DedupStore,
+    hashed_id,
+)
+
+
+def test_store_creates_file_lazily(tmp_path):
+    path = str(tmp_path / "sub" / "dedup.sqlite3")
+    store = DedupStore(path)
+    assert not os.path.exists(path)
+    store.add("u1", "activity", [1])
+    assert os.path.exists(path)
+    assert 1 in store.seen("u1", "activity")
+
+
+def test_unknown_text_gets_stable_hash_id():
+    activity_id = ACTIVITY_CATALOG.id_for({}, "카탈로그에 없는 새 활동")
+    assert activity_id is not None and activity_id >= DEDUP_HASH_BASE
+    assert activity_id == hashed_id("카탈로그에 없는 새 활동")
+    assert ACTIVITY_CATALOG.id_for({}, "") is None
+
+
+def test_hashed_items_are_deduped_but_do_not_count_as_catalog(tmp_path):
+    store = DedupStore(str(tmp_path / "dedup.sqlite3"))
+    activity_id = ACTIVITY_CATALOG.id_for({}, "카탈로그에 없는 새 활동")
+    store.add("u1", "activity", [activity_id])
+    seen = store.seen("u1", "activity")
+    assert activity_id in seen
+    assert seen.catalog_count() == 0
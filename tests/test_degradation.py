@@ -0,0 +1,45 @@
+import threading
+import time
+
+from chatbot.chatbot_modules import degraded_responder
+from chatbot.chatbot_modules.degraded_responder import DegradationMonitor
+
+
+def _after_cooldown(monitor):
+    monitor._latency_ewma = degraded_responder.DEGRADE_LATENCY_SECONDS * 2
+    monitor._degraded_until = time.monotonic() - 1
+
+
+def test_only_one_probe_turn_after_cooldown():
+    monitor = DegradationMonitor([])
+    _after_cooldown(monitor)
+    probe_running, release = threading.Event(), threading.Event()
+    probe_decision = []
+
+    def probe_turn():
+        probe_decision.append(monitor.should_degrade())
+        with monitor.track_turn():
+            probe_running.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=probe_turn)
+    thread.start()
+    probe_running.wait(5)
+    assert probe_decision == [None]
+    # 확인 턴이 도는 동안 다른 턴은 계속 로컬 응답
+    assert [monitor.should_degrade() for _ in range(3)] == ["latency"] * 3
+
+    release.set()
+    thread.join()
+    assert monitor.should_degrade() is None
+    assert not monitor.snapshot()["probing"]
+
+
+def test_stuck_probe_restarts_cooldown(monkeypatch):
+    monkeypatch.setattr(degraded_responder, "DEGRADE_PROBE_TIMEOUT_SECONDS", 0.0)
+    monitor = DegradationMonitor([])
+    _after_cooldown(monitor)
+    assert monitor.should_degrade() is None  # 확인 턴 (track_turn까지 가지 못함)
+    time.sleep(0.01)
+    assert monitor.should_degrade() == "latency"
+    assert monitor.snapshot()["degraded_for"] > 0
@@ -0,0 +1,43 @@
+from chatbot.chatbot_modules import ingest
+from chatbot.chatbot_modules.vector_backend import HashEmbeddings
+
+
+class FakeIndex:
+    def __init__(self):
+        self.vectors = {}
+        self.fail_deletes = 0
+
+    def upsert(self, vectors, namespace=""):
+        self.vectors.update({v["id"]: v for v in vectors})
+
+    def delete(self, ids, namespace=""):
+        if self.fail_deletes:
+            self.fail_deletes -= 1
+            raise RuntimeError("pinecone unavailable")
+        for item_id in ids:
+            self.vectors.pop(item_id, None)
+
+
+def test_failed_delete_keeps_ids_for_next_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "STATE_DIR", tmp_path)
+    index = FakeIndex()
+    monkeypatch.setattr(ingest, "open_index", lambda name, target: index)
+    records = [ingest.Record("a", "첫 번째 청크", {}), ingest.Record("b", "두 번째 청크", {})]
+    spec = ingest.Spec("test", "test-index", "", lambda _: list(records))
+
+    def run():
+        return ingest.run_spec(spec, "local", tmp_path, embeddings=HashEmbeddings(), embedding_model="hash")
+
+    run()
+    assert set(index.vectors) == {"a", "b"}
+
+    records.pop()
+    index.fail_deletes = 1
+    report = run()
+    assert report["failed_batches"] == 1
+    assert set(ingest.load_manifest(ingest.manifest_path("local", spec))) == {"a", "b"}
+
+    report = run()
+    assert report["deleted"] == 1 and report["failed_batches"] == 0
+    assert set(index.vectors) == {"a"}
+    assert set(ingest.load_manifest(ingest.manifest_path("local", spec))) == {"a"}
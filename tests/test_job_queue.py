@@ -0,0 +1,88 @@
+import threading
+import time
+
+from chatbot.chatbot_modules.job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def _expire(queue, job_id):
+    queue._connect().execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_expired_lease_fails_job_once_attempts_are_used(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=0)
+    job_id = queue.enqueue("crashy", "u1", max_attempts=2)
+    for _ in range(2):
+        assert queue._claim()["id"] == job_id
+        _expire(queue, job_id)
+    assert queue._claim() is None
+    job = queue.get(job_id)
+    assert job["status"] == FAILED and job["attempts"] == 2
+
+
+def test_stale_finish_does_not_overwrite_reclaimed_job(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=0)
+    job_id = queue.enqueue("slow", "u1")
+    first = queue._claim()
+    _expire(queue, job_id)
+    second = queue._claim()
+    assert second["id"] == job_id
+
+    queue._finish(first, result="stale")
+    job = queue.get(job_id)
+    assert job["status"] == RUNNING and job["result"] is None
+
+    queue._finish(second, result="fresh")
+    job = queue.get(job_id)
+    assert job["status"] == DONE and job["result"] == "fresh"
+
+
+def test_heartbeat_keeps_slow_job_leased(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path, workers=0)
+    other_worker = JobQueue(path, workers=0)
+    started = threading.Event()
+
+    @queue.register("slow", lease_seconds=0.3)
+    def slow(user_id, payload):
+        started.set()
+        time.sleep(1.0)
+        return "ok"
+
+    job_id = queue.enqueue("slow", "u1")
+    runner = threading.Thread(target=queue.run_once)
+    runner.start()
+    started.wait(5)
+    for _ in range(5):
+        time.sleep(0.2)
+        assert other_worker._claim() is None
+    runner.join()
+    job = queue.get(job_id)
+    assert job["status"] == DONE and job["attempts"] == 1
+
+
+def test_failed_handler_is_requeued_under_own_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=0)
+
+    @queue.register("boom")
+    def boom(user_id, payload):
+        raise RuntimeError("boom")
+
+    job_id = queue.enqueue("boom", "u1", max_attempts=2)
+    assert queue.run_once()
+    job = queue.get(job_id)
+    assert job["status"] == QUEUED and job["error"] == "boom"
+
+
+def test_session_analytics_lease_outlives_subprocess_timeout():
+    from chatbot.chatbot_modules.background_jobs import job_queue
+    from chatbot.chatbot_modules.session_analytics import ANALYTICS_TIMEOUT_SECONDS
+
+    assert job_queue._lease_for("session_analytics") > ANALYTICS_TIMEOUT_SECONDS
+
+
+def test_job_db_is_created_on_first_use(tmp_path):
+    path = tmp_path / "sub" / "jobs.sqlite3"
+    queue = JobQueue(str(path), workers=0)
+    assert not path.exists()
+    job_id = queue.enqueue("diary", "u1")
+    assert path.exists() and queue.get(job_id)["status"] == QUEUED
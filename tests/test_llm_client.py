@@ -0,0 +1,22 @@
+import threading
+
+from chatbot.chatbot_modules import llm_client
+
+
+def test_llm_client_is_built_once_and_shared(monkeypatch):
+    built = []
+
+    class FakeClient:
+        def __init__(self):
+            built.append(self)
+
+    monkeypatch.setattr(llm_client, "LLMClient", FakeClient)
+    monkeypatch.setattr(llm_client, "_shared_client", None)
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(llm_client.get_llm_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(client is built[0] for client in clients)
@@ -0,0 +1,45 @@
+from chatbot.chatbot_modules import metrics
+
+
+def _families(text):
+    """샘플 줄의 메트릭 이름 순서 -> 이름별 연속 구간 목록, TYPE 선언."""
+    order, types = [], {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            types[name] = kind
+        elif line and not line.startswith("#"):
+            name = line.split("{")[0].split()[0]
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and types.get(name[: -len(suffix)]) == "histogram":
+                    name = name[: -len(suffix)]
+            if not order or order[-1] != name:
+                order.append(name)
+    return order, types
+
+
+def test_collector_families_are_contiguous_and_typed(monkeypatch):
+    def collector():
+        for dep in ("llm", "pinecone"):
+            yield ("test_state", "State.", {"dependency": dep}, 1)
+            yield ("test_in_flight", "In flight.", {"dependency": dep}, 2)
+        yield ("test_events_total", "Events.", {}, 3, "counter")
+
+    monkeypatch.setattr(metrics, "_collectors", [collector])
+    order, types = _families(metrics.render())
+    assert len(order) == len(set(order))
+    assert types["test_state"] == "gauge"
+    assert types["test_events_total"] == "counter"
+
+
+def test_app_metrics_are_contiguous():
+    import chatbot.main  # noqa: F401  (수집기 등록)
+
+    order, types = _families(metrics.render())
+    assert len(order) == len(set(order))
+    for name in (
+        "lifeclover_admission_admitted_total",
+        "lifeclover_admission_rejected_total",
+        "lifeclover_memory_shrinks_total",
+    ):
+        assert types[name] == "counter"
@@ -0,0 +1,42 @@
+from langchain_core.messages import HumanMessage
+
+from chatbot.chatbot_modules import empathy_agent
+from chatbot.chatbot_modules.empathy_agent import STATIC_SYSTEM_MESSAGE, STATIC_SYSTEM_PROMPT, build_messages
+
+PROFILES = [
+    ("u1", {"name": "김영희", "age": "72", "mobility": "거동 가능", "emotion": "외롭다"}),
+    ("u2", {"name": "", "activity_range": "실내에서만 주로 움직인다", "emotion": "불안하다"}),
+    ("u3", {}),
+    ("u4", {"A1": "박철수", "B1": "무기력하다", "C1": "서예 교실", "D1": "손녀 민지"}),
+]
+
+
+def test_static_prefix_is_byte_identical_across_users():
+    prefixes = set()
+    for user_id, profile in PROFILES:
+        messages = build_messages(profile, user_id, [HumanMessage(content="안녕하세요")])
+        assert messages[0] is STATIC_SYSTEM_MESSAGE
+        prefixes.add(messages[0].content.encode("utf-8"))
+    assert len(prefixes) == 1
+
+
+def test_static_prefix_has_no_user_data():
+    memory = {"region": "서울특별시 마포구", "religion": "불교", "concerns": [{"topic": "건강", "count": 1}]}
+    for user_id, profile in PROFILES:
+        messages = build_messages(profile, user_id, [HumanMessage(content="안녕하세요")], memory)
+        assert user_id not in messages[0].content
+        assert user_id in messages[1].content
+        for value in profile.values():
+            if value:
+                assert value not in messages[0].content
+        assert "마포구" not in messages[0].content
+
+
+def test_static_prompt_has_no_format_placeholders():
+    assert "{" not in STATIC_SYSTEM_PROMPT and "}" not in STATIC_SYSTEM_PROMPT
+
+
+def test_check_prefix_stability_helper():
+    report = empathy_agent.check_prefix_stability()
+    assert report["users"] == 3
+    assert report["prefix_bytes"] == len(STATIC_SYSTEM_PROMPT.encode("utf-8"))
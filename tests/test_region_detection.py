@@ -0,0 +1,44 @@
+import pytest
+
+from chatbot.chatbot_modules.search_info import detect_region
+from chatbot.chatbot_modules.user_memory import extract_facts
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "상주가 해야 할 일이 뭐가 있나요",
+        "고령이라 걱정이에요",
+        "오래 장수하고 싶어요",
+        "강화된 지원금 기준이 궁금해요",
+        "고양이를 키우고 있어요",
+        "구미가 당기지 않아요",
+        "동작이 느려졌어요",
+        "예산이 얼마나 드나요",
+    ],
+)
+def test_everyday_words_are_not_regions(text):
+    assert detect_region([text]) is None
+    assert "region" not in extract_facts(text)
+
+
+@pytest.mark.parametrize(
+    "text, region",
+    [
+        ("상주시에 살아요", "상주시"),
+        ("고령군 화장 장려금", "고령군"),
+        ("장수군에서 장례를 치르려고요", "장수군"),
+        ("강화군 공영장례 조례", "강화군"),
+        ("수원에 살고 있어요", "수원시"),
+        ("서울 종로구 장례식장", "종로구"),
+        ("대구 수성구 근처", "수성구"),
+        ("경주시청에 문의했어요", "경주시"),
+    ],
+)
+def test_region_names_with_boundaries(text, region):
+    assert detect_region([text]) == region
+
+
+def test_region_not_matched_inside_word():
+    assert detect_region(["중구난방으로 이야기했네요"]) is None
+    assert detect_region(["서울에서 왔어요"]) == "서울특별시"
@@ -0,0 +1,32 @@
+import threading
+import time
+
+from chatbot.chatbot_modules import search_info
+
+
+def test_concurrent_client_init_builds_once_and_publishes_all_stores(monkeypatch):
+    for name in ("pc", "index", "embeddings", "vectorstore_ordinance", "vectorstore_funeral_facilities",
+                 "vectorstore_digital_legacy", "vectorstore_legacy"):
+        monkeypatch.setattr(search_info, name, None)
+    calls = []
+
+    def slow_build():
+        calls.append(1)
+        time.sleep(0.05)
+        stores = {ns: object() for ns in ("ordinance", "funeral_facilities", "digital_legacy", "legacy")}
+        return None, object(), object(), stores
+
+    monkeypatch.setattr(search_info, "_build_clients", slow_build)
+    ready = []
+
+    def caller():
+        search_info._init_clients()
+        ready.append(search_info.vectorstore_funeral_facilities is not None)
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert ready == [True] * 8
@@ -0,0 +1,62 @@
+from chatbot.chatbot_modules.user_memory import UserMemoryStore, extract_facts, merge_facts, _empty_memory
+
+
+def test_region_mention_without_residence_is_not_remembered():
+    memory = _empty_memory()
+    merge_facts(memory, extract_facts("상주시 화장 장려금은 얼마인가요"))
+    assert memory["region"] is None
+
+
+def test_residence_region_is_remembered_and_replaced():
+    memory = _empty_memory()
+    merge_facts(memory, extract_facts("저는 수원에 살아요"))
+    assert memory["region"] == "수원시"
+    merge_facts(memory, extract_facts("경주시 장례식장도 알려주세요"))
+    assert memory["region"] == "수원시"
+    merge_facts(memory, extract_facts("요즘은 경주시에 살고 있어요"))
+    assert memory["region"] == "경주시"
+
+
+def test_cache_sees_writes_from_other_workers(tmp_path):
+    # 같은 디렉터리를 쓰는 두 인스턴스 = 서로 다른 워커 프로세스
+    first = UserMemoryStore(str(tmp_path))
+    second = UserMemoryStore(str(tmp_path))
+    assert first.get("u1")["region"] is None  # 빈 기억이 캐시에 올라감
+
+    second.update("u1", ["저는 수원에 살아요"])
+    assert first.get("u1")["region"] == "수원시"
+
+    first.set_summary("u1", "요약", 4)
+    second.update("u1", ["불교 신자예요"])
+    stored = UserMemoryStore(str(tmp_path)).get("u1")
+    assert stored["history_summary"] == "요약"
+    assert stored["religion"] is not None
+    assert stored["region"] == "수원시"
+
+
+def test_engine_does_not_render_mentioned_place_as_residence():
+    from chatbot.conversation_engine import ConversationEngine
+    from chatbot.chatbot_modules.user_memory import render_memory
+
+    session = {
+        "user_profile": {},
+        "conversation_history": [{"role": "user", "content": "상주시 화장 장려금은 얼마인가요"}],
+    }
+    memory = ConversationEngine._turn_memory("only-mentions-place", session)
+    rendered = render_memory(memory)
+    assert memory["region"] is None
+    assert "거주 지역" not in rendered
+    assert "- 최근 언급 지역: 상주시" in rendered
+
+
+def test_engine_uses_profile_region_as_residence():
+    from chatbot.conversation_engine import ConversationEngine
+    from chatbot.chatbot_modules.user_memory import render_memory
+
+    session = {
+        "user_profile": {"region": "수원시"},
+        "conversation_history": [{"role": "user", "content": "상주시 화장 장려금은 얼마인가요"}],
+    }
+    rendered = render_memory(ConversationEngine._turn_memory("profile-region", session))
+    assert "- 거주 지역: 수원시" in rendered
+    assert "- 최근 언급 지역: 상주시" in rendered
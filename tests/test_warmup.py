@@ -0,0 +1,20 @@
+from chatbot.chatbot_modules import diagnostics, warmup
+
+
+def test_first_turn_tracking_is_bounded(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_MAX_USERS", 3)
+    warmer = warmup.UserWarmer()
+    for i in range(10):
+        assert warmer.turn_kind(f"u{i}") == "first_cold"
+    assert list(warmer._seen) == ["u7", "u8", "u9"]
+
+    assert warmer.turn_kind("u7") == "steady"
+    warmer.turn_kind("u10")
+    assert "u7" in warmer._seen and "u8" not in warmer._seen
+
+
+def test_warmup_users_cache_is_shrinkable():
+    warmup.warmer.turn_kind("shrink-me")
+    assert diagnostics.cache_sizes()["warmup_users"] >= 1
+    diagnostics.shrink_caches()
+    assert diagnostics.cache_sizes()["warmup_users"] == 0
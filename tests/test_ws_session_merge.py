@@ -0,0 +1,32 @@
+import pytest
+
+from chatbot import conversation_engine
+from chatbot.chatbot_modules.session_manager import SessionManager
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = conversation_engine.ConversationEngine.__new__(conversation_engine.ConversationEngine)
+    engine.session_manager = SessionManager(str(tmp_path))
+    monkeypatch.setattr(engine, "_run_turn", lambda user_id, session, text, mode: (f"답변: {text}", True))
+    monkeypatch.setattr(conversation_engine, "schedule_after_turn", lambda *args: None)
+    return engine
+
+
+def test_ws_turn_keeps_writes_made_after_connect(engine):
+    manager = engine.session_manager
+    manager.record_turn("u1", "처음", "안녕하세요", "chat")
+    connection_session = manager.load_session("u1")
+
+    # 연결이 열린 뒤 HTTP 턴과 프로필 변경이 파일에 기록됨
+    manager.record_turn("u1", "HTTP 질문", "HTTP 답변", "info")
+    manager.update_user_profile("u1", {"B1": "불안하다"})
+
+    engine.process_session_message("u1", connection_session, "웹소켓 질문", "chat")
+
+    stored = manager.load_session("u1")
+    contents = [m["content"] for m in stored["conversation_history"]]
+    assert contents == ["처음", "안녕하세요", "HTTP 질문", "HTTP 답변", "웹소켓 질문", "답변: 웹소켓 질문"]
+    assert stored["user_profile"]["emotion"] == "불안하다"
+    # 연결이 들고 있는 세션도 저장된 상태로 갱신된다
+    assert connection_session["conversation_history"] == stored["conversation_history"]